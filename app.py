@@ -122,195 +122,504 @@
     
 #     app.run(debug=True, host='0.0.0.0', port=5000)
 
-from flask import Flask, render_template, request, jsonify
+import contextlib
+import functools
+import io
+import threading
+import time
+from flask import Flask, Request, render_template, request, jsonify, url_for, g
 from flask_cors import CORS
-import pandas as pd
-from feature_extractors.classification_features import extract_classification_features
-from feature_extractors.regressors_features import extract_regression_features
-from preprocessing.scaler import scale_features
-from utils.load_models import load_model
-import constants
+from inference.batch import run_batch, models_version
+from inference.exported import get_exported_pipeline
+from inference.pipeline import analyze_audio
+from utils.load_models import registry as model_registry
+from utils.jobs import job_queue, QueueFullError
+from utils.admission import admission, client_id, request_cost, AdmissionError, ADMISSION_CONTROL
 import os
-import time
-import librosa
-from pydub import AudioSegment
+from utils.audio_io import AudioDecodeError, decode_upload
+from utils.spool import spool
+from utils.result_cache import result_cache, cache_key, file_key
+from inference.streaming import stream_sessions, StreamLimitError, STREAM_BLOCK_SECONDS
+from preprocessing.audio import AnalysisMemoryError, AudioQualityError, preprocessing_signature
+from preprocessing.windowed import check_in_memory, use_windowed, windowed_signature
+from inference.cascade import cascade_signature
+from feature_extractors.graph import plan_summary
+from feature_extractors.segmented import segmentation_signature
+from feature_extractors.fidelity import get_fidelity, fidelity_signature
+from utils import metrics
+import constants
+
+
+class SpoolRequest(Request):
+    """Uploads go to the spool: in memory when small, else a per-request file removed when the request ends."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return spool.open()
+
 
 app = Flask(__name__)
+app.request_class = SpoolRequest
 CORS(app)
 
-AUDIO_PATH = "audio_samples/audio.wav"
+# "eager": warm up before serving; "background": serve at once and warm up in a thread;
+# "lazy": no warm-up, models and heavy modules load on first use
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "eager")
+
+
+def warm_up():
+    """
+    Loads the models and the modules imported on first use, so no request pays for them.
+    Every model and scaler is loaded once per process; new files in models/ are hot-swapped.
+    Exported models are memory-mapped instead (no pickles, no sklearn) and reload on a new manifest.
+    """
+    started = time.perf_counter()
+    import scipy.signal  # noqa: F401  (resampling in preprocessing.audio)
+    if constants.INFERENCE_MODE == "exported":
+        get_exported_pipeline()
+    else:
+        model_registry.load_all()
+        model_registry.start_watcher()
+    for feature_set in ("classification", "regression"):
+        print(f"🧭 {plan_summary(feature_set)}")
+    print(f"🔥 Warm-up done in {time.perf_counter() - started:.2f}s")
+
+
+if STARTUP_MODE == "background":
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+elif STARTUP_MODE != "lazy":
+    warm_up()
+
+# State owned by other components, read when /metrics is scraped
+metrics.Gauge("job_queue_depth", "Analysis jobs queued or running.", function=job_queue.pending)
+metrics.Gauge("stream_sessions", "Open live analysis streams.", function=lambda: len(stream_sessions))
+metrics.Gauge("result_cache_entries", "Results held in the in-memory cache.",
+              function=lambda: result_cache.stats()["entries"])
+metrics.Counter("result_cache_hits_total", "Requests served from the result cache (either tier).",
+                function=lambda: result_cache.stats()["hits"] + result_cache.stats()["disk_hits"])
+metrics.Counter("result_cache_disk_hits_total", "Requests served from the SQLite tier of the result cache.",
+                function=lambda: result_cache.stats()["disk_hits"])
+metrics.Counter("result_cache_misses_total", "Requests that missed the result cache.",
+                function=lambda: result_cache.stats()["misses"])
+
+
+def _parse_fields(form):
+    """Read age, sex and optional test_time from the submitted form."""
+    age = int(form.get('age', 70))
+    sex_str = form.get('sex', 'male').lower()
+    user_test_time = form.get('test_time', None)
+    sex = 1 if sex_str in ['male', 'm', '1'] else 0
+    return age, sex, user_test_time
+
+
+def _defer_updrs(fn, *args):
+    """Queues the UPDRS stage of a cascaded analysis; None (skip it) when the queue is full."""
+    try:
+        return job_queue.submit(fn, *args)
+    except QueueFullError:
+        return None
+
+
+def _check_upload_size():
+    """413 for request bodies over the admission limit, before the upload is parsed."""
+    if ADMISSION_CONTROL:
+        admission.check_size(request.content_length)
+
+
+def _client():
+    return client_id(request.remote_addr, request.headers.get('X-Client-ID'),
+                     request.headers.get('X-Forwarded-For'))
+
+
+def _admit(audio_files):
+    """
+    Admission ticket held while the uploaded files are analyzed (None without
+    ADMISSION_CONTROL). Raises AdmissionError when the request is shed.
+    """
+    if not ADMISSION_CONTROL:
+        return contextlib.nullcontext()
+    return admission.admit_uploads(_client(), [audio_file.stream for audio_file in audio_files])
+
+
+def _admit_job(audio_file):
+    """
+    Admission ticket of a queued job (None without ADMISSION_CONTROL), costed
+    like /analyze; the job releases it when it finishes.
+    """
+    if not ADMISSION_CONTROL:
+        return None
+    ticket = admission.admit_uploads(_client(), [audio_file.stream])
+    ticket.timed = False  # queue wait is not processing time
+    return ticket
 
 
-def convert_to_wav(input_path, output_path):
-    """Convert uploaded audio (mp3, m4a, etc.) to WAV format."""
-    try:
-        audio = AudioSegment.from_file(input_path)
-        audio.export(output_path, format="wav")
-        print(f"🎧 Converted to WAV: {output_path}")
-    except Exception as e:
-        raise RuntimeError(f"Audio conversion failed: {e}")
+def _admit_stream(session, data, final=False):
+    """
+    Admission ticket held while a stream analyzes one POST of frames, costed
+    from the audio it makes the session analyze. Frames do not count against
+    the client's request rate; opening the stream did.
+    """
+    if not ADMISSION_CONTROL:
+        return contextlib.nullcontext()
+    seconds = session.pending_seconds(data, final)
+    return admission.admit(_client(), seconds, request_cost(seconds, session.analysis.sample_rate), rate=False)
 
 
-def calculate_test_time(audio_path):
-    """Calculate duration of audio in seconds."""
-    try:
-        y, sr = librosa.load(audio_path)
-        duration = round(len(y) / sr, 2)
-        print(f"🕒 Extracted test_time: {duration} seconds")
-        return duration
-    except Exception as e:
-        print(f"⚠️ Failed to calculate duration: {e}")
-        return 10.0  # fallback
+def _admission_response(error):
+    response = jsonify({'error': str(error)})
+    if error.retry_after is not None:
+        response.headers['Retry-After'] = str(error.retry_after)
+    return response, error.status
 
 
-def clean_audio_folder():  # 🧹 NEW FUNCTION
-    """Delete all previous audio files each time the page is refreshed."""
-    folder = "audio_samples"
-    deleted = 0
-    if os.path.exists(folder):
-        for file in os.listdir(folder):
-            file_path = os.path.join(folder, file)
-            if os.path.isfile(file_path):
-                os.remove(file_path)
-                deleted += 1
-    print(f"🧹 Cleaned {deleted} old audio files.")
+def _no_cache(response):
+    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+    response.headers['Pragma'] = 'no-cache'
+    response.headers['Expires'] = '0'
+    return response
 
 
-def run_pipeline(audio_path=AUDIO_PATH, age=70, sex=0, test_time=50.0):
-    print("\n🎙️ Starting Parkinson Prediction Pipeline...\n")
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+    metrics.start_timings()
+    metrics.requests_in_flight.inc()
 
-    # 1️⃣ Classification
-    classification_df = extract_classification_features(audio_path)
-    classification_df.to_csv("data_storage/classification_features.csv", index=False)
-    print("✅ Classification features extracted.")
 
-    classification_scaled = scale_features(classification_df, "models/scaler_classification.pkl")
-    clf_model = load_model("classification.pkl")
+@app.after_request
+def _add_timing_headers(response):
+    """Per-stage breakdown of this request (Server-Timing) and request metrics."""
+    elapsed = time.perf_counter() - g.request_started
+    endpoint = request.endpoint or 'unknown'
+    if endpoint != 'metrics_endpoint':
+        metrics.request_seconds.observe(elapsed, endpoint=endpoint)
+        metrics.requests_total.inc(endpoint=endpoint, code=response.status_code)
+        response.headers['Server-Timing'] = metrics.server_timing(metrics.collected_timings(), elapsed)
+        response.headers['Timing-Allow-Origin'] = '*'
+    return response
 
-    if hasattr(clf_model, "predict_proba"):
-        proba = clf_model.predict_proba(classification_scaled)[0][1]
-        print(f"🧩 Parkinson Probability: {proba:.3f}")
-    else:
-        proba = float(clf_model.predict(classification_scaled)[0])
-        print(f"⚠️ Model does not support probability — using direct prediction: {proba}")
-
-    # 2️⃣ Regression features (common)
-    regression_df = extract_regression_features(audio_path, age, sex, test_time)
-    print("✅ Regression features extracted.")
-
-    # Separate dataframes for with-age and without-age models
-    regression_with_age = regression_df.copy()
-    regression_without_age = regression_df.drop(columns=["age"])
-
-    # 3️⃣ Scale using respective scalers
-    scaled_with_age = scale_features(regression_with_age, "models/scaler_regression_age.pkl")
-    scaled_without_age = scale_features(regression_without_age, "models/scaler_regression_without_age.pkl")
-
-    # 4️⃣ Load both model sets
-    motor_with_age = load_model("motor_updrs_model_age.pkl")
-    motor_without_age = load_model("motor_updrs_model_without_age.pkl")
-    total_with_age = load_model("total_updrs_model_age.pkl")
-    total_without_age = load_model("total_updrs_model_without_age.pkl")
-
-    # 5️⃣ Predictions
-    motor_pred_age = motor_with_age.predict(scaled_with_age)[0]
-    motor_pred_wo_age = motor_without_age.predict(scaled_without_age)[0]
-    total_pred_age = total_with_age.predict(scaled_with_age)[0]
-    total_pred_wo_age = total_without_age.predict(scaled_without_age)[0]
-
-    # Weighted ensemble (less weight for with-age models)
-    constants.MOTOR_UPDRS_SCORE = round((0.35 * motor_pred_age + 0.65 * motor_pred_wo_age), 2)
-    constants.TOTAL_UPDRS_SCORE = round((0.35 * total_pred_age + 0.65 * total_pred_wo_age), 2)
-
-    print(f"🎯 Motor UPDRS (ensemble): {constants.MOTOR_UPDRS_SCORE}")
-    print(f"🎯 Total UPDRS (ensemble): {constants.TOTAL_UPDRS_SCORE}")
-
-    # 6️⃣ Final decision based on hybrid logic
-    motor = constants.MOTOR_UPDRS_SCORE
-    total = constants.TOTAL_UPDRS_SCORE
-
-    if proba < 0.4 and motor < 8 and total < 10:
-        constants.PARKINSON_STATUS = "Healthy"
-    elif 0.4 <= proba < 0.65 or (8 <= motor < 15 or 10 <= total < 20):
-        constants.PARKINSON_STATUS = "Minor Parkinson"
-    elif 0.65 <= proba < 0.85 or (15 <= motor < 25 or 20 <= total < 35):
-        constants.PARKINSON_STATUS = "Moderate Parkinson"
-    else:
-        constants.PARKINSON_STATUS = "Severe Parkinson"
 
-    print(f"🧠 Final Assessment: {constants.PARKINSON_STATUS}")
-    print("\n🚀 Pipeline Complete!\n----------------------------------")
+@app.teardown_request
+def _end_request(error=None):
+    metrics.requests_in_flight.dec()
+
+
+def _upload_audio(audio_file, age, sex, test_time, version):
+    """
+    (audio, result cache key) of an upload. Recordings too long to decode in
+    memory are analyzed in windows straight from the upload's file and keyed
+    by its bytes; others are decoded in memory (no temp files).
+    """
+    if use_windowed(audio_file.stream):
+        audio = audio_file.stream
+        return audio, file_key(audio, age, sex, test_time, f"{version}:{windowed_signature()}")
+    audio = decode_upload(audio_file)
+    return audio, cache_key(*audio, age, sex, test_time, version)
+
+
+def _no_cache_requested():
+    """Cache-Control: no-cache asks for a fresh analysis (the result is still stored)."""
+    return 'no-cache' in request.headers.get('Cache-Control', '')
+
+
+def _error_status(error):
+    """HTTP status of an analysis error, as /analyze answers it."""
+    if isinstance(error, AudioDecodeError):
+        return 415
+    if isinstance(error, AnalysisMemoryError):
+        return 413
+    if isinstance(error, AudioQualityError):
+        return 422
+    if isinstance(error, ValueError):
+        return 400
+    return 500
+
+
+def _record_outcomes(results):
+    for result in results:
+        metrics.outcomes_total.inc(status=result['status'])
 
-    return proba
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of this process's metrics."""
+    return metrics.render(), 200, {'Content-Type': metrics.CONTENT_TYPE}
 
 
 @app.route('/')
 def index():
-    clean_audio_folder()  # 🧹 Automatically clean old files on refresh or first visit
     return render_template('index.html')
 
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
     try:
+        _check_upload_size()
         audio_file = request.files.get('audio')
         if not audio_file:
             return jsonify({'error': 'No audio file provided'}), 400
 
         # ✅ Get user-provided data
-        age = int(request.form.get('age', 70))
-        sex_str = request.form.get('sex', 'male').lower()
-        user_test_time = request.form.get('test_time', None)
-        sex = 1 if sex_str in ['male', 'm', '1'] else 0
-
-        # Save uploaded/recorded audio
-        file_ext = os.path.splitext(audio_file.filename)[1].lower()
-        raw_audio_path = os.path.join('audio_samples', f"audio_raw_{int(time.time())}{file_ext}")
-        wav_audio_path = os.path.join('audio_samples', f"audio_{int(time.time())}.wav")
-        audio_file.save(raw_audio_path)
-        print(f"💾 Audio saved: {raw_audio_path}")
-
-        # Convert to WAV if needed
-        if file_ext != ".wav":
-            convert_to_wav(raw_audio_path, wav_audio_path)
-        else:
-            wav_audio_path = raw_audio_path
-
-        # Determine test_time
-        if user_test_time:
-            test_time = float(user_test_time)
-            print(f"🧮 Using user-provided test_time: {test_time}")
-        else:
-            test_time = calculate_test_time(wav_audio_path)
-
-        # Run prediction pipeline
-        proba = run_pipeline(wav_audio_path, age, sex, test_time)
-
-        response = jsonify({
-            'status': constants.PARKINSON_STATUS,
-            'probability': round(proba, 3),
-            'motor_updrs': constants.MOTOR_UPDRS_SCORE,
-            'total_updrs': constants.TOTAL_UPDRS_SCORE,
-            'test_time': test_time
-        })
-        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
+        age, sex, user_test_time = _parse_fields(request.form)
+        fidelity = get_fidelity(request.form.get('fidelity'))
+
+        with _admit([audio_file]) as ticket:
+            # Identical audio + inputs + model set -> serve the stored result without re-running
+            test_time_key = float(user_test_time) if user_test_time else None
+            version = (f"{models_version()}:{preprocessing_signature()}:{cascade_signature()}:"
+                       f"{segmentation_signature()}:{fidelity_signature(fidelity)}")
+            audio, key = _upload_audio(audio_file, age, sex, test_time_key, version)
+            result = None if _no_cache_requested() else result_cache.get(key)
+            cache_status = 'HIT'
+            if result is None:
+                cache_status = 'MISS'
+                result = analyze_audio(audio, age, sex, user_test_time, request.headers.get('X-Request-ID'),
+                                       defer=_defer_updrs, fidelity=fidelity.name)
+                if 'updrs_job' not in result:  # deferred jobs expire; recompute rather than serve a stale id
+                    result_cache.put(key, result)
+            elif ticket is not None:
+                ticket.timed = False  # served from the cache: no processing time to learn from
+        _record_outcomes([result])
+
+        response = _no_cache(jsonify(result))
+        response.headers['X-Result-Cache'] = cache_status
         return response
 
+    except AdmissionError as e:
+        return _admission_response(e)
+
+    except AudioDecodeError as e:
+        return jsonify({'error': str(e)}), 415
+
+    except AnalysisMemoryError as e:
+        return jsonify({'error': str(e)}), 413
+
+    except AudioQualityError as e:
+        return jsonify({'error': str(e)}), 422
+
+    except ValueError as e:  # malformed form fields (age, test_time, fidelity)
+        return jsonify({'error': str(e)}), 400
+
     except Exception as e:
         print(f"❌ Error during analysis: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    try:
+        audio_file = request.files.get('audio')
+        if not audio_file:
+            return jsonify({'error': 'No audio file provided'}), 400
+
+        age, sex, user_test_time = _parse_fields(request.form)
+        fidelity = get_fidelity(request.form.get('fidelity')).name
+        ticket = _admit_job(audio_file)
+        try:
+            audio = decode_upload(audio_file)
+            check_in_memory(audio[0])  # jobs analyze in memory; refuse now rather than fail in the pool
+            job_id = job_queue.submit(functools.partial(analyze_audio, fidelity=fidelity),
+                                      audio, age, sex, user_test_time,
+                                      on_done=ticket.release if ticket is not None else None)
+        except BaseException:
+            if ticket is not None:
+                ticket.release()
+            raise
+
+        response = jsonify({'job_id': job_id, 'status': 'queued'})
+        response.headers['Location'] = url_for('job_status', job_id=job_id)
+        return _no_cache(response), 202
+
+    except QueueFullError as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+
+    except AdmissionError as e:
+        return _admission_response(e)
+
+    except AudioDecodeError as e:
+        return jsonify({'error': str(e)}), 415
+
+    except AnalysisMemoryError as e:
+        return jsonify({'error': str(e)}), 413
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        print(f"❌ Error while queueing job: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return _no_cache(jsonify(job))
+
+
+@app.route('/stream', methods=['POST'])
+def open_stream():
+    """Opens a live analysis stream; frames are then POSTed to /stream/<stream_id>."""
+    try:
+        age, sex, user_test_time = _parse_fields(request.form)
+        sample_rate = int(request.form.get('sample_rate', 0))
+        if sample_rate <= 0:
+            return jsonify({'error': 'sample_rate is required'}), 400
+        if ADMISSION_CONTROL:
+            # Counts against the client's request rate; refused while the server is full
+            admission.admit(_client(), 0, 0).release()
+
+        session = stream_sessions.open(sample_rate, age, sex, user_test_time, request.form.get('format', 'float32'),
+                                       request.form.get('fidelity'))
+        response = jsonify({'stream_id': session.stream_id, 'block_seconds': STREAM_BLOCK_SECONDS})
+        response.headers['Location'] = url_for('stream_frames', stream_id=session.stream_id)
+        return _no_cache(response), 201
+
+    except AdmissionError as e:
+        return _admission_response(e)
+    except StreamLimitError as e:
+        return jsonify({'error': str(e)}), 429
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/stream/<stream_id>', methods=['POST'])
+def stream_frames(stream_id):
+    """Appends raw mono PCM frames (request body) and returns the provisional prediction."""
+    session = stream_sessions.get(stream_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired stream'}), 404
+    try:
+        data = request.get_data()
+        with session.lock, _admit_stream(session, data):
+            return _no_cache(jsonify(session.feed(data)))
+    except AdmissionError as e:
+        return _admission_response(e)  # frames not taken; the client resends them after Retry-After
+    except StreamLimitError as e:
+        stream_sessions.close(stream_id)
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error during stream analysis: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/stream/<stream_id>/close', methods=['POST'])
+def close_stream(stream_id):
+    """Takes any last frames, finishes the analysis and returns the final result."""
+    session = stream_sessions.get(stream_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired stream'}), 404
+    try:
+        data = request.get_data()
+        session.check_frames(data)
+        # Admitted before the session is removed, so a shed close can be retried
+        with session.lock, _admit_stream(session, data, final=True):
+            if stream_sessions.close(stream_id) is None:
+                return jsonify({'error': 'Unknown or expired stream'}), 404
+            session.feed(data)
+            result = session.finish()
+        _record_outcomes([result])
+        return _no_cache(jsonify(result))
+    except AdmissionError as e:
+        return _admission_response(e)
+    except AudioQualityError as e:
+        return jsonify({'error': str(e)}), 422
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error while closing stream: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+def _form_value(values, index, default):
+    """Per-file form value: one value per file, a single shared value, or the default."""
+    if len(values) > index:
+        return values[index]
+    if len(values) == 1:
+        return values[0]
+    return default
+
+
+@app.route('/analyze_batch', methods=['POST'])
+def analyze_batch():
+    try:
+        _check_upload_size()
+        audio_files = request.files.getlist('audio')
+        if not audio_files:
+            return jsonify({'error': 'No audio files provided'}), 400
+
+        ages = request.form.getlist('age')
+        sexes = request.form.getlist('sex')
+        test_times = request.form.getlist('test_time')
+        fidelity = get_fidelity(request.form.get('fidelity'))
+        # Batches always run every model, so their results are cached apart from /analyze's
+        version = (f"{models_version()}:{preprocessing_signature()}:batch:"
+                   f"{segmentation_signature()}:{fidelity_signature(fidelity)}")
+
+        with _admit(audio_files) as ticket:
+            # Each file goes the way /analyze takes it (windowed or in memory, result cache),
+            # and a file that fails gets its own error entry instead of failing the batch
+            results = [None] * len(audio_files)
+            pending = []  # (index, cache key, run_batch item)
+            for i, audio_file in enumerate(audio_files):
+                try:
+                    age = int(_form_value(ages, i, 70))
+                    sex_str = str(_form_value(sexes, i, 'male')).lower()
+                    sex = 1 if sex_str in ['male', 'm', '1'] else 0
+                    user_test_time = _form_value(test_times, i, None)
+                    test_time = float(user_test_time) if user_test_time else None
+                    audio, key = _upload_audio(audio_file, age, sex, test_time, version)
+                except ValueError as e:
+                    results[i] = e
+                    continue
+                results[i] = None if _no_cache_requested() else result_cache.get(key)
+                if results[i] is None:
+                    if not isinstance(audio, tuple):
+                        # A windowed upload: the pool worker reads its spool file (or its bytes)
+                        audio = io.BytesIO(audio.getvalue()) if audio.in_memory else audio.path
+                    pending.append((i, key, (audio, age, sex, test_time)))
+
+            for (i, key, _), result in zip(pending, run_batch([item for *_, item in pending], fidelity.name)):
+                if not isinstance(result, Exception):
+                    result_cache.put(key, result)
+                results[i] = result
+            if ticket is not None and not pending:
+                ticket.timed = False  # all served from the cache
+
+        for i, (audio_file, result) in enumerate(zip(audio_files, results)):
+            if isinstance(result, Exception):
+                if _error_status(result) == 500:
+                    print(f"❌ Error analyzing {audio_file.filename}: {str(result)}")
+                results[i] = {'filename': audio_file.filename, 'error': str(result), 'code': _error_status(result)}
+            else:
+                results[i] = dict(result, filename=audio_file.filename)
+        _record_outcomes([result for result in results if 'error' not in result])
+
+        return _no_cache(jsonify({'results': results}))
+
+    except AdmissionError as e:
+        return _admission_response(e)
+
+    except ValueError as e:  # malformed fidelity
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        print(f"❌ Error during batch analysis: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
 if __name__ == "__main__":
     os.makedirs("data_storage", exist_ok=True)
     os.makedirs("audio_samples", exist_ok=True)
     os.makedirs("templates", exist_ok=True)
-    
+
     print("🚀 Starting Flask Server...")
     print(f"📁 Make sure index.html is in: {os.path.abspath('templates')}")
     print("📱 Open http://localhost:5000 in your browser")
     print("----------------------------------")
-    
-    app.run(debug=True, host='0.0.0.0', port=5000)
+
+    app.run(host='0.0.0.0', port=5000)
@@ -1,3 +1,30 @@
-PARKINSON_STATUS = None
-MOTOR_UPDRS_SCORE = None
-TOTAL_UPDRS_SCORE = None
\ No newline at end of file
+import os
+
+# Model and scaler artifacts (served from utils.load_models.registry)
+MODELS_DIR = os.environ.get("MODELS_DIR", "models")
+CLASSIFICATION_SCALER = os.path.join(MODELS_DIR, "scaler_classification.pkl")
+REGRESSION_SCALER_AGE = os.path.join(MODELS_DIR, "scaler_regression_age.pkl")
+REGRESSION_SCALER_WITHOUT_AGE = os.path.join(MODELS_DIR, "scaler_regression_without_age.pkl")
+CLASSIFICATION_MODEL = "classification.pkl"
+MOTOR_MODEL_AGE = "motor_updrs_model_age.pkl"
+MOTOR_MODEL_WITHOUT_AGE = "motor_updrs_model_without_age.pkl"
+TOTAL_MODEL_AGE = "total_updrs_model_age.pkl"
+TOTAL_MODEL_WITHOUT_AGE = "total_updrs_model_without_age.pkl"
+
+# Scaler in front of each model; its feature_names_in_ lists the columns the model needs
+MODEL_SCALERS = {
+    CLASSIFICATION_MODEL: CLASSIFICATION_SCALER,
+    MOTOR_MODEL_AGE: REGRESSION_SCALER_AGE,
+    MOTOR_MODEL_WITHOUT_AGE: REGRESSION_SCALER_WITHOUT_AGE,
+    TOTAL_MODEL_AGE: REGRESSION_SCALER_AGE,
+    TOTAL_MODEL_WITHOUT_AGE: REGRESSION_SCALER_WITHOUT_AGE,
+}
+# Models fed by each feature frame
+FEATURE_SET_MODELS = {
+    "classification": (CLASSIFICATION_MODEL,),
+    "regression": (MOTOR_MODEL_AGE, MOTOR_MODEL_WITHOUT_AGE, TOTAL_MODEL_AGE, TOTAL_MODEL_WITHOUT_AGE),
+}
+
+# "sklearn" (default), "compiled" (pure NumPy path, see inference/compiled.py)
+# or "exported" (pure NumPy from tools/export_models.py output, no pickles; see inference/exported.py)
+INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "sklearn")
@@ -0,0 +1,80 @@
+import parselmouth
+from functools import cached_property
+from feature_extractors.fidelity import TIERS
+from feature_extractors.perturbation import pulse_times, peak_amplitudes, jitter_measures, shimmer_measures
+
+
+class AudioAnalysis:
+    """
+    Per-request acoustic analysis context.
+    Decodes the recording once and computes the shared Praat objects
+    (pitch, pulses, harmonicity) on first use, so every extractor reuses them.
+    """
+    fidelity = TIERS["standard"]  # time steps of the Praat analyses (set by prepare_analysis)
+
+    def __init__(self, audio_path: str = None, sound=None):
+        self.audio_path = audio_path
+        self.sound = sound if sound is not None else parselmouth.Sound(audio_path)
+        # Feature graph node values computed outside the whole-file Praat pass
+        # (segment-parallel analysis); the graph does not recompute them
+        self.precomputed = {}
+
+    @classmethod
+    def from_samples(cls, samples, sample_rate):
+        """
+        Builds the analysis from an in-memory (channels, n) array; no file is read.
+        """
+        return cls(sound=parselmouth.Sound(samples, sampling_frequency=sample_rate))
+
+    @cached_property
+    def duration(self) -> float:
+        return round(self.sound.get_total_duration(), 2)
+
+    @cached_property
+    def signal(self):
+        return self.sound.values[0]
+
+    @cached_property
+    def pitch(self):
+        return self.sound.to_pitch(time_step=self.fidelity.pitch_time_step)
+
+    @cached_property
+    def pulses(self):
+        return parselmouth.praat.call(self.sound, "To PointProcess (periodic, cc)", 75, 500)
+
+    @cached_property
+    def harmonicity(self):
+        return parselmouth.praat.call(self.sound, "To Harmonicity (cc)", self.fidelity.harmonicity_time_step,
+                                      75, 0.1, 1.0)
+
+    @cached_property
+    def times(self):
+        """Pulse times as one array."""
+        return pulse_times(self.pulses)
+
+    @cached_property
+    def jitter(self) -> dict:
+        """Every jitter variant (needs the pulses only)."""
+        return jitter_measures(self.times)
+
+    @cached_property
+    def shimmer(self) -> dict:
+        """Every shimmer variant (needs per-period peak amplitudes from the sound)."""
+        return shimmer_measures(*peak_amplitudes(self.sound, self.times))
+
+    @cached_property
+    def perturbation(self) -> dict:
+        """Every jitter and shimmer variant, computed once from the pulse array."""
+        return {**self.jitter, **self.shimmer}
+
+
+def get_analysis(audio) -> AudioAnalysis:
+    """
+    Returns an AudioAnalysis for a file path, a (samples, sample_rate) tuple
+    or an existing analysis.
+    """
+    if isinstance(audio, AudioAnalysis):
+        return audio
+    if isinstance(audio, tuple):
+        return AudioAnalysis.from_samples(*audio)
+    return AudioAnalysis(audio)
@@ -63,48 +63,19 @@
 #     df.to_csv(save_path, index=False)
 #     print(f"✅ Classification features saved at: {save_path}")
 
-import parselmouth
-import numpy as np
 import pandas as pd
+from feature_extractors.analysis import get_analysis
+from feature_extractors.graph import compute, required_columns
 
-def extract_classification_features(audio_path: str) -> pd.DataFrame:
+
+def extract_classification_features(audio_path, columns=None) -> pd.DataFrame:
     """
-    Extracts the top 10 important voice features for Parkinson classification.
+    Extracts the voice features the loaded classification model needs
+    (its scaler's feature_names_in_), computing only their dependencies.
+    Accepts a file path or a shared AudioAnalysis.
     """
-    sound = parselmouth.Sound(audio_path)
-    pitch = sound.to_pitch()
-    pulses = parselmouth.praat.call(sound, "To PointProcess (periodic, cc)", 75, 500)
-
-    Fo = parselmouth.praat.call(pitch, "Get mean", 0, 0, "Hertz")
-    Fhi = parselmouth.praat.call(pitch, "Get maximum", 0, 0, "Hertz", "Parabolic")
-    Flo = parselmouth.praat.call(pitch, "Get minimum", 0, 0, "Hertz", "Parabolic")
-
-    jitter_percent = parselmouth.praat.call(pulses, "Get jitter (local)", 0, 0, 75, 500, 1.3)
-    rap = parselmouth.praat.call(pulses, "Get jitter (rap)", 0, 0, 75, 500, 1.3)
-    ppq = parselmouth.praat.call(pulses, "Get jitter (ppq5)", 0, 0, 75, 500, 1.3)
-    ddp = 3 * rap
-
-    shimmer_apq5 = parselmouth.praat.call([sound, pulses], "Get shimmer (apq5)", 0, 0, 75, 500, 1.3, 1.6)
-    shimmer_apq11 = parselmouth.praat.call([sound, pulses], "Get shimmer (apq11)", 0, 0, 75, 500, 1.3, 1.6)
-
-    hnr = parselmouth.praat.call(sound, "To Harmonicity (cc)", 0.01, 75, 0.1, 1.0)
-    HNR = parselmouth.praat.call(hnr, "Get mean", 0, 0)
-    NHR = 1 / (1 + 10 ** (HNR / 10))
-
-    features = {
-        "NHR": NHR,
-        "Fo(Hz)": Fo,
-        "Jitter:DDP": ddp,
-        "Flo(Hz)": Flo,
-        "Fhi(Hz)": Fhi,
-        "Jitter:RAP": rap,
-        "Shimmer:APQ11": shimmer_apq11,
-        "Jitter(%)": jitter_percent,
-        "Shimmer:APQ5": shimmer_apq5,
-        "Jitter:PPQ": ppq
-    }
-
-    df = pd.DataFrame([features])
+    analysis = get_analysis(audio_path)
+    df = compute(analysis, columns or required_columns("classification"))
     print(df)
     return df
 
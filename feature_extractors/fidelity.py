@@ -0,0 +1,52 @@
+"""
+Analysis fidelity tiers: how finely a recording is analyzed.
+
+- fast: 16 kHz and 20 ms pitch/harmonicity steps, for screening;
+- standard: the server's settings (ANALYSIS_SAMPLE_RATE, Praat's default pitch
+  step, 10 ms harmonicity step, ANALYSIS_WINDOW_SECONDS);
+- precise: the recording's own rate, 5 ms steps and longer windows, for clinical review.
+
+FIDELITY sets the server default; requests choose with their `fidelity` field.
+tools/fidelity_report.py measures each tier's feature and status drift and its speedup.
+"""
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Fidelity:
+    """Analysis settings of one tier; None keeps the server's setting."""
+    name: str
+    sample_rate: Optional[int]  # analysis rate in Hz; 0 keeps the recording's own rate
+    pitch_time_step: Optional[float]  # None: Praat's default (0.75 / pitch floor)
+    harmonicity_time_step: float
+    window_seconds: Optional[float]  # audio per Praat block in the windowed analysis
+
+
+TIERS = {
+    "fast": Fidelity("fast", 16000, 0.02, 0.02, None),
+    "standard": Fidelity("standard", None, None, 0.01, None),
+    "precise": Fidelity("precise", 0, 0.005, 0.005, 30.0),
+}
+
+FIDELITY = os.environ.get("FIDELITY", "standard")
+if FIDELITY not in TIERS:
+    raise ValueError(f"FIDELITY must be one of {', '.join(TIERS)}, not {FIDELITY!r}")
+
+
+def get_fidelity(name: str = None) -> Fidelity:
+    """The tier called `name` (the server default when empty); ValueError for unknown names."""
+    if isinstance(name, Fidelity):
+        return name
+    name = (name or FIDELITY).lower()
+    if name not in TIERS:
+        raise ValueError(f"Unknown fidelity {name!r} (choose {', '.join(TIERS)})")
+    return TIERS[name]
+
+
+def fidelity_signature(name: str = None) -> str:
+    """Identifies a tier's settings (part of result cache keys)."""
+    tier = get_fidelity(name)
+    return (f"fidelity:{tier.name}:{tier.sample_rate}:{tier.pitch_time_step}:{tier.harmonicity_time_step}:"
+            f"{tier.window_seconds}")
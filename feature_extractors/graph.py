@@ -0,0 +1,206 @@
+import threading
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+import parselmouth
+import constants
+from utils.load_models import registry
+from inference.exported import get_exported_pipeline
+
+# Request fields that become features as-is
+INPUTS = ("age", "sex", "test_time")
+
+# Column orders used when no loaded scaler declares feature_names_in_
+DEFAULT_COLUMNS = {
+    "classification": ["NHR", "Fo(Hz)", "Jitter:DDP", "Flo(Hz)", "Fhi(Hz)", "Jitter:RAP",
+                       "Shimmer:APQ11", "Jitter(%)", "Shimmer:APQ5", "Jitter:PPQ"],
+    "regression": ["age", "sex", "test_time", "Jitter(Abs)", "HNR", "NHR", "Shimmer:APQ5",
+                   "RPDE", "DFA", "PPE"],
+}
+
+
+@dataclass(frozen=True)
+class Feature:
+    """
+    One node of the feature graph: compute(analysis, values) returns the node's
+    value, where values holds every dependency already computed for this request.
+    """
+    name: str
+    deps: tuple
+    compute: object
+
+
+FEATURES = {}
+
+
+def feature(name: str, *deps):
+    """Registers compute(analysis, values) as the node `name` depending on `deps`."""
+    def register(compute):
+        FEATURES[name] = Feature(name, deps, compute)
+        return compute
+    return register
+
+
+def nhr(HNR):
+    """Noise-to-harmonics ratio from HNR (dB)."""
+    return 1 / (1 + 10 ** (HNR / 10))
+
+
+def ppe(jitter_abs, shimmer_apq5):
+    """Pitch period entropy approximation from absolute jitter and APQ5 shimmer."""
+    return np.abs(np.log10(np.mean([jitter_abs + shimmer_apq5 + 1e-6])))
+
+
+def signal_statistics(signal):
+    """
+    Approximations for the nonlinear dynamics measures (RPDE, DFA) from the raw signal.
+    """
+    mean_abs = np.mean(np.abs(signal))
+    RPDE = np.std(signal) / mean_abs if mean_abs != 0 else 0
+    DFA = np.mean(np.abs(np.diff(signal))) / (np.std(signal) + 1e-6)
+    return RPDE, DFA
+
+
+# Praat objects and per-recording arrays, memoized on the AudioAnalysis
+feature("sound")(lambda a, v: a.sound)
+feature("signal")(lambda a, v: a.signal)
+feature("pitch", "sound")(lambda a, v: a.pitch)
+feature("harmonicity", "sound")(lambda a, v: a.harmonicity)
+feature("pulses", "sound")(lambda a, v: a.pulses)
+feature("times", "pulses")(lambda a, v: a.times)
+feature("jitter", "times")(lambda a, v: a.jitter)
+feature("shimmer", "sound", "times")(lambda a, v: a.shimmer)
+feature("signal_statistics", "signal")(lambda a, v: signal_statistics(v["signal"]))
+
+# Model columns
+feature("Fo(Hz)", "pitch")(lambda a, v: parselmouth.praat.call(v["pitch"], "Get mean", 0, 0, "Hertz"))
+feature("Fhi(Hz)", "pitch")(lambda a, v: parselmouth.praat.call(v["pitch"], "Get maximum", 0, 0, "Hertz", "Parabolic"))
+feature("Flo(Hz)", "pitch")(lambda a, v: parselmouth.praat.call(v["pitch"], "Get minimum", 0, 0, "Hertz", "Parabolic"))
+feature("HNR", "harmonicity")(lambda a, v: parselmouth.praat.call(v["harmonicity"], "Get mean", 0, 0))
+feature("NHR", "HNR")(lambda a, v: nhr(v["HNR"]))
+feature("RPDE", "signal_statistics")(lambda a, v: v["signal_statistics"][0])
+feature("DFA", "signal_statistics")(lambda a, v: v["signal_statistics"][1])
+feature("PPE", "Jitter(Abs)", "Shimmer:APQ5")(lambda a, v: ppe(v["Jitter(Abs)"], v["Shimmer:APQ5"]))
+
+for _column, _measure in {"Jitter(%)": "jitter_local", "Jitter(Abs)": "jitter_abs", "Jitter:RAP": "jitter_rap",
+                          "Jitter:PPQ": "jitter_ppq5", "Jitter:PPQ5": "jitter_ppq5", "Jitter:DDP": "jitter_ddp"}.items():
+    feature(_column, "jitter")(lambda a, v, m=_measure: v["jitter"][m])
+for _column, _measure in {"Shimmer": "shimmer_local", "Shimmer(dB)": "shimmer_db", "Shimmer:APQ3": "shimmer_apq3",
+                          "Shimmer:APQ5": "shimmer_apq5", "Shimmer:APQ11": "shimmer_apq11",
+                          "Shimmer:DDA": "shimmer_dda"}.items():
+    feature(_column, "shimmer")(lambda a, v, m=_measure: v["shimmer"][m])
+
+
+def plan(columns, known=()) -> list:
+    """
+    Every node needed for the given columns, dependencies first. Nodes in
+    `known` (already computed elsewhere) are neither planned nor expanded.
+    Raises ValueError for a column no node produces.
+    """
+    order, seen = [], set(known)
+
+    def visit(name, required_by):
+        if name in seen or name in INPUTS:
+            return
+        if name not in FEATURES:
+            raise ValueError(f"No extractor for feature '{name}' (required by {required_by})")
+        seen.add(name)
+        for dep in FEATURES[name].deps:
+            visit(dep, name)
+        order.append(name)
+
+    for column in columns:
+        visit(column, "the loaded models")
+    return order
+
+
+def compute(analysis, columns, inputs=None) -> pd.DataFrame:
+    """
+    One-row DataFrame of `columns`, computing only the nodes they depend on.
+    `inputs` supplies the request fields (age, sex, test_time) and any node
+    values computed elsewhere (the streaming analysis passes its running measures);
+    the analysis' own precomputed nodes are used as well.
+    """
+    values = dict(getattr(analysis, "precomputed", None) or {})
+    values.update(inputs or {})
+    for name in plan(columns, known=values):
+        values[name] = FEATURES[name].compute(analysis, values)
+    return pd.DataFrame([{column: values[column] for column in columns}])
+
+
+def _models_generation():
+    """Changes whenever the serving models do (registry reload or new export)."""
+    if constants.INFERENCE_MODE == "exported":
+        return get_exported_pipeline().mtime
+    return registry.generation
+
+
+def model_columns(model_name: str):
+    """
+    Columns one model consumes: its own feature_names_in_, else its scaler's
+    (with INFERENCE_MODE=exported, the names recorded in the export manifest).
+    None when the model is not loaded or neither declares names.
+    """
+    if constants.INFERENCE_MODE == "exported":
+        return get_exported_pipeline().features(model_name)
+    try:
+        model = registry.get(model_name)
+    except FileNotFoundError:
+        return None
+    names = getattr(model, "feature_names_in_", None)
+    if names is None and model_name in constants.MODEL_SCALERS:
+        try:
+            names = getattr(registry.get(constants.MODEL_SCALERS[model_name]), "feature_names_in_", None)
+        except FileNotFoundError:
+            names = None
+    return None if names is None else list(names)
+
+
+_required = {}  # (feature set, models generation) -> columns
+_required_lock = threading.Lock()
+
+
+def required_columns(feature_set: str) -> list:
+    """
+    Union of the columns the loaded models of a feature set ("classification"
+    or "regression") consume, in the order their scalers declare them.
+    Recomputed after every model reload, so adding or removing a model grows
+    or shrinks the extraction work.
+    """
+    key = (feature_set, _models_generation())
+    columns = _required.get(key)
+    if columns is not None:
+        return columns
+
+    with _required_lock:
+        columns = []
+        declared = False
+        for model_name in constants.FEATURE_SET_MODELS[feature_set]:
+            names = model_columns(model_name)
+            if names is None:
+                continue
+            declared = True
+            columns += [name for name in names if name not in columns]
+        if not declared:
+            columns = list(DEFAULT_COLUMNS[feature_set])
+        plan(columns)  # fail at planning time for columns nothing can compute
+        if len(_required) > 16:
+            _required.clear()
+        # The lookups above may have loaded the models; key by the generation they saw
+        _required[(feature_set, _models_generation())] = columns
+    return columns
+
+
+def plan_summary(feature_set: str) -> str:
+    """One line on what the loaded models make a feature set extract (printed at warm-up)."""
+    columns = required_columns(feature_set)
+    return (f"{feature_set} features: {len(columns)} columns from "
+            f"{', '.join(n for n in plan(columns) if n not in columns)}")
+
+
+def column_nodes() -> list:
+    """
+    Every node that can be a model column, in registration order
+    (the Praat objects and per-recording arrays are lowercase intermediates).
+    """
+    return [name for name in FEATURES if name[:1].isupper()]
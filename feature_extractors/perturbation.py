@@ -0,0 +1,221 @@
+import parselmouth
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Praat defaults for voice reports (periods in seconds)
+PERIOD_FLOOR = 0.0001
+PERIOD_CEILING = 0.02
+MAX_PERIOD_FACTOR = 1.3
+MAX_AMPLITUDE_FACTOR = 1.6
+
+# Accepted relative deviation from Praat's own queries (see compare_with_praat)
+PRAAT_TOLERANCE = 1e-6
+
+
+def pulse_times(pulses) -> np.ndarray:
+    """
+    Pulse times of a PointProcess as one NumPy array (single Praat round-trip).
+    """
+    if parselmouth.praat.call(pulses, "Get number of points") == 0:
+        return np.zeros(0)
+    matrix = parselmouth.praat.call(pulses, "To Matrix")
+    return np.asarray(matrix.values[0], dtype=np.float64)
+
+
+def _factor(a, b):
+    return np.maximum(a, b) / np.minimum(a, b)
+
+
+def _mean_or_nan(values):
+    return float(np.mean(values)) if values.size else float("nan")
+
+
+def _valid_windows(in_range, pair_ok, k):
+    """
+    Mask of windows of k consecutive periods (or amplitudes) that are all in range
+    and whose k - 1 neighbouring pairs all satisfy the max-factor rule.
+    """
+    if in_range.size < k:
+        return np.zeros(0, dtype=bool)
+    valid = sliding_window_view(in_range, k).all(axis=1)
+    if k > 1:
+        valid &= sliding_window_view(pair_ok, k - 1).all(axis=1)
+    return valid
+
+
+def _perturbation_quotient(values, valid, k):
+    """
+    Mean absolute deviation of each window's centre from the window mean.
+    """
+    if not valid.any():
+        return float("nan")
+    windows = sliding_window_view(values, k)[valid]
+    return float(np.mean(np.abs(windows[:, k // 2] - windows.mean(axis=1))))
+
+
+def jitter_measures(times, pmin=PERIOD_FLOOR, pmax=PERIOD_CEILING, max_factor=MAX_PERIOD_FACTOR) -> dict:
+    """
+    Jitter (local, absolute, RAP, PPQ5, DDP) from pulse times, following
+    Praat's period floor/ceiling and maximum period factor rules.
+    """
+    periods = np.diff(times)
+    in_range = (periods >= pmin) & (periods <= pmax)
+    pair_ok = _factor(periods[:-1], periods[1:]) <= max_factor if periods.size > 1 else np.zeros(0, dtype=bool)
+
+    # Praat's mean period: in range and within the max factor of at least one neighbour
+    has_neighbour = np.r_[False, pair_ok] | np.r_[pair_ok, False] if periods.size > 1 else np.zeros(periods.size, dtype=bool)
+    mean_period = _mean_or_nan(periods[in_range & has_neighbour])
+
+    valid2 = _valid_windows(in_range, pair_ok, 2)
+    valid3 = _valid_windows(in_range, pair_ok, 3)
+    valid5 = _valid_windows(in_range, pair_ok, 5)
+
+    local_abs = _mean_or_nan(np.abs(np.diff(periods))[valid2])
+    rap = _perturbation_quotient(periods, valid3, 3)
+    ppq5 = _perturbation_quotient(periods, valid5, 5)
+    if valid3.any():
+        triples = sliding_window_view(periods, 3)[valid3]
+        ddp = float(np.mean(np.abs(triples[:, 2] - 2 * triples[:, 1] + triples[:, 0])))
+    else:
+        ddp = float("nan")
+
+    return {
+        "jitter_local": local_abs / mean_period,
+        "jitter_abs": local_abs,
+        "jitter_rap": rap / mean_period,
+        "jitter_ppq5": ppq5 / mean_period,
+        "jitter_ddp": ddp / mean_period,
+    }
+
+
+def _hann_windowed_rms(sound, tmid, width_left, width_right) -> np.ndarray:
+    """
+    Vectorized Praat Sound_getHannWindowedRms for many windows at once.
+    Windows with fewer than 3 samples are undefined (NaN).
+    """
+    values = sound.values
+    signal = values[0] if values.shape[0] == 1 else values.mean(axis=0)
+    n, x1, dx = signal.size, sound.x1, sound.dx
+
+    first = np.maximum(np.ceil((tmid - width_left - x1) / dx).astype(np.int64), 0)
+    last = np.minimum(np.floor((tmid + width_right - x1) / dx).astype(np.int64), n - 1)
+    lengths = last - first + 1
+    defined = lengths >= 3
+
+    rms = np.full(tmid.shape, np.nan)
+    if not defined.any():
+        return rms
+
+    first, lengths = first[defined], lengths[defined]
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    index = np.repeat(first - starts, lengths) + np.arange(lengths.sum())
+
+    centre = np.repeat(tmid[defined], lengths)
+    t = x1 + index * dx
+    width = np.where(t < centre, np.repeat(width_left[defined], lengths), np.repeat(width_right[defined], lengths))
+    window = 0.5 + 0.5 * np.cos(np.pi * (t - centre) / width)
+
+    windowed = signal[index] * window
+    rms[defined] = np.sqrt(np.add.reduceat(windowed * windowed, starts) / np.add.reduceat(window * window, starts))
+    return rms
+
+
+def peak_amplitudes(sound, times, pmin=PERIOD_FLOOR, pmax=PERIOD_CEILING, max_factor=MAX_PERIOD_FACTOR):
+    """
+    Per-period amplitudes (Praat's AmplitudeTier from PointProcess + Sound).
+    Returns (times, amplitudes) of the pulses that bound two valid periods.
+    """
+    if times.size < 3:
+        return np.zeros(0), np.zeros(0)
+    p1 = times[1:-1] - times[:-2]
+    p2 = times[2:] - times[1:-1]
+    ok = (p1 >= pmin) & (p1 <= pmax) & (p2 >= pmin) & (p2 <= pmax) & (_factor(p1, p2) <= max_factor)
+
+    tmid = times[1:-1][ok]
+    amplitudes = _hann_windowed_rms(sound, tmid, 0.2 * p1[ok], 0.2 * p2[ok])
+    keep = np.isfinite(amplitudes) & (amplitudes > 0)
+    return tmid[keep], amplitudes[keep]
+
+
+def shimmer_measures(amp_times, amplitudes, pmin=PERIOD_FLOOR, pmax=PERIOD_CEILING,
+                     max_amplitude_factor=MAX_AMPLITUDE_FACTOR) -> dict:
+    """
+    Shimmer (local, dB, APQ3, APQ5, APQ11, DDA) from per-period amplitudes.
+    """
+    nan = float("nan")
+    if amplitudes.size < 2:
+        return {key: nan for key in
+                ("shimmer_local", "shimmer_db", "shimmer_apq3", "shimmer_apq5", "shimmer_apq11", "shimmer_dda")}
+
+    intervals = np.diff(amp_times)
+    pair_ok = (intervals >= pmin) & (intervals <= pmax) & (_factor(amplitudes[:-1], amplitudes[1:]) <= max_amplitude_factor)
+    everything = np.ones(amplitudes.size, dtype=bool)
+    # Praat averages all amplitude points except the last one
+    mean_amplitude = float(np.mean(amplitudes[:-1]))
+
+    local = _mean_or_nan(np.abs(np.diff(amplitudes))[pair_ok])
+    local_db = _mean_or_nan(np.abs(20 * np.log10(amplitudes[1:] / amplitudes[:-1]))[pair_ok])
+    apq = {k: _perturbation_quotient(amplitudes, _valid_windows(everything, pair_ok, k), k) for k in (3, 5, 11)}
+
+    return {
+        "shimmer_local": local / mean_amplitude,
+        "shimmer_db": local_db,
+        "shimmer_apq3": apq[3] / mean_amplitude,
+        "shimmer_apq5": apq[5] / mean_amplitude,
+        "shimmer_apq11": apq[11] / mean_amplitude,
+        "shimmer_dda": 3 * apq[3] / mean_amplitude,
+    }
+
+
+def perturbation_measures(sound, pulses) -> dict:
+    """
+    Every jitter and shimmer variant from one pulse array and one amplitude array.
+    """
+    times = pulse_times(pulses)
+    amp_times, amplitudes = peak_amplitudes(sound, times)
+    measures = jitter_measures(times)
+    measures.update(shimmer_measures(amp_times, amplitudes))
+    return measures
+
+
+# Praat queries equivalent to each engine measure (for tolerance checks)
+_PRAAT_QUERIES = {
+    "jitter_local": "Get jitter (local)",
+    "jitter_abs": "Get jitter (local, absolute)",
+    "jitter_rap": "Get jitter (rap)",
+    "jitter_ppq5": "Get jitter (ppq5)",
+    "jitter_ddp": "Get jitter (ddp)",
+    "shimmer_local": "Get shimmer (local)",
+    "shimmer_db": "Get shimmer (local_dB)",
+    "shimmer_apq3": "Get shimmer (apq3)",
+    "shimmer_apq5": "Get shimmer (apq5)",
+    "shimmer_apq11": "Get shimmer (apq11)",
+    "shimmer_dda": "Get shimmer (dda)",
+}
+
+
+def compare_with_praat(sound, pulses, tolerance=PRAAT_TOLERANCE) -> dict:
+    """
+    Runs Praat's own jitter/shimmer queries and reports, per measure,
+    (engine value, Praat value, relative difference, within tolerance).
+    """
+    ours = perturbation_measures(sound, pulses)
+    report = {}
+    for name, query in _PRAAT_QUERIES.items():
+        if name.startswith("jitter"):
+            praat = parselmouth.praat.call(pulses, query, 0, 0, PERIOD_FLOOR, PERIOD_CEILING, MAX_PERIOD_FACTOR)
+        else:
+            praat = parselmouth.praat.call([sound, pulses], query, 0, 0, PERIOD_FLOOR, PERIOD_CEILING,
+                                           MAX_PERIOD_FACTOR, MAX_AMPLITUDE_FACTOR)
+        diff = abs(ours[name] - praat) / abs(praat) if praat else abs(ours[name] - praat)
+        report[name] = (ours[name], praat, diff, bool(diff <= tolerance))
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    sound = parselmouth.Sound(sys.argv[1] if len(sys.argv) > 1 else "audio_samples/audio.wav")
+    pulses = parselmouth.praat.call(sound, "To PointProcess (periodic, cc)", 75, 500)
+    for name, (ours, praat, diff, ok) in compare_with_praat(sound, pulses).items():
+        print(f"{'✅' if ok else '❌'} {name:15s} engine={ours:.6g}  praat={praat:.6g}  rel.diff={diff:.2%}")
@@ -70,49 +70,18 @@
 #     df.to_csv(save_path, index=False)
 #     print(f"✅ Regression features saved at: {save_path}")
 
-import parselmouth
-import numpy as np
 import pandas as pd
+from feature_extractors.analysis import get_analysis
+from feature_extractors.graph import compute, required_columns
 
-def extract_regression_features(audio_path: str, age: int, sex: int, test_time: float) -> pd.DataFrame:
+
+def extract_regression_features(audio_path, age: int, sex: int, test_time: float, columns=None) -> pd.DataFrame:
     """
-    Extracts top 10 regression features for UPDRS models.
+    Extracts the features the loaded UPDRS models need (union of their
+    scalers' feature_names_in_), computing only their dependencies.
     'age', 'sex', and 'test_time' are passed from the frontend.
+    Accepts a file path or a shared AudioAnalysis.
     """
-    sound = parselmouth.Sound(audio_path)
-    pitch = sound.to_pitch()
-    pulses = parselmouth.praat.call(sound, "To PointProcess (periodic, cc)", 75, 500)
-
-    # Acoustic features
-    jitter_abs = parselmouth.praat.call(pulses, "Get jitter (local, absolute)", 0, 0, 75, 500, 1.3)
-    shimmer_apq5 = parselmouth.praat.call([sound, pulses], "Get shimmer (apq5)", 0, 0, 75, 500, 1.3, 1.6)
-    
-    hnr_obj = parselmouth.praat.call(sound, "To Harmonicity (cc)", 0.01, 75, 0.1, 1.0)
-    HNR = parselmouth.praat.call(hnr_obj, "Get mean", 0, 0)
-    NHR = 1 / (1 + 10 ** (HNR / 10))
-
-    # Approximations for nonlinear dynamics
-    signal = sound.values[0]
-    RPDE = np.std(signal) / np.mean(np.abs(signal)) if np.mean(np.abs(signal)) != 0 else 0
-    DFA = np.mean(np.abs(np.diff(signal))) / (np.std(signal) + 1e-6)
-    PPE = np.abs(np.log10(np.mean([jitter_abs + shimmer_apq5 + 1e-6])))
-
-    # Build feature dictionary
-    features = {
-        "age": age,
-        "sex": sex,
-        "test_time": test_time,
-        "Jitter(Abs)": jitter_abs,
-        "HNR": HNR,
-        "NHR": NHR,
-        "Shimmer:APQ5": shimmer_apq5,
-        "RPDE": RPDE,
-        "DFA": DFA,
-        "PPE": PPE
-    }
-
-    df = pd.DataFrame([features])
-    save_path = "data_storage/regression_features.csv"
-    df.to_csv(save_path, index=False)
-    print(f"✅ Regression features saved at: {save_path}")
-    return df
\ No newline at end of file
+    analysis = get_analysis(audio_path)
+    inputs = {"age": age, "sex": sex, "test_time": test_time}
+    return compute(analysis, columns or required_columns("regression"), inputs)
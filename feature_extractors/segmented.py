@@ -0,0 +1,181 @@
+"""
+Segment-parallel Praat analysis for long recordings (opt-in, PARALLEL_EXTRACTION=1).
+
+The recording is cut at the quietest point near each nominal boundary, and
+every segment (plus context on both sides) is analyzed in a process pool with
+the same block analysis the streaming path uses. Voiced pitch frames and
+defined harmonicity frames are merged as running sums and extremes, and the
+pulse times are concatenated, so jitter and shimmer are then computed from
+the whole pulse array exactly as for a full-file analysis. Each segment is
+padded with silence so that Praat's frames fall on the whole recording's time
+grid (streaming.grid_aligned); the values then agree with the whole-file
+analysis within SEGMENT_TOLERANCE (see compare_with_full).
+"""
+import math
+import os
+import threading
+import numpy as np
+from feature_extractors.graph import compute, plan, required_columns
+from feature_extractors.streaming import guarded_segment, block_measures
+from utils.jobs import process_pool
+
+PARALLEL_EXTRACTION = os.environ.get("PARALLEL_EXTRACTION", "0") == "1"
+# Recordings shorter than this are analyzed in one piece
+PARALLEL_MIN_SECONDS = float(os.environ.get("PARALLEL_MIN_SECONDS", 60))
+PARALLEL_WORKERS = int(os.environ.get("PARALLEL_WORKERS", os.cpu_count() or 1))
+# Longest segment; long recordings get more segments than workers
+SEGMENT_SECONDS = float(os.environ.get("SEGMENT_SECONDS", 30))
+MIN_SEGMENT_SECONDS = 5.0
+# Audio on each side of a segment that Praat sees but whose frames/pulses are not kept
+SEGMENT_CONTEXT_SECONDS = 0.5
+# Cuts move to the quietest 10 ms frame within this distance of the nominal cut
+CUT_SEARCH_SECONDS = 0.25
+CUT_FRAME_SECONDS = 0.01
+# Largest relative difference per feature column accepted against the full analysis.
+# With the frame grids aligned, what is left is summation order and Praat's pitch
+# path search near the cuts (measured at most 0.02%)
+SEGMENT_TOLERANCE = 0.005
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def segmentation_signature() -> str:
+    """Identifies the segmentation settings (part of result cache keys)."""
+    if not PARALLEL_EXTRACTION:
+        return "segments:off"
+    return f"segments:grid:{PARALLEL_MIN_SECONDS}:{SEGMENT_SECONDS}:{PARALLEL_WORKERS}"
+
+
+def segment_count(duration: float, workers: int = PARALLEL_WORKERS) -> int:
+    """
+    A multiple of the worker count (every worker gets equal work), with segments
+    no longer than SEGMENT_SECONDS and no shorter than MIN_SEGMENT_SECONDS.
+    """
+    count = workers * math.ceil(duration / SEGMENT_SECONDS / workers)
+    return max(1, min(count, int(duration // MIN_SEGMENT_SECONDS)))
+
+
+def cut_points(signal, sample_rate: int, count: int) -> list:
+    """
+    Sample indices [0, ..., len(signal)] splitting the signal into `count` segments,
+    each inner cut moved to the quietest frame near its nominal position.
+    """
+    frame = max(1, int(CUT_FRAME_SECONDS * sample_rate))
+    search = int(CUT_SEARCH_SECONDS * sample_rate)
+    cuts = [0]
+    for nominal in np.linspace(0, signal.size, count + 1)[1:-1].astype(np.int64):
+        first = max(cuts[-1] + frame, nominal - search)
+        window = signal[first:nominal + search]
+        frames = window[:window.size // frame * frame].reshape(-1, frame)
+        if not frames.size:
+            continue
+        quietest = int(np.argmin(np.einsum("ij,ij->i", frames, frames)))
+        cuts.append(first + quietest * frame + frame // 2)
+    cuts.append(signal.size)
+    return cuts
+
+
+def _needs() -> dict:
+    """Which Praat analyses the loaded models' features depend on."""
+    nodes = plan(required_columns("classification") + required_columns("regression"))
+    return {
+        "pitch": any(name in nodes for name in ("Fo(Hz)", "Fhi(Hz)", "Flo(Hz)")),
+        "harmonicity": "HNR" in nodes,
+        "pulses": "times" in nodes,
+    }
+
+
+def _analyze_segment(samples, sample_rate, offset, start, end, peak, needs, fidelity, extent):
+    """Worker: block measures of [start, end) from samples that begin at `offset`."""
+    guard = int(SEGMENT_CONTEXT_SECONDS * sample_rate)
+    segment = guarded_segment(samples, sample_rate, offset, guard, peak)
+    return block_measures(segment, start / sample_rate, end / sample_rate, fidelity=fidelity, extent=extent, **needs)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = process_pool(PARALLEL_WORKERS)
+        return _executor
+
+
+def parallel_analysis(analysis, min_seconds: float = PARALLEL_MIN_SECONDS, enabled: bool = PARALLEL_EXTRACTION):
+    """
+    Runs the pitch, harmonicity and pulse analysis of a long recording in segments
+    across PARALLEL_WORKERS processes and stores the merged results on the analysis
+    (Fo/Fhi/Flo/HNR and the pulse times as precomputed graph nodes).
+    Returns the analysis; unchanged when disabled, short, or if the pool fails.
+    """
+    sound = analysis.sound
+    if not enabled or sound is None or sound.get_total_duration() < min_seconds:
+        return analysis  # no sound: a windowed analysis, already computed block by block
+    sample_rate = int(sound.sampling_frequency)
+    needs = _needs()
+    if not any(needs.values()):
+        return analysis
+
+    values = sound.values
+    signal = values[0] if values.shape[0] == 1 else values.mean(axis=0)
+    peak = float(np.abs(signal).max())
+    context = int(SEGMENT_CONTEXT_SECONDS * sample_rate)
+    extent = (sound.xmin, signal.size)  # segments analyze on the whole sound's frame grid
+    cuts = cut_points(signal, sample_rate, segment_count(sound.get_total_duration()))
+
+    jobs = []
+    for start, end in zip(cuts[:-1], cuts[1:]):
+        first, last = max(0, start - context), min(signal.size, end + context)
+        jobs.append((signal[first:last], sample_rate, first, start, end, peak, needs, analysis.fidelity, extent))
+    try:
+        blocks = list(_get_executor().map(_analyze_segment, *zip(*jobs)))
+    except Exception as e:
+        print(f"⚠️ Segment-parallel analysis failed, analyzing in one piece: {e}")
+        return analysis
+    blocks = [block for block in blocks if block is not None]
+    if not blocks:
+        return analysis
+
+    if needs["pitch"]:
+        f0_count = sum(block["f0_count"] for block in blocks)
+        analysis.precomputed["Fo(Hz)"] = sum(block["f0_sum"] for block in blocks) / f0_count if f0_count else float("nan")
+        analysis.precomputed["Fhi(Hz)"] = float(np.fmax.reduce([block["f0_max"] for block in blocks]))
+        analysis.precomputed["Flo(Hz)"] = float(np.fmin.reduce([block["f0_min"] for block in blocks]))
+    if needs["harmonicity"]:
+        hnr_count = sum(block["hnr_count"] for block in blocks)
+        analysis.precomputed["HNR"] = sum(block["hnr_sum"] for block in blocks) / hnr_count if hnr_count else float("nan")
+    if needs["pulses"]:
+        # Jitter/shimmer read analysis.times; the graph node keeps the full-file pulses unplanned
+        analysis.times = analysis.precomputed["times"] = np.concatenate([block["times"] for block in blocks])
+    print(f"🧵 Analyzed {sound.get_total_duration():.1f}s in {len(jobs)} segments on {PARALLEL_WORKERS} workers")
+    return analysis
+
+
+def compare_with_full(audio, tolerance=SEGMENT_TOLERANCE) -> dict:
+    """
+    Extracts the loaded models' feature columns from a full-file and a
+    segment-parallel analysis and reports, per column,
+    (full value, segmented value, relative difference, within tolerance).
+    """
+    from preprocessing.audio import prepare_analysis
+
+    columns = list(dict.fromkeys(required_columns("classification") + required_columns("regression")))
+    inputs = {"age": 0, "sex": 0, "test_time": 0.0}
+    full = compute(prepare_analysis(audio), columns, inputs).iloc[0]
+    segmented = compute(parallel_analysis(prepare_analysis(audio), min_seconds=0, enabled=True), columns, inputs).iloc[0]
+
+    report = {}
+    for column in columns:
+        if column in inputs:
+            continue
+        a, b = float(full[column]), float(segmented[column])
+        diff = abs(a - b) / abs(a) if a else abs(a - b)
+        report[column] = (a, b, diff, bool(diff <= tolerance))
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    for name, (full, segmented, diff, ok) in compare_with_full(sys.argv[1] if len(sys.argv) > 1 else "audio_samples/audio.wav").items():
+        print(f"{'✅' if ok else '❌'} {name:15s} full={full:.6g}  segmented={segmented:.6g}  rel.diff={diff:.3%}")
@@ -0,0 +1,329 @@
+import parselmouth
+import numpy as np
+from feature_extractors.perturbation import pulse_times, peak_amplitudes, jitter_measures, shimmer_measures
+from feature_extractors.fidelity import TIERS
+from feature_extractors.graph import compute, required_columns
+
+# Audio on each side of a block that Praat sees but whose frames/pulses are not kept.
+# Covers the longest analysis window at the 75 Hz pitch floor.
+CONTEXT_SECONDS = 0.1
+HARMONICITY_UNDEFINED = -200
+# Praat's analysis windows at the 75 Hz pitch floor: pitch and the pulses' pitch
+# (ac, 3 periods) and harmonicity (cc, 1 period plus one period of lag)
+PITCH_WINDOW_SECONDS = 3 / 75
+HARMONICITY_WINDOW_SECONDS = 2 / 75
+PULSE_TIME_STEP = 0.75 / 75  # time step of the pitch "To PointProcess (periodic, cc)" runs internally
+
+
+def guarded_segment(samples, sample_rate: int, offset: int, guard: int, peak: float):
+    """
+    Sound for samples starting at sample index `offset`, preceded by a guard gap and
+    one impulse at `peak`: Praat's silence/voicing thresholds are relative to the
+    sound's peak, so this keeps them on the whole recording's scale instead of
+    the segment's own.
+    """
+    values = np.zeros(len(samples) + 2 * guard + 1)
+    values[guard] = peak
+    values[2 * guard + 1:] = samples
+    return parselmouth.Sound(values, sampling_frequency=sample_rate,
+                             start_time=(offset - 2 * guard - 1) / sample_rate)
+
+
+def frame_origin(xmin: float, samples, dx: float, window: float, step: float):
+    """
+    Time of the first analysis frame Praat places in a sound starting at xmin
+    (Sampled_shortTermAnalysis: as many frames as fit, centred in the sound).
+    """
+    frames = np.floor((samples * dx - window) / step) + 1
+    return xmin + samples * dx / 2 - (frames - 1) * step / 2
+
+
+def grid_aligned(segment, extent, window: float, step: float):
+    """
+    The segment with up to two frames of silence added around it, so that
+    Praat's frames fall on the same time grid as in the whole sound it was cut
+    from (extent: that sound's (xmin, samples)). Frames at other phases see
+    different samples, which changes voicing decisions and pulse positions
+    throughout the segment, not only near its edges.
+    """
+    dx, values = segment.dx, segment.values[0]
+    target = frame_origin(extent[0], extent[1], dx, window, step)
+    # Leading silence moves the first frame by a sample, trailing silence by half
+    # a sample, and each frame that starts to fit moves it back by half a step
+    pads = np.arange(int(2 * step / dx) + 2)
+    before, after = np.meshgrid(pads, pads, indexing="ij")
+    offset = (frame_origin(segment.xmin - before * dx, values.size + before + after, dx, window, step) - target) / step
+    error = np.abs(offset - np.round(offset)) + (before + after) * 1e-9  # least padding among the best
+    before, after = np.unravel_index(np.argmin(error), error.shape)
+    if before == after == 0:
+        return segment
+    return parselmouth.Sound(np.r_[np.zeros(before), values, np.zeros(after)],
+                             sampling_frequency=segment.sampling_frequency, start_time=segment.xmin - before * dx)
+
+
+def block_measures(segment, tmin: float, tmax: float, pitch=True, harmonicity=True, pulses=True,
+                   fidelity=TIERS["standard"], extent=None):
+    """
+    Praat analysis of one segment (with context), keeping only the pitch and
+    harmonicity frames and the pulses inside [tmin, tmax): running sums,
+    parabolic pitch extremes and pulse times. None when the segment is shorter
+    than one pitch analysis window. fidelity sets the pitch and harmonicity time steps.
+    extent: (xmin, samples) of the whole sound the segment was cut from; each
+    analysis then runs on the whole sound's frame grid (see grid_aligned).
+    """
+    def aligned(window, step):
+        return segment if extent is None else grid_aligned(segment, extent, window, step)
+
+    pitch_step = fidelity.pitch_time_step or PULSE_TIME_STEP
+    nan = float("nan")
+    block = {"f0_sum": 0.0, "f0_count": 0, "f0_max": nan, "f0_min": nan,
+             "hnr_sum": 0.0, "hnr_count": 0, "times": np.zeros(0)}
+
+    # Pitch: voiced frames and parabolic extremes inside the block
+    try:
+        track = aligned(PITCH_WINDOW_SECONDS, pitch_step).to_pitch(time_step=fidelity.pitch_time_step) \
+            if pitch or pulses else None
+    except parselmouth.PraatError:
+        return None
+    if pitch:
+        frames = track.xs()
+        f0 = track.selected_array["frequency"][(frames >= tmin) & (frames < tmax)]
+        f0 = f0[f0 > 0]
+        if f0.size:
+            block["f0_sum"] = float(f0.sum())
+            block["f0_count"] = int(f0.size)
+            block["f0_max"] = parselmouth.praat.call(track, "Get maximum", tmin, tmax, "Hertz", "Parabolic")
+            block["f0_min"] = parselmouth.praat.call(track, "Get minimum", tmin, tmax, "Hertz", "Parabolic")
+
+    # Harmonicity: defined frames inside the block
+    if harmonicity:
+        track = parselmouth.praat.call(aligned(HARMONICITY_WINDOW_SECONDS, fidelity.harmonicity_time_step),
+                                       "To Harmonicity (cc)", fidelity.harmonicity_time_step, 75, 0.1, 1.0)
+        frames = track.xs()
+        hnr = track.values[0][(frames >= tmin) & (frames < tmax)]
+        hnr = hnr[hnr != HARMONICITY_UNDEFINED]
+        block["hnr_sum"] = float(hnr.sum())
+        block["hnr_count"] = int(hnr.size)
+
+    if pulses:
+        times = pulse_times(parselmouth.praat.call(aligned(PITCH_WINDOW_SECONDS, PULSE_TIME_STEP),
+                                                   "To PointProcess (periodic, cc)", 75, 500))
+        block["times"] = times[(times >= tmin) & (times < tmax)]
+    return block
+
+
+class SignalMoments:
+    """
+    Running sums over a signal that arrives in chunks, for the waveform
+    statistics (RPDE/DFA approximations) without keeping the signal.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.sum_abs = 0.0
+        self.sum_abs_diff = 0.0
+        self.last_sample = None
+        self.peak = 0.0
+
+    def add(self, samples):
+        samples = np.asarray(samples, dtype=np.float64)
+        if samples.size == 0:
+            return
+        self.n += samples.size
+        self.sum += samples.sum()
+        self.sum_sq += np.dot(samples, samples)
+        self.sum_abs += np.abs(samples).sum()
+        joined = samples if self.last_sample is None else np.r_[self.last_sample, samples]
+        self.sum_abs_diff += np.abs(np.diff(joined)).sum()
+        self.last_sample = samples[-1]
+        self.peak = max(self.peak, float(np.abs(samples).max()))
+
+    def statistics(self):
+        """(RPDE, DFA) as graph.signal_statistics computes them on the whole signal."""
+        n = self.n
+        mean = self.sum / n if n else 0.0
+        std = np.sqrt(max(self.sum_sq / n - mean * mean, 0.0)) if n else 0.0
+        mean_abs = self.sum_abs / n if n else 0.0
+        RPDE = std / mean_abs if mean_abs != 0 else 0
+        DFA = (self.sum_abs_diff / (n - 1) if n > 1 else float("nan")) / (std + 1e-6)
+        return RPDE, DFA
+
+
+class StreamingAnalysis:
+    """
+    Incremental counterpart of AudioAnalysis for audio that arrives in frames.
+    Praat runs once per block (plus context) as audio comes in; pitch, HNR and
+    signal statistics are kept as running sums/extremes, and pulses/amplitudes
+    are appended, so features are available at any time and the work left when
+    the stream closes is a single block.
+    """
+
+    def __init__(self, sample_rate: int, block_seconds: float = 1.0, peak: float = None, fidelity=TIERS["standard"],
+                 extent=None):
+        """
+        peak: the whole recording's peak when known in advance (windowed file
+        analysis); otherwise Praat's thresholds follow the running peak.
+        extent: (xmin, samples) of the whole recording when its length is known
+        in advance; blocks are then analyzed on its frame grid (see grid_aligned).
+        """
+        self.sample_rate = sample_rate
+        self.fidelity = fidelity
+        self.extent = extent
+        self.block = int(block_seconds * sample_rate)
+        self.context = int(CONTEXT_SECONDS * sample_rate)
+        self._buffer = np.zeros(max(self.block * 4, 1), dtype=np.float64)
+        self._base = 0  # stream index of _buffer[0]; analyzed audio is dropped from the front
+        self.n_samples = 0
+        self.processed = 0  # samples whose frames/pulses are final
+        self._fixed_peak = peak
+
+        # Pitch (voiced frames): running sum/count and parabolic extremes
+        self._f0_sum = 0.0
+        self._f0_count = 0
+        self._f0_max = float("nan")
+        self._f0_min = float("nan")
+        # Harmonicity (defined frames)
+        self._hnr_sum = 0.0
+        self._hnr_count = 0
+        # Pulses and per-period amplitudes
+        self._times = np.zeros(0)
+        self._amp_times = np.zeros(0)
+        self._amplitudes = np.zeros(0)
+        self._amp_next = 1  # first pulse whose amplitude still needs its right neighbour
+        # Raw signal moments (RPDE/DFA)
+        self.moments = SignalMoments()
+
+    @property
+    def duration(self) -> float:
+        return round(self.n_samples / self.sample_rate, 2)
+
+    def add(self, samples) -> bool:
+        """
+        Appends mono samples and analyzes every complete block.
+        Returns True if new blocks were analyzed.
+        """
+        samples = np.asarray(samples, dtype=np.float64).ravel()
+        if samples.size == 0:
+            return False
+        self._append(samples)
+        self.moments.add(samples)
+
+        analyzed = False
+        while self.n_samples - self.processed >= self.block + self.context:
+            self._analyze_block(self.processed, self.processed + self.block)
+            analyzed = True
+        return analyzed
+
+    def finish(self):
+        """Analyzes the tail of the stream (no right context needed any more)."""
+        if self.n_samples > self.processed:
+            self._analyze_block(self.processed, self.n_samples)
+
+    @property
+    def _peak(self) -> float:
+        return self.moments.peak if self._fixed_peak is None else self._fixed_peak
+
+    def _append(self, samples):
+        needed = self.n_samples + samples.size - self._base
+        if needed > self._buffer.size:
+            # Drop audio no later block or amplitude update can read, then grow if still short
+            keep = min(self.processed - self.context, self._amplitude_start())
+            if keep > self._base:
+                kept = self.n_samples - keep
+                self._buffer[:kept] = self._buffer[keep - self._base:self.n_samples - self._base]
+                self._base = keep
+                needed = self.n_samples + samples.size - self._base
+        if needed > self._buffer.size:
+            grown = np.zeros(max(needed, 2 * self._buffer.size))
+            grown[:self.n_samples - self._base] = self._buffer[:self.n_samples - self._base]
+            self._buffer = grown
+        self._buffer[self.n_samples - self._base:needed] = samples
+        self.n_samples += samples.size
+
+    def _amplitude_start(self) -> int:
+        """First sample the next amplitude update reads."""
+        if self._amp_next - 1 >= self._times.size:
+            return self.processed
+        return max(0, int((self._times[self._amp_next - 1] - 0.001) * self.sample_rate))
+
+    def _samples(self, start, end):
+        return self._buffer[start - self._base:end - self._base]
+
+    def _sound(self, start, end):
+        return parselmouth.Sound(self._samples(start, end), sampling_frequency=self.sample_rate,
+                                 start_time=start / self.sample_rate)
+
+    def _segment(self, start, end):
+        return guarded_segment(self._samples(start, end), self.sample_rate, start, self.context, self._peak)
+
+    def _analyze_block(self, start, end):
+        """
+        Runs Praat on [start - context, end + context] and keeps only what falls in [start, end).
+        """
+        segment = self._segment(max(0, start - self.context), min(self.n_samples, end + self.context))
+        self.processed = end
+        block = block_measures(segment, start / self.sample_rate, end / self.sample_rate, fidelity=self.fidelity,
+                               extent=self.extent)
+        if block is None:
+            return  # block shorter than one analysis window
+
+        self._f0_sum += block["f0_sum"]
+        self._f0_count += block["f0_count"]
+        self._f0_max = np.fmax(self._f0_max, block["f0_max"])
+        self._f0_min = np.fmin(self._f0_min, block["f0_min"])
+        self._hnr_sum += block["hnr_sum"]
+        self._hnr_count += block["hnr_count"]
+
+        # Pulses inside the block, then amplitudes for every pulse that now has both neighbours
+        self._times = np.r_[self._times, block["times"]]
+        self._update_amplitudes()
+
+    def _update_amplitudes(self):
+        n = self._times.size
+        if n - self._amp_next < 2:
+            return
+        times = self._times[self._amp_next - 1:]
+        first = max(0, int((times[0] - 0.001) * self.sample_rate))
+        last = min(self.n_samples, int((times[-1] + 0.001) * self.sample_rate) + 1)
+        amp_times, amplitudes = peak_amplitudes(self._sound(first, last), times)
+        self._amp_times = np.r_[self._amp_times, amp_times]
+        self._amplitudes = np.r_[self._amplitudes, amplitudes]
+        self._amp_next = n - 1
+
+    def measures(self) -> dict:
+        """
+        Current values of every measure the extractors use; NaN until defined.
+        """
+        RPDE, DFA = self.moments.statistics()
+        perturbation = jitter_measures(self._times)
+        perturbation.update(shimmer_measures(self._amp_times, self._amplitudes))
+        return {
+            "Fo": self._f0_sum / self._f0_count if self._f0_count else float("nan"),
+            "Fhi": float(self._f0_max),
+            "Flo": float(self._f0_min),
+            "HNR": self._hnr_sum / self._hnr_count if self._hnr_count else float("nan"),
+            "RPDE": RPDE,
+            "DFA": DFA,
+            "perturbation": perturbation,
+        }
+
+    def known(self) -> dict:
+        """The running measures as feature graph nodes (they stand in for the Praat nodes)."""
+        m = self.measures()
+        return {
+            "Fo(Hz)": m["Fo"], "Fhi(Hz)": m["Fhi"], "Flo(Hz)": m["Flo"], "HNR": m["HNR"],
+            "jitter": m["perturbation"], "shimmer": m["perturbation"],
+            "signal_statistics": (m["RPDE"], m["DFA"]),
+        }
+
+    def feature_frames(self, age: int, sex: int, test_time: float):
+        """
+        (classification_df, regression_df) for the loaded models: the running measures
+        stand in for the Praat nodes of the feature graph, the rest is derived as for files.
+        """
+        known = dict(self.known(), age=age, sex=sex, test_time=test_time)
+        classification_df = compute(None, required_columns("classification"), known)
+        regression_df = compute(None, required_columns("regression"), known)
+        return classification_df, regression_df
@@ -0,0 +1,236 @@
+import os
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from preprocessing.audio import prepare_analysis
+from feature_extractors.fidelity import get_fidelity
+from feature_extractors.classification_features import extract_classification_features
+from feature_extractors.regressors_features import extract_regression_features
+from inference.compiled import get_compiled_pipeline
+from inference.exported import get_exported_pipeline
+from preprocessing.scaler import scale_features
+from utils.load_models import load_model, registry
+from utils.feature_store import feature_store, feature_row
+from utils.jobs import process_pool
+from utils import metrics
+import constants
+
+STATUS_LABELS = np.array(["Healthy", "Minor Parkinson", "Moderate Parkinson", "Severe Parkinson"])
+
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", os.cpu_count() or 1))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def hybrid_status(proba, motor, total) -> np.ndarray:
+    """
+    Vectorized hybrid decision rule combining classifier probability and UPDRS scores.
+    Conditions are evaluated in order; the first match wins.
+    """
+    proba = np.asarray(proba, dtype=float)
+    motor = np.asarray(motor, dtype=float)
+    total = np.asarray(total, dtype=float)
+
+    conditions = [
+        (proba < 0.4) & (motor < 8) & (total < 10),
+        ((0.4 <= proba) & (proba < 0.65)) | ((8 <= motor) & (motor < 15)) | ((10 <= total) & (total < 20)),
+        ((0.65 <= proba) & (proba < 0.85)) | ((15 <= motor) & (motor < 25)) | ((20 <= total) & (total < 35)),
+    ]
+    return np.select(conditions, STATUS_LABELS[:3], default=STATUS_LABELS[3])
+
+
+def classify_sklearn(classification_df: pd.DataFrame, models=None) -> np.ndarray:
+    """
+    Reference path, first stage: Parkinson probability from the classifier.
+    models: the registry snapshot to read the scaler and model from (default: the current one).
+    """
+    models = models or registry.snapshot()
+    classification_scaled = scale_features(classification_df, constants.CLASSIFICATION_SCALER, models)
+    clf_model = load_model(constants.CLASSIFICATION_MODEL, models)
+
+    with metrics.span("predict"):
+        if hasattr(clf_model, "predict_proba"):
+            return clf_model.predict_proba(classification_scaled)[:, 1]
+        return clf_model.predict(classification_scaled).astype(float)
+
+
+def regress_sklearn(regression_df: pd.DataFrame, models=None):
+    """
+    Reference path, second stage: (motor_age, motor_wo_age, total_age, total_wo_age) arrays.
+    """
+    models = models or registry.snapshot()
+    scaled_with_age = scale_features(regression_df, constants.REGRESSION_SCALER_AGE, models)
+    scaled_without_age = scale_features(regression_df.drop(columns=["age"], errors="ignore"),
+                                        constants.REGRESSION_SCALER_WITHOUT_AGE, models)
+
+    regressions = []
+    for name, scaled in ((constants.MOTOR_MODEL_AGE, scaled_with_age),
+                         (constants.MOTOR_MODEL_WITHOUT_AGE, scaled_without_age),
+                         (constants.TOTAL_MODEL_AGE, scaled_with_age),
+                         (constants.TOTAL_MODEL_WITHOUT_AGE, scaled_without_age)):
+        model = load_model(name, models)
+        with metrics.span("predict"):
+            regressions.append(model.predict(scaled))
+    return tuple(regressions)
+
+
+def predict_sklearn(classification_df: pd.DataFrame, regression_df: pd.DataFrame, models=None):
+    """
+    Reference path: sklearn scalers and estimators on DataFrames.
+    Returns (proba, motor_age, motor_wo_age, total_age, total_wo_age) arrays.
+    """
+    models = models or registry.snapshot()
+    return (classify_sklearn(classification_df, models), *regress_sklearn(regression_df, models))
+
+
+def _compiled(models):
+    """
+    The NumPy pipeline for INFERENCE_MODE=compiled (built from the `models`
+    snapshot, None if unusable) or INFERENCE_MODE=exported (read from
+    EXPORTED_MODELS_DIR), else None.
+    """
+    if constants.INFERENCE_MODE == "exported":
+        return get_exported_pipeline()
+    return get_compiled_pipeline(predict_sklearn, models) if constants.INFERENCE_MODE == "compiled" else None
+
+
+def models_version() -> str:
+    """Fingerprint of the models serving predictions (part of result cache keys)."""
+    if constants.INFERENCE_MODE == "exported":
+        return get_exported_pipeline().version
+    return registry.version()
+
+
+def predict_probability(classification_df: pd.DataFrame, models=None) -> np.ndarray:
+    """
+    Parkinson probability per row (classifier only).
+    models: registry snapshot shared by the stages of one request (default: the current set).
+    """
+    models = models or registry.snapshot()
+    compiled = _compiled(models)
+    if compiled is not None:
+        with metrics.span("predict"):
+            return compiled.probability(classification_df)
+    return classify_sklearn(classification_df, models)
+
+
+def predict_updrs(regression_df: pd.DataFrame, models=None):
+    """
+    (motor, total) UPDRS arrays per row from the four regressors.
+    """
+    models = models or registry.snapshot()
+    compiled = _compiled(models)
+    if compiled is not None:
+        with metrics.span("predict"):
+            motor_pred_age, motor_pred_wo_age, total_pred_age, total_pred_wo_age = compiled.regress(regression_df)
+    else:
+        motor_pred_age, motor_pred_wo_age, total_pred_age, total_pred_wo_age = regress_sklearn(regression_df, models)
+
+    # Weighted ensemble (less weight for with-age models)
+    motor = np.round(0.35 * motor_pred_age + 0.65 * motor_pred_wo_age, 2)
+    total = np.round(0.35 * total_pred_age + 0.65 * total_pred_wo_age, 2)
+    return motor, total
+
+
+def predict_batch(classification_df: pd.DataFrame, regression_df: pd.DataFrame, models=None) -> dict:
+    """
+    Runs each scaler and each of the five models once over all rows, all from
+    one registry snapshot. Returns arrays of probability, motor/total UPDRS and
+    final status. With INFERENCE_MODE=compiled or exported the models run on
+    NumPy arrays (inference/compiled.py, inference/exported.py).
+    """
+    models = models or registry.snapshot()
+    proba = predict_probability(classification_df, models)
+    motor, total = predict_updrs(regression_df, models)
+
+    return {
+        "probability": proba,
+        "motor_updrs": motor,
+        "total_updrs": total,
+        "status": hybrid_status(proba, motor, total),
+    }
+
+
+def _extract_one(audio, age, sex, test_time, fidelity=None):
+    """
+    Worker: analyzes one recording (path or decoded (samples, sample_rate))
+    at a fidelity tier and extracts both feature sets. Stage timings are returned so the serving
+    process can record them (worker metrics never reach /metrics).
+    """
+    started = time.perf_counter()
+    metrics.start_timings()
+    with metrics.span("preprocess"):
+        analysis = prepare_analysis(audio, fidelity)
+    if test_time is None:
+        test_time = analysis.duration
+    with metrics.span("extract_classification"):
+        classification_df = extract_classification_features(analysis)
+    with metrics.span("extract_regression"):
+        regression_df = extract_regression_features(analysis, age, sex, test_time)
+    extract_ms = (time.perf_counter() - started) * 1000
+    return classification_df, regression_df, test_time, extract_ms, metrics.collected_timings()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = process_pool(BATCH_WORKERS)
+        return _executor
+
+
+def run_batch(items, fidelity=None) -> list:
+    """
+    items: list of (audio, age, sex, test_time or None), where audio is anything
+    prepare_analysis takes that pickles (a path, a BytesIO or a decoded
+    (samples, sample_rate) tuple); all analyzed at one fidelity tier.
+    Extracts features in parallel, then predicts the whole batch at once.
+    Returns one entry per item: its result, or the exception its analysis
+    raised (the other items are still predicted).
+    """
+    if not items:
+        return []
+
+    fidelity = get_fidelity(fidelity).name
+    futures = [_get_executor().submit(_extract_one, audio, age, sex, test_time, fidelity)
+               for audio, age, sex, test_time in items]
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result())
+        except Exception as e:
+            outcomes.append(e)
+    extracted = [outcome for outcome in outcomes if not isinstance(outcome, Exception)]
+    if not extracted:
+        return outcomes
+    for *_, timings in extracted:
+        for stage, seconds in timings.items():
+            metrics.record(stage, seconds)
+
+    classification_df = pd.concat([e[0] for e in extracted], ignore_index=True)
+    regression_df = pd.concat([e[1] for e in extracted], ignore_index=True)
+    started = time.perf_counter()
+    predictions = predict_batch(classification_df, regression_df)
+    inference_ms = (time.perf_counter() - started) * 1000
+
+    batch_id = uuid.uuid4().hex
+    results = []
+    for i, (_, _, test_time, extract_ms, _) in enumerate(extracted):
+        feature_store.append(feature_row(
+            f"{batch_id}-{i}", classification_df, regression_df, predictions, index=i,
+            extract_ms=extract_ms, inference_ms=inference_ms, fidelity=fidelity,
+        ))
+        results.append({
+            "status": str(predictions["status"][i]),
+            "probability": round(float(predictions["probability"][i]), 3),
+            "motor_updrs": float(predictions["motor_updrs"][i]),
+            "total_updrs": float(predictions["total_updrs"][i]),
+            "test_time": test_time,
+            "fidelity": fidelity,
+        })
+    print(f"📦 Batch of {len(results)} recordings analyzed.")
+    results = iter(results)
+    return [outcome if isinstance(outcome, Exception) else next(results) for outcome in outcomes]
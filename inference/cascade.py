@@ -0,0 +1,34 @@
+import os
+import numpy as np
+from inference.batch import hybrid_status
+
+# "off": always run the UPDRS regressors
+# "skip": decide clear cases from the classifier alone; no UPDRS scores for them
+# "defer": like skip, but queue the UPDRS regressors as a job for clear cases
+CASCADE_MODE = os.environ.get("CASCADE_MODE", "off")
+# Classifier probabilities at or below LOW / at or above HIGH count as clear cases
+CASCADE_LOW = float(os.environ.get("CASCADE_LOW", 0.1))
+CASCADE_HIGH = float(os.environ.get("CASCADE_HIGH", 0.95))
+
+
+def cascade_signature(mode: str = CASCADE_MODE) -> str:
+    """Identifies the cascade settings (part of result cache keys)."""
+    if mode == "off":
+        return "cascade:off"
+    return f"cascade:{mode}:{CASCADE_LOW}:{CASCADE_HIGH}"
+
+
+def decisive(proba, low: float = CASCADE_LOW, high: float = CASCADE_HIGH) -> np.ndarray:
+    """True where the classifier is confident enough to skip the UPDRS models."""
+    proba = np.asarray(proba, dtype=float)
+    return (proba <= low) | (proba >= high)
+
+
+def cascade_status(proba) -> np.ndarray:
+    """
+    Status from the classifier alone: the hybrid rule with both UPDRS scores
+    below every band. Differs from the full rule only when the skipped
+    scores would have reached a band (tools/evaluate_cascade.py measures how often).
+    """
+    zeros = np.zeros(np.shape(proba))
+    return hybrid_status(proba, zeros, zeros)
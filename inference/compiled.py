@@ -0,0 +1,294 @@
+import threading
+import numpy as np
+import pandas as pd
+import constants
+from utils.load_models import registry
+from inference.exported import LinearModel, TreeEnsemble, as_matrix
+
+PARITY_TOLERANCE = 1e-6
+
+
+def _scaler_params(scaler):
+    """
+    Returns (feature names, mean, scale) of a fitted StandardScaler.
+    """
+    names = getattr(scaler, "feature_names_in_", None)
+    if names is None:
+        raise ValueError("Scaler was fitted without feature names; cannot build a fixed layout.")
+    n = len(names)
+    mean = np.asarray(scaler.mean_, dtype=np.float64) if getattr(scaler, "with_mean", True) else np.zeros(n)
+    scale = np.asarray(scaler.scale_, dtype=np.float64) if getattr(scaler, "with_std", True) else np.ones(n)
+    return list(names), mean, scale
+
+
+def _float32_below(thresholds):
+    """The largest float32 at or below each float64 threshold."""
+    t32 = np.asarray(thresholds, dtype=np.float64).astype(np.float32)
+    return np.where(t32 > thresholds, np.nextafter(t32, np.float32(-np.inf)), t32)
+
+
+class CompiledLinear(LinearModel):
+    """
+    Linear / logistic model with the scaler folded into its coefficients.
+    """
+
+    def __init__(self, model, columns, mean, scale, proba=False):
+        coef = np.atleast_2d(np.asarray(model.coef_, dtype=np.float64))[0]
+        intercept = float(np.ravel(model.intercept_)[0])
+        super().__init__(columns, coef / scale, intercept - float(np.dot(coef, mean / scale)), proba)
+
+
+class CompiledForest(TreeEnsemble):
+    """
+    Decision tree / random forest flattened into one set of node arrays.
+    Each node keeps its feature's scaler mean and scale, so rows are scaled
+    per node and compared in float32 like sklearn (a threshold mapped back to
+    raw space can't tell apart values one float32 rounding step apart),
+    and all trees are walked in lockstep (one NumPy step per tree level).
+    """
+
+    def __init__(self, model, columns, mean, scale, proba=False):
+        estimators = getattr(model, "estimators_", [model])
+        columns = np.asarray(columns, dtype=np.intp)
+        lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+        means, scales = [], []
+        offset = 0
+        depth = 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            n = tree.node_count
+            nodes = np.arange(n) + offset
+            leaf = tree.children_left == -1
+
+            # Leaves point to themselves so extra iterations are no-ops
+            left = np.where(leaf, nodes, tree.children_left + offset)
+            right = np.where(leaf, nodes, tree.children_right + offset)
+            feature = np.where(leaf, 0, tree.feature)
+            threshold = np.where(leaf, 0.0, tree.threshold)
+
+            if proba:
+                counts = tree.value[:, 0, :]
+                value = counts[:, 1] / counts.sum(axis=1)
+            else:
+                value = tree.value[:, 0, 0]
+
+            lefts.append(left)
+            rights.append(right)
+            features.append(columns[feature])
+            thresholds.append(threshold)
+            means.append(np.where(leaf, 0.0, mean[feature]))
+            scales.append(np.where(leaf, 1.0, scale[feature]))
+            values.append(value)
+            roots.append(offset)
+            offset += n
+            depth = max(depth, tree.max_depth)
+
+        super().__init__(
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            depth=depth,
+            mean=np.concatenate(means).astype(np.float64),
+            scale=np.concatenate(scales).astype(np.float64),
+        )
+
+
+def compile_model(model, scaler, layout, proba=False):
+    """
+    Compiles a fitted sklearn model plus its scaler against a fixed feature layout.
+    """
+    names, mean, scale = _scaler_params(scaler)
+    columns = [layout.index(name) for name in names]
+
+    if hasattr(model, "estimators_") or hasattr(model, "tree_"):
+        return CompiledForest(model, columns, mean, scale, proba)
+    if hasattr(model, "coef_"):
+        return CompiledLinear(model, columns, mean, scale, proba)
+    raise TypeError(f"Unsupported model type for compiled inference: {type(model).__name__}")
+
+
+class CompiledPipeline:
+    """
+    The classifier and four UPDRS models compiled from one registry snapshot
+    (the current one by default).
+    """
+
+    def __init__(self, models=None):
+        models = models or registry.snapshot()
+        self.generation = models.generation
+        clf_scaler = models.get(constants.CLASSIFICATION_SCALER)
+        age_scaler = models.get(constants.REGRESSION_SCALER_AGE)
+        wo_age_scaler = models.get(constants.REGRESSION_SCALER_WITHOUT_AGE)
+
+        self.classification_layout = list(_scaler_params(clf_scaler)[0])
+        self.regression_layout = list(_scaler_params(age_scaler)[0])
+        for name in _scaler_params(wo_age_scaler)[0]:
+            if name not in self.regression_layout:
+                self.regression_layout.append(name)
+
+        clf_model = models.get(constants.CLASSIFICATION_MODEL)
+        self.classifier = compile_model(clf_model, clf_scaler, self.classification_layout, proba=True)
+        self.motor_age = compile_model(models.get(constants.MOTOR_MODEL_AGE), age_scaler, self.regression_layout)
+        self.motor_wo_age = compile_model(models.get(constants.MOTOR_MODEL_WITHOUT_AGE), wo_age_scaler, self.regression_layout)
+        self.total_age = compile_model(models.get(constants.TOTAL_MODEL_AGE), age_scaler, self.regression_layout)
+        self.total_wo_age = compile_model(models.get(constants.TOTAL_MODEL_WITHOUT_AGE), wo_age_scaler, self.regression_layout)
+
+    def probability(self, classification_features) -> np.ndarray:
+        return self.classifier(as_matrix(classification_features, self.classification_layout))
+
+    def regress(self, regression_features):
+        """
+        Returns (motor_age, motor_wo_age, total_age, total_wo_age) arrays.
+        """
+        reg_X = as_matrix(regression_features, self.regression_layout)
+        return (
+            self.motor_age(reg_X),
+            self.motor_wo_age(reg_X),
+            self.total_age(reg_X),
+            self.total_wo_age(reg_X),
+        )
+
+    def predict(self, classification_features, regression_features):
+        """
+        Returns (proba, motor_age, motor_wo_age, total_age, total_wo_age) arrays.
+        """
+        return (self.probability(classification_features), *self.regress(regression_features))
+
+    def check_parity(self, reference, models=None) -> float:
+        return check_parity(self, reference, models)
+
+
+def _split_rows(base, model, scaler, layout):
+    """
+    Three copies of `base` (raw features in `layout`) per split of a fitted tree
+    model, with the split's feature set (in the scaled space sklearn compares in)
+    to the float32 value at or below the threshold, the threshold itself and
+    the next float32 above it. Only a float32 comparison sends all three the
+    way sklearn does.
+    """
+    if not (hasattr(model, "estimators_") or hasattr(model, "tree_")):
+        return np.zeros((0, base.shape[1]))
+    names, mean, scale = _scaler_params(scaler)
+    columns = np.asarray([layout.index(name) for name in names])
+    features, thresholds = [], []
+    for estimator in getattr(model, "estimators_", [model]):
+        split = estimator.tree_.children_left != -1
+        features.append(estimator.tree_.feature[split])
+        thresholds.append(estimator.tree_.threshold[split])
+    features, thresholds = np.concatenate(features), np.concatenate(thresholds)
+    below = _float32_below(thresholds).astype(np.float64)
+    above = np.nextafter(below.astype(np.float32), np.float32(np.inf)).astype(np.float64)
+
+    rows = np.repeat(base[np.arange(features.size) % base.shape[0]][None], 3, axis=0)
+    for side, values in enumerate((below, thresholds, above)):
+        rows[side, np.arange(features.size), columns[features]] = values * scale[features] + mean[features]
+    return rows.reshape(-1, base.shape[1])
+
+
+def probe_rows(pipeline, models, random_rows: int = 256, seed: int = 0):
+    """
+    (classification_df, regression_df) for parity checks: random rows spread
+    over each scaler's range, plus rows on both sides of every split threshold
+    of every tree model.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for layout, scaler, names in (
+            (pipeline.classification_layout, constants.CLASSIFICATION_SCALER, (constants.CLASSIFICATION_MODEL,)),
+            (pipeline.regression_layout, constants.REGRESSION_SCALER_AGE,
+             (constants.MOTOR_MODEL_AGE, constants.TOTAL_MODEL_AGE)),
+            (pipeline.regression_layout, constants.REGRESSION_SCALER_WITHOUT_AGE,
+             (constants.MOTOR_MODEL_WITHOUT_AGE, constants.TOTAL_MODEL_WITHOUT_AGE))):
+        frames.append((layout, scaler, names))
+
+    def random_rows_for(layout):
+        # Mean and scale per layout column, from whichever scaler covers it
+        mean, scale = np.zeros(len(layout)), np.ones(len(layout))
+        for scaler_name in (constants.REGRESSION_SCALER_WITHOUT_AGE, constants.REGRESSION_SCALER_AGE,
+                            constants.CLASSIFICATION_SCALER):
+            names, scaler_mean, scaler_scale = _scaler_params(models.get(scaler_name))
+            for name, m, sd in zip(names, scaler_mean, scaler_scale):
+                if name in layout:
+                    mean[layout.index(name)], scale[layout.index(name)] = m, sd
+        return mean + rng.normal(scale=1.5, size=(random_rows, len(layout))) * scale
+
+    clf_base = random_rows_for(pipeline.classification_layout)
+    reg_base = random_rows_for(pipeline.regression_layout)
+    clf_rows, reg_rows = [clf_base], [reg_base]
+    for layout, scaler, names in frames:
+        base, rows = (clf_base, clf_rows) if layout is pipeline.classification_layout else (reg_base, reg_rows)
+        for name in names:
+            rows.append(_split_rows(base, models.get(name), models.get(scaler), layout))
+
+    clf_X, reg_X = np.concatenate(clf_rows), np.concatenate(reg_rows)
+    # Both frames get the same number of rows; the shorter one repeats its random rows
+    n = max(len(clf_X), len(reg_X))
+    clf_X = np.concatenate([clf_X, clf_base[np.arange(n - len(clf_X)) % random_rows]])
+    reg_X = np.concatenate([reg_X, reg_base[np.arange(n - len(reg_X)) % random_rows]])
+    return (pd.DataFrame(clf_X, columns=pipeline.classification_layout),
+            pd.DataFrame(reg_X, columns=pipeline.regression_layout))
+
+
+def check_parity(pipeline, reference, models=None) -> float:
+    """
+    Compares a NumPy pipeline (compiled or exported) against the sklearn path on
+    probe_rows and returns the largest absolute difference.
+    reference(classification_df, regression_df, models) must return the same 5-tuple;
+    models is the registry snapshot both sides are read from (default: the current one).
+    """
+    models = models or registry.snapshot()
+    clf_df, reg_df = probe_rows(pipeline, models)
+    ours = pipeline.predict(clf_df, reg_df)
+    theirs = reference(clf_df, reg_df, models)
+    return max(float(np.max(np.abs(np.asarray(a) - np.asarray(b)))) for a, b in zip(ours, theirs))
+
+
+_compiled = None
+_compile_lock = threading.Lock()
+
+
+def get_compiled_pipeline(reference=None, models=None):
+    """
+    Returns the compiled pipeline for the generation of the `models` snapshot
+    (default: the current one), rebuilding it after a hot reload. Returns None
+    (use sklearn) if the models cannot be compiled or fail the parity check,
+    and for a snapshot older than the registry's: a request that started before
+    a reload finishes on the sklearn path with the models it started with.
+    """
+    global _compiled
+    models = models or registry.snapshot()
+    compiled = _compiled
+    if compiled is not None and compiled.generation == models.generation:
+        return compiled or None
+    if models.generation < registry.generation:
+        return None
+
+    with _compile_lock:
+        if _compiled is not None and _compiled.generation == models.generation:
+            return _compiled or None
+        try:
+            compiled = CompiledPipeline(models)
+            if reference is not None:
+                diff = compiled.check_parity(reference, models)
+                if diff > PARITY_TOLERANCE:
+                    raise ValueError(f"parity check failed (max diff {diff:.2e})")
+            print("⚡ Compiled NumPy inference path ready.")
+        except Exception as e:
+            print(f"⚠️ Compiled inference unavailable, using sklearn: {e}")
+            compiled = _Disabled(models.generation)
+        _compiled = compiled
+        return compiled or None
+
+
+class _Disabled:
+    """Marker that remembers a failed compile for one registry generation."""
+
+    def __init__(self, generation):
+        self.generation = generation
+
+    def __bool__(self):
+        return False
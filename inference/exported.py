@@ -0,0 +1,239 @@
+"""
+Pure-NumPy runtime for models exported by tools/export_models.py.
+
+An export is a directory with one uncompressed .npz per model or scaler and a
+manifest.json describing them. Arrays are memory-mapped straight out of the
+.npz files, so workers share the pages and loading needs neither pickle nor
+scikit-learn.
+"""
+import json
+import os
+import struct
+import threading
+import zipfile
+import numpy as np
+import constants
+from utils.metrics import span
+
+EXPORT_DIR = os.environ.get("EXPORTED_MODELS_DIR", "models/exported")
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+class LinearModel:
+    """
+    Linear / logistic model on raw features (scaler folded into the coefficients).
+    """
+    kind = "linear"
+
+    def __init__(self, columns, coef, intercept, proba=False):
+        self.columns = np.asarray(columns, dtype=np.intp)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.proba = proba
+
+    def __call__(self, X):
+        z = X[:, self.columns] @ self.coef + self.intercept
+        if self.proba:
+            return 1.0 / (1.0 + np.exp(-z))
+        return z
+
+    def arrays(self) -> dict:
+        return {"columns": self.columns, "coef": self.coef, "intercept": np.array([self.intercept])}
+
+    @classmethod
+    def from_arrays(cls, arrays, proba=False):
+        return cls(arrays["columns"], arrays["coef"], arrays["intercept"][0], proba)
+
+
+class TreeEnsemble:
+    """
+    Decision trees flattened into one set of node arrays on raw features.
+    All trees are walked in lockstep (one NumPy step per tree level); leaves
+    point to themselves, and the prediction is the mean leaf value.
+    With per-node mean and scale, each node scales its feature and compares
+    it in float32 against the original threshold, exactly as sklearn does.
+    """
+    kind = "forest"
+
+    def __init__(self, left, right, feature, threshold, value, roots, depth, mean=None, scale=None):
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.mean = mean
+        self.scale = scale
+
+    def __call__(self, X):
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.tile(self.roots, (X.shape[0], 1))
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            if self.mean is not None:
+                x = ((x - self.mean[node]) / self.scale[node]).astype(np.float32)
+            go_left = x <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].mean(axis=1)
+
+    def arrays(self) -> dict:
+        arrays = {"left": self.left, "right": self.right, "feature": self.feature,
+                  "threshold": self.threshold, "value": self.value, "roots": self.roots}
+        if self.mean is not None:
+            arrays.update(mean=self.mean, scale=self.scale)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, depth):
+        return cls(arrays["left"], arrays["right"], arrays["feature"], arrays["threshold"],
+                   arrays["value"], arrays["roots"], depth, arrays.get("mean"), arrays.get("scale"))
+
+
+class Standardizer:
+    """StandardScaler transform from its mean and scale arrays."""
+
+    def __init__(self, mean, scale):
+        self.mean = mean
+        self.scale = scale
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+    def arrays(self) -> dict:
+        return {"mean": self.mean, "scale": self.scale}
+
+
+def as_matrix(features, layout) -> np.ndarray:
+    """
+    Packs a feature mapping (dict of scalars or DataFrame) into a contiguous
+    float64 matrix in layout order.
+    """
+    if isinstance(features, dict):
+        return np.array([[features[name] for name in layout]], dtype=np.float64)
+    return np.column_stack([np.asarray(features[name], dtype=np.float64) for name in layout])
+
+
+def load_arrays(path: str, mmap: bool = True) -> dict:
+    """
+    Arrays of an .npz archive. Uncompressed members are memory-mapped in
+    place (read-only, paged in on first touch); compressed ones are read.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if not mmap or info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+
+            # Local file header: 30 fixed bytes, then name and extra field, then the .npy bytes
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", shape=shape, offset=f.tell(),
+                                     order="F" if fortran_order else "C")
+    return arrays
+
+
+def read_manifest(path: str = EXPORT_DIR) -> dict:
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported export format {manifest.get('format_version')} "
+                         f"(this runtime reads version {FORMAT_VERSION})")
+    return manifest
+
+
+def load_entry(path: str, entry: dict, mmap: bool = True):
+    """Runtime object for one manifest entry (model or scaler)."""
+    arrays = load_arrays(os.path.join(path, entry["file"]), mmap)
+    if entry["kind"] == "forest":
+        return TreeEnsemble.from_arrays(arrays, entry["depth"])
+    if entry["kind"] == "linear":
+        return LinearModel.from_arrays(arrays, entry.get("proba", False))
+    if entry["kind"] == "scaler":
+        return Standardizer(arrays["mean"], arrays["scale"])
+    raise ValueError(f"Unknown exported artifact kind: {entry['kind']}")
+
+
+class ExportedPipeline:
+    """
+    The classifier and four UPDRS models of one export, with the same
+    interface as the compiled pipeline (inference/compiled.py).
+    """
+
+    def __init__(self, path: str = EXPORT_DIR, mmap: bool = True):
+        self.path = path
+        self.mtime = os.stat(os.path.join(path, MANIFEST)).st_mtime
+        manifest = read_manifest(path)
+        self.manifest = manifest
+        self.version = manifest["models_version"]
+        self.classification_layout = manifest["layouts"]["classification"]
+        self.regression_layout = manifest["layouts"]["regression"]
+        self.models = {name: load_entry(path, entry, mmap) for name, entry in manifest["models"].items()}
+        self.scalers = {name: load_entry(path, entry, mmap) for name, entry in manifest.get("scalers", {}).items()}
+
+        self.classifier = self.models[constants.CLASSIFICATION_MODEL]
+        self.motor_age = self.models[constants.MOTOR_MODEL_AGE]
+        self.motor_wo_age = self.models[constants.MOTOR_MODEL_WITHOUT_AGE]
+        self.total_age = self.models[constants.TOTAL_MODEL_AGE]
+        self.total_wo_age = self.models[constants.TOTAL_MODEL_WITHOUT_AGE]
+
+    def features(self, model_name: str):
+        """Columns a model consumes (its scaler's feature names at export time)."""
+        entry = self.manifest["models"].get(model_name)
+        return None if entry is None else list(entry["features"])
+
+    def probability(self, classification_features) -> np.ndarray:
+        return self.classifier(as_matrix(classification_features, self.classification_layout))
+
+    def regress(self, regression_features):
+        """
+        Returns (motor_age, motor_wo_age, total_age, total_wo_age) arrays.
+        """
+        reg_X = as_matrix(regression_features, self.regression_layout)
+        return (
+            self.motor_age(reg_X),
+            self.motor_wo_age(reg_X),
+            self.total_age(reg_X),
+            self.total_wo_age(reg_X),
+        )
+
+    def predict(self, classification_features, regression_features):
+        """
+        Returns (proba, motor_age, motor_wo_age, total_age, total_wo_age) arrays.
+        """
+        return (self.probability(classification_features), *self.regress(regression_features))
+
+
+_exported = None
+_exported_lock = threading.Lock()
+
+
+def get_exported_pipeline(path: str = EXPORT_DIR) -> ExportedPipeline:
+    """
+    The export in `path`, reloaded when its manifest changes (the export tool
+    writes the manifest last, so a reload always sees a complete export).
+    """
+    global _exported
+    mtime = os.stat(os.path.join(path, MANIFEST)).st_mtime
+    exported = _exported
+    if exported is not None and exported.path == path and exported.mtime == mtime:
+        return exported
+    with _exported_lock:
+        if _exported is None or _exported.path != path or _exported.mtime != mtime:
+            with span("model_load"):
+                _exported = ExportedPipeline(path)
+            print(f"📦 Exported models loaded: {_exported.version[:12]} from {path}")
+        return _exported
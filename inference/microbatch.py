@@ -0,0 +1,180 @@
+"""
+Micro-batching of model calls across concurrent requests (MICROBATCH=1).
+
+Each request thread submits its feature rows and waits on a future; one
+dispatcher thread per model stage collects submissions for up to
+MICROBATCH_WINDOW_MS after the first one (or until MICROBATCH_MAX_ROWS rows),
+runs the stage once over the stacked rows, and hands every caller its own
+rows back. Scaling happens inside the stage, so it is batched as well. The
+stages timed during the batch (and the wait for it, as "batch_wait") are added
+to each caller's request timings, so Server-Timing still shows them. Rows
+are only stacked with rows of the same model snapshot (utils/load_models.py),
+so a hot swap never mixes model sets inside one request.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+from inference import batch
+from utils import metrics
+from utils.load_models import registry
+
+MICROBATCH = os.environ.get("MICROBATCH", "0") == "1"
+MICROBATCH_WINDOW_MS = float(os.environ.get("MICROBATCH_WINDOW_MS", 2.0))
+MICROBATCH_MAX_ROWS = int(os.environ.get("MICROBATCH_MAX_ROWS", 64))
+
+queue_wait_seconds = metrics.Histogram(
+    "microbatch_queue_wait_seconds", "Time a request's rows waited for their batch to start.", ["stage"],
+    buckets=(0.0005, 0.001, 0.002, 0.003, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25))
+batch_rows = metrics.Histogram(
+    "microbatch_rows", "Rows per dispatched model batch.", ["stage"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent calls of fn(frame, models) -> array or tuple of arrays
+    (one value per row) into one call per model snapshot over the concatenated frames.
+    """
+
+    def __init__(self, stage: str, fn, window_ms: float = MICROBATCH_WINDOW_MS,
+                 max_rows: int = MICROBATCH_MAX_ROWS):
+        self.stage = stage
+        self.fn = fn
+        self.window = window_ms / 1000
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+    def _ensure_dispatcher(self):
+        # Forked workers (job and batch pools) inherit the queue but not the thread; start fresh
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue()
+            threading.Thread(target=self._run, name=f"microbatch-{self.stage}", daemon=True).start()
+
+    def submit(self, frame: pd.DataFrame, models=None) -> Future:
+        self._ensure_dispatcher()
+        future = Future()
+        self._queue.put((frame, models or registry.snapshot(), future, time.perf_counter(),
+                         metrics.current_timings()))
+        return future
+
+    def __call__(self, frame: pd.DataFrame, models=None):
+        return self.submit(frame, models).result()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            pending, rows = [first], len(first[0])
+            deadline = first[3] + self.window
+            while rows < self.max_rows:
+                # Everything already queued joins; the window only bounds waiting for more
+                timeout = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                pending.append(item)
+                rows += len(item[0])
+            self._dispatch(pending, rows)
+
+    def _dispatch(self, pending, rows):
+        started = time.perf_counter()
+        for _, _, _, submitted, timings in pending:
+            queue_wait_seconds.observe(started - submitted, stage=self.stage)
+            metrics.merge_timings(timings, {"batch_wait": started - submitted})
+        groups = {}  # one call per model snapshot; a single group except across a hot swap
+        for item in pending:
+            groups.setdefault(id(item[1]), []).append(item)
+        for group in groups.values():
+            batch_rows.observe(sum(len(frame) for frame, *_ in group), stage=self.stage)
+            self._run_group(group)
+
+    def _run_group(self, pending):
+        # Spans inside fn run on this thread; collect them here and hand them to every caller
+        timings = metrics.start_timings()
+        try:
+            frames = [frame for frame, *_ in pending]
+            result = self.fn(frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True), pending[0][1])
+        except Exception as e:
+            for _, _, future, _, caller_timings in pending:
+                metrics.merge_timings(caller_timings, timings)
+                future.set_exception(e)
+            return
+
+        outputs = result if isinstance(result, tuple) else (result,)
+        offset = 0
+        for frame, _, future, _, caller_timings in pending:
+            metrics.merge_timings(caller_timings, timings)
+            part = tuple(np.asarray(output)[offset:offset + len(frame)] for output in outputs)
+            future.set_result(part if isinstance(result, tuple) else part[0])
+            offset += len(frame)
+
+
+_probability = MicroBatcher("classification", batch.predict_probability)
+_updrs = MicroBatcher("regression", batch.predict_updrs)
+
+
+def predict_probability(classification_df: pd.DataFrame, models=None) -> np.ndarray:
+    """inference.batch.predict_probability, batched across requests when MICROBATCH=1."""
+    if MICROBATCH:
+        return _probability(classification_df, models)
+    return batch.predict_probability(classification_df, models)
+
+
+def predict_updrs(regression_df: pd.DataFrame, models=None):
+    """inference.batch.predict_updrs, batched across requests when MICROBATCH=1."""
+    return _updrs(regression_df, models) if MICROBATCH else batch.predict_updrs(regression_df, models)
+
+
+def throughput(threads: int = 16, calls: int = 50, window_ms: float = MICROBATCH_WINDOW_MS) -> dict:
+    """
+    Model-stage calls per second from `threads` concurrent callers, each
+    predicting one row `calls` times, called directly and through batchers.
+    Also returns the mean per-call latency of each.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from feature_extractors.graph import required_columns
+
+    classification_df = pd.DataFrame([{c: 0.5 for c in required_columns("classification")}])
+    regression_df = pd.DataFrame([{c: 0.5 for c in required_columns("regression")}])
+    batch.predict_probability(classification_df)
+    batch.predict_updrs(regression_df)  # load the models outside the timing
+
+    def measure(probability, updrs):
+        latencies = []
+
+        def caller(_):
+            for _ in range(calls):
+                started = time.perf_counter()
+                probability(classification_df)
+                updrs(regression_df)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(caller, range(threads)))
+        return threads * calls / (time.perf_counter() - started), float(np.mean(latencies))
+
+    direct = measure(batch.predict_probability, batch.predict_updrs)
+    batched = measure(MicroBatcher("classification", batch.predict_probability, window_ms),
+                      MicroBatcher("regression", batch.predict_updrs, window_ms))
+    return {"direct": direct, "batched": batched}
+
+
+if __name__ == "__main__":
+    import sys
+
+    for threads in (1, 4, 16, 64) if len(sys.argv) < 2 else map(int, sys.argv[1:]):
+        result = throughput(threads)
+        (direct_rate, direct_latency), (batched_rate, batched_latency) = result["direct"], result["batched"]
+        print(f"🧮 {threads:3d} threads: direct {direct_rate:8.1f} req/s ({direct_latency * 1000:6.2f} ms), "
+              f"batched {batched_rate:8.1f} req/s ({batched_latency * 1000:6.2f} ms), "
+              f"x{batched_rate / direct_rate:.1f}")
@@ -0,0 +1,176 @@
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from typing import Optional
+import numpy as np
+import pandas as pd
+from feature_extractors.classification_features import extract_classification_features
+from feature_extractors.regressors_features import extract_regression_features
+from feature_extractors.analysis import get_analysis
+from feature_extractors.segmented import parallel_analysis
+from preprocessing.audio import prepare_analysis
+from inference.batch import hybrid_status
+from inference.microbatch import predict_probability, predict_updrs
+from inference.cascade import CASCADE_MODE, decisive, cascade_status
+from utils.feature_store import feature_store, feature_row
+from utils.load_models import registry
+from utils.metrics import span
+from utils.audio_io import probe_duration
+
+AUDIO_PATH = "audio_samples/audio.wav"
+
+
+@dataclass(frozen=True)
+class PipelineResult:
+    """
+    Immutable, request-scoped output of one pipeline run.
+    Nothing is written to module globals, so concurrent requests cannot cross.
+    """
+    status: str
+    probability: float
+    motor_updrs: Optional[float]  # None when the cascade skipped or deferred the UPDRS models
+    total_updrs: Optional[float]
+    test_time: float
+    stages: tuple = ("classification", "regression")  # model stages that ran
+    updrs_job: Optional[str] = None  # job computing the deferred UPDRS scores
+    fidelity: str = "standard"  # analysis tier the features were extracted at
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        result['probability'] = round(self.probability, 3)
+        result['stages'] = list(self.stages)
+        if self.updrs_job is None:
+            del result['updrs_job']
+        return result
+
+
+def calculate_test_time(audio_path):
+    """
+    Duration of the audio in seconds: from the container header for file paths
+    (no decode), else from the shared analysis.
+    """
+    try:
+        duration = probe_duration(audio_path) if isinstance(audio_path, str) else None
+        if duration is None:
+            duration = get_analysis(audio_path).duration
+        print(f"🕒 Extracted test_time: {duration} seconds")
+        return duration
+    except Exception as e:
+        print(f"⚠️ Failed to calculate duration: {e}")
+        return 10.0  # fallback
+
+
+def complete_updrs(probability: float, regression_df: pd.DataFrame) -> dict:
+    """
+    Deferred second stage of a cascaded analysis (runs as a job): UPDRS scores
+    and the full hybrid status.
+    """
+    motor, total = predict_updrs(regression_df)
+    return {
+        "status": str(hybrid_status([probability], motor, total)[0]),
+        "probability": round(probability, 3),
+        "motor_updrs": float(motor[0]),
+        "total_updrs": float(total[0]),
+    }
+
+
+def run_pipeline(audio_path=AUDIO_PATH, age=70, sex=0, test_time=50.0, request_id=None,
+                 cascade=CASCADE_MODE, defer=None) -> PipelineResult:
+    """
+    cascade: "off" runs every model; "skip" decides clear cases from the classifier
+    alone; "defer" also queues their UPDRS models through defer(fn, *args) -> job id
+    (falls back to skip when defer is None or returns None).
+    """
+    print("\n🎙️ Starting Parkinson Prediction Pipeline...\n")
+    started = time.perf_counter()
+    models = registry.snapshot()  # both stages use the same model set, even across a hot reload
+
+    # Decode once and share Praat objects between both extractors
+    analysis = get_analysis(audio_path)
+    with span("segment_analysis"):
+        analysis = parallel_analysis(analysis)  # long recordings only, when PARALLEL_EXTRACTION=1
+
+    # 1️⃣ Classification features and probability
+    with span("extract_classification"):
+        classification_df = extract_classification_features(analysis)
+    print("✅ Classification features extracted.")
+    extract_seconds = time.perf_counter() - started
+
+    mark = time.perf_counter()
+    proba = predict_probability(classification_df, models)
+    print(f"🧩 Parkinson Probability: {float(proba[0]):.3f}")
+    inference_seconds = time.perf_counter() - mark
+
+    # 2️⃣ Regression features and UPDRS scores, unless the classifier is decisive
+    updrs_job = None
+    if cascade != "off" and decisive(proba)[0]:
+        status = cascade_status(proba)
+        motor = total = np.array([None])
+        stages = ("classification",)
+        regression_df = pd.DataFrame([{"age": age, "sex": sex, "test_time": test_time}])
+        if cascade == "defer" and defer is not None:
+            mark = time.perf_counter()
+            with span("extract_regression"):
+                regression_df = extract_regression_features(analysis, age, sex, test_time)
+            extract_seconds += time.perf_counter() - mark
+            updrs_job = defer(complete_updrs, float(proba[0]), regression_df)
+        print(f"⏭️ Classifier decisive; UPDRS models {'deferred' if updrs_job else 'skipped'}.")
+    else:
+        mark = time.perf_counter()
+        with span("extract_regression"):
+            regression_df = extract_regression_features(analysis, age, sex, test_time)
+        print("✅ Regression features extracted.")
+        extract_seconds += time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        motor, total = predict_updrs(regression_df, models)
+        status = hybrid_status(proba, motor, total)
+        inference_seconds += time.perf_counter() - mark
+        stages = ("classification", "regression")
+    predictions = {"probability": proba, "motor_updrs": motor, "total_updrs": total, "status": status}
+
+    # History for auditing/retraining; queued, written in batches off the request path
+    feature_store.append(feature_row(
+        request_id or uuid.uuid4().hex, classification_df, regression_df, predictions,
+        extract_ms=extract_seconds * 1000, inference_ms=inference_seconds * 1000,
+        stages=",".join(stages), fidelity=analysis.fidelity.name,
+    ))
+
+    result = PipelineResult(
+        status=str(status[0]),
+        probability=float(proba[0]),
+        motor_updrs=None if motor[0] is None else float(motor[0]),
+        total_updrs=None if total[0] is None else float(total[0]),
+        test_time=test_time,
+        stages=stages,
+        updrs_job=updrs_job,
+        fidelity=analysis.fidelity.name,
+    )
+    print(f"🎯 Motor UPDRS (ensemble): {result.motor_updrs}")
+    print(f"🎯 Total UPDRS (ensemble): {result.total_updrs}")
+    print(f"🧠 Final Assessment: {result.status}")
+    print("\n🚀 Pipeline Complete!\n----------------------------------")
+
+    return result
+
+
+def analyze_audio(audio, age=70, sex=0, user_test_time=None, request_id=None,
+                  cascade=CASCADE_MODE, defer=None, fidelity=None) -> dict:
+    """
+    Full analysis of one recording (path, decoded (samples, sample_rate) or
+    AudioAnalysis) at a fidelity tier (the server's FIDELITY when None).
+    Module-level so job workers in other processes can run it.
+    Raises preprocessing.audio.AudioQualityError for unusable recordings.
+    """
+    with span("preprocess"):
+        analysis = prepare_analysis(audio, fidelity)
+
+    # Determine test_time
+    if user_test_time:
+        test_time = float(user_test_time)
+        print(f"🧮 Using user-provided test_time: {test_time}")
+    else:
+        with span("duration"):
+            test_time = calculate_test_time(analysis)
+
+    return run_pipeline(analysis, age, sex, test_time, request_id, cascade, defer).to_dict()
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+import uuid
+import numpy as np
+from feature_extractors.fidelity import get_fidelity
+from feature_extractors.streaming import StreamingAnalysis
+from inference.batch import predict_batch
+from inference.pipeline import PipelineResult
+from preprocessing.audio import AudioQualityError
+from utils.common import check_audio_quality, AUDIO_QUALITY_OK
+from utils.feature_store import feature_store, feature_row
+
+STREAM_BLOCK_SECONDS = float(os.environ.get("STREAM_BLOCK_SECONDS", 2.0))
+STREAM_IDLE_TIMEOUT = float(os.environ.get("STREAM_IDLE_TIMEOUT", 60))
+STREAM_MAX_SESSIONS = int(os.environ.get("STREAM_MAX_SESSIONS", 16))
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", 120))
+
+PCM_FORMATS = {"float32": ("<f4", 1.0), "int16": ("<i2", 32768.0)}
+
+
+class StreamLimitError(Exception):
+    """Raised when no more stream sessions can be opened or a stream is too long."""
+
+
+class StreamSession:
+    """
+    One live recording: raw PCM frames in, provisional predictions out.
+    Predictions are refreshed whenever a new analysis block completes.
+    """
+
+    def __init__(self, sample_rate: int, age: int, sex: int, user_test_time=None, pcm_format: str = "float32",
+                 fidelity: str = None):
+        if pcm_format not in PCM_FORMATS:
+            raise ValueError(f"Unsupported PCM format '{pcm_format}' (use {', '.join(PCM_FORMATS)})")
+        self.stream_id = uuid.uuid4().hex
+        self.age = age
+        self.sex = sex
+        self.user_test_time = float(user_test_time) if user_test_time else None
+        self.dtype, self.scale = PCM_FORMATS[pcm_format]
+        # Frames arrive at the client's rate: the tier sets the Praat time steps only
+        self.fidelity = get_fidelity(fidelity)
+        self.analysis = StreamingAnalysis(sample_rate, STREAM_BLOCK_SECONDS, fidelity=self.fidelity)
+        self.provisional = None
+        self.last_seen = time.time()
+        self.lock = threading.Lock()
+
+    def _predict(self):
+        test_time = self.user_test_time or self.analysis.duration
+        classification_df, regression_df = self.analysis.feature_frames(self.age, self.sex, test_time)
+        if not (np.isfinite(classification_df.values).all() and np.isfinite(regression_df.values).all()):
+            return None  # not enough voiced audio yet
+        return classification_df, regression_df, predict_batch(classification_df, regression_df), test_time
+
+    def pending_seconds(self, data: bytes, final: bool = False) -> float:
+        """Audio a feed of `data` makes the session analyze (with the unanalyzed tail when final)."""
+        seconds = len(data) / np.dtype(self.dtype).itemsize / self.analysis.sample_rate
+        if final:
+            seconds += (self.analysis.n_samples - self.analysis.processed) / self.analysis.sample_rate
+        return seconds
+
+    def check_frames(self, data: bytes):
+        """Raises ValueError when `data` is not a whole number of samples."""
+        itemsize = np.dtype(self.dtype).itemsize
+        if len(data) % itemsize:
+            raise ValueError(f"Frames are {len(data)} bytes, not a whole number of {itemsize}-byte samples")
+
+    def feed(self, data: bytes) -> dict:
+        """
+        Appends little-endian mono PCM and returns the latest provisional prediction.
+        """
+        self.check_frames(data)
+        samples = np.frombuffer(data, dtype=self.dtype) / self.scale
+        if self.analysis.n_samples + samples.size > STREAM_MAX_SECONDS * self.analysis.sample_rate:
+            raise StreamLimitError(f"Stream longer than {STREAM_MAX_SECONDS:g}s")
+        self.last_seen = time.time()
+
+        if self.analysis.add(samples):
+            predicted = self._predict()
+            if predicted is not None:
+                _, _, predictions, _ = predicted
+                self.provisional = {
+                    "probability": round(float(predictions["probability"][0]), 3),
+                    "motor_updrs": float(predictions["motor_updrs"][0]),
+                    "total_updrs": float(predictions["total_updrs"][0]),
+                    "status": str(predictions["status"][0]),
+                }
+        return {
+            "stream_id": self.stream_id,
+            "duration": self.analysis.duration,
+            "analyzed": round(self.analysis.processed / self.analysis.sample_rate, 2),
+            "provisional": self.provisional,
+            "final": False,
+            "preprocessed": False,
+        }
+
+    def finish(self) -> dict:
+        """
+        Analyzes the remaining tail and returns the final result (same shape as /analyze).
+        Raises AudioQualityError when the stream fails the quality gate or has too little voice.
+        """
+        started = time.perf_counter()
+        self.analysis.finish()
+        predicted = self._predict()
+        if predicted is None:
+            message = check_audio_quality(self.analysis.duration, self.analysis.sample_rate)
+            if message == AUDIO_QUALITY_OK:
+                message = "⚠️ Not enough voiced audio — try recording longer."
+            raise AudioQualityError(f"{message} (stream of {self.analysis.duration:.2f}s)")
+        classification_df, regression_df, predictions, test_time = predicted
+
+        feature_store.append(feature_row(
+            self.stream_id, classification_df, regression_df, predictions,
+            finish_ms=(time.perf_counter() - started) * 1000, fidelity=self.fidelity.name,
+        ))
+        result = PipelineResult(
+            status=str(predictions["status"][0]),
+            probability=float(predictions["probability"][0]),
+            motor_updrs=float(predictions["motor_updrs"][0]),
+            total_updrs=float(predictions["total_updrs"][0]),
+            test_time=test_time,
+            fidelity=self.fidelity.name,
+        )
+        print(f"🎙️ Stream {self.stream_id} closed after {self.analysis.duration}s: {result.status}")
+        # Frames are analyzed as they arrive: no VAD trimming or resampling (PREPROCESS_AUDIO)
+        return dict(result.to_dict(), preprocessed=False)
+
+
+class StreamSessions:
+    """
+    Open stream sessions of this process; idle sessions expire after STREAM_IDLE_TIMEOUT.
+    """
+
+    def __init__(self, max_sessions: int = STREAM_MAX_SESSIONS, idle_timeout: float = STREAM_IDLE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def open(self, *args, **kwargs) -> StreamSession:
+        self._expire()
+        session = StreamSession(*args, **kwargs)
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                raise StreamLimitError(f"Too many open streams ({self.max_sessions})")
+            self._sessions[session.stream_id] = session
+        return session
+
+    def get(self, stream_id: str):
+        self._expire()
+        with self._lock:
+            return self._sessions.get(stream_id)
+
+    def close(self, stream_id: str):
+        with self._lock:
+            return self._sessions.pop(stream_id, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _expire(self):
+        cutoff = time.time() - self.idle_timeout
+        with self._lock:
+            for stream_id in [k for k, s in self._sessions.items() if s.last_seen < cutoff]:
+                del self._sessions[stream_id]
+
+
+stream_sessions = StreamSessions()
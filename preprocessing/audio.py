@@ -0,0 +1,210 @@
+import os
+from math import gcd
+import numpy as np
+import parselmouth
+from feature_extractors.analysis import AudioAnalysis
+from feature_extractors.fidelity import get_fidelity
+from utils.audio_io import decode_audio
+from utils.common import check_audio_quality, AUDIO_QUALITY_OK
+
+# Set PREPROCESS_AUDIO=1 to trim silence and resample before Praat (off until the
+# models are revalidated on preprocessed features)
+PREPROCESS_AUDIO = os.environ.get("PREPROCESS_AUDIO", "0") == "1"
+# Analysis rate in Hz; 0 keeps the recording's own rate
+ANALYSIS_SAMPLE_RATE = int(os.environ.get("ANALYSIS_SAMPLE_RATE", 22050))
+
+# Energy/zero-crossing VAD
+VAD_FRAME_SECONDS = 0.03
+VAD_HOP_SECONDS = 0.01
+VAD_ENERGY_DB = float(os.environ.get("VAD_ENERGY_DB", -35.0))  # relative to the loudest frame
+VAD_FLOOR_DB = -60.0  # absolute (dBFS); quieter frames are never voice
+VAD_MAX_ZCR = float(os.environ.get("VAD_MAX_ZCR", 3000))  # zero crossings per second; above is noise/fricative
+VAD_MIN_GAP_SECONDS = 0.2  # shorter pauses stay in
+VAD_MIN_SPEECH_SECONDS = 0.1  # shorter bursts (clicks, handling noise) are dropped
+VAD_PAD_SECONDS = 0.05
+# Silence inserted between kept regions: longer than the longest valid period, so no
+# pulse pair spans a cut and jitter/shimmer never see a fake period
+VAD_JOIN_SECONDS = 0.05
+
+
+class AudioQualityError(ValueError):
+    """Raised when a recording cannot be analyzed (too short, too little voice, low sample rate)."""
+
+
+class AnalysisMemoryError(ValueError):
+    """Raised when analyzing a recording would take more than ANALYSIS_MEMORY_MB, even in windows."""
+
+
+def preprocessing_signature() -> str:
+    """Identifies the preprocessing settings (part of result cache keys)."""
+    if not PREPROCESS_AUDIO:
+        return "raw"
+    return f"vad:{VAD_ENERGY_DB}:{VAD_MAX_ZCR}:sr:{ANALYSIS_SAMPLE_RATE}"
+
+
+def target_rate(fidelity) -> int:
+    """Analysis rate of a fidelity tier (0: the recording's own rate)."""
+    return ANALYSIS_SAMPLE_RATE if fidelity.sample_rate is None else fidelity.sample_rate
+
+
+def load_samples(audio):
+    """
+    (samples, sample_rate) for a file path, a binary file object or an already decoded tuple.
+    """
+    if isinstance(audio, tuple):
+        return audio
+    if hasattr(audio, "read"):
+        audio.seek(0)
+        return decode_audio(audio.read())
+    sound = parselmouth.Sound(audio)
+    return sound.values, int(sound.sampling_frequency)
+
+
+def to_mono(samples) -> np.ndarray:
+    """Channel average; keeps float32 input in float32 (no full-length float64 copy)."""
+    samples = np.asarray(samples)
+    if samples.dtype not in (np.float32, np.float64):
+        samples = samples.astype(np.float64)
+    if samples.ndim == 1:
+        return samples
+    return samples[0] if samples.shape[0] == 1 else samples.mean(axis=0, dtype=samples.dtype)
+
+
+def resample(signal, sample_rate: int, target_rate: int):
+    """Polyphase resampling; only ever downsamples (upsampling adds no information)."""
+    if not target_rate or target_rate >= sample_rate:
+        return signal, sample_rate
+    from scipy.signal import resample_poly  # ~1 s to import; only loaded once a recording needs it
+    divisor = gcd(int(sample_rate), int(target_rate))
+    return resample_poly(signal, target_rate // divisor, sample_rate // divisor), target_rate
+
+
+def _frame_sums(values, frame, hop):
+    """Sum of values over each analysis frame, via one cumulative sum (no frame matrix)."""
+    cumulative = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    starts = np.arange(0, values.size - frame + 1, hop)
+    return cumulative[starts + frame] - cumulative[starts]
+
+
+def frame_statistics(signal, sample_rate: int, frame: int, hop: int, chunk_frames: int = 6000, mean: float = None):
+    """
+    Per-frame energy (dB) and zero-crossing rate (per second), computed a chunk
+    of frames at a time so temporaries stay small for long recordings.
+    signal only needs .size and slicing (a windowed view works); pass its mean
+    when it is already known, to avoid an extra pass.
+    """
+    count = 1 + (signal.size - frame) // hop
+    if mean is None:
+        mean = float(np.mean(signal, dtype=np.float64))
+    energy_db = np.empty(count)
+    zcr = np.empty(count)
+    for first in range(0, count, chunk_frames):
+        last = min(count, first + chunk_frames)
+        centred = signal[first * hop:(last - 1) * hop + frame].astype(np.float64) - mean
+        energy_db[first:last] = 10 * np.log10(_frame_sums(centred * centred, frame, hop) / frame + 1e-12)
+        crossings = np.diff(np.signbit(centred))  # frame - 1 sign changes per frame
+        zcr[first:last] = _frame_sums(crossings, frame - 1, hop) / (frame - 1) * sample_rate
+    return energy_db, zcr
+
+
+def _runs(mask):
+    """(start, end) index pairs of the True runs in a boolean array."""
+    edges = np.diff(np.r_[0, mask.astype(np.int8), 0])
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def voice_regions(signal, sample_rate: int, mean: float = None, chunk_frames: int = 6000):
+    """
+    Sample ranges [(start, end), ...] that contain voice: frames loud enough
+    relative to the loudest frame and with a low zero-crossing rate, with short
+    pauses bridged, short bursts dropped and every region padded.
+    """
+    frame = int(VAD_FRAME_SECONDS * sample_rate)
+    hop = int(VAD_HOP_SECONDS * sample_rate)
+    if signal.size < frame:
+        return []
+
+    energy_db, zcr = frame_statistics(signal, sample_rate, frame, hop, chunk_frames, mean)
+    threshold = max(energy_db.max() + VAD_ENERGY_DB, VAD_FLOOR_DB)
+    voiced = (energy_db >= threshold) & (zcr <= VAD_MAX_ZCR)
+
+    # Bridge short pauses, then drop short bursts
+    starts, ends = _runs(~voiced)
+    for start, end in zip(starts, ends):
+        if 0 < start and end < voiced.size and (end - start) * VAD_HOP_SECONDS < VAD_MIN_GAP_SECONDS:
+            voiced[start:end] = True
+    starts, ends = _runs(voiced)
+    keep = (ends - starts) * VAD_HOP_SECONDS >= VAD_MIN_SPEECH_SECONDS
+
+    pad = int(VAD_PAD_SECONDS * sample_rate)
+    regions = []
+    for start, end in zip(starts[keep], ends[keep]):
+        first = max(0, start * hop - pad)
+        last = min(signal.size, (end - 1) * hop + frame + pad)
+        if regions and first <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], last)
+        else:
+            regions.append((first, last))
+    return regions
+
+
+def trim_silence(signal, sample_rate: int):
+    """Keeps only the voice regions, joined by short silences."""
+    regions = voice_regions(signal, sample_rate)
+    if not regions:
+        return signal[:0]
+    gap = np.zeros(int(VAD_JOIN_SECONDS * sample_rate))
+    parts = []
+    for start, end in regions:
+        if parts:
+            parts.append(gap)
+        parts.append(signal[start:end])
+    return np.concatenate(parts)
+
+
+def prepare_analysis(audio, fidelity=None) -> AudioAnalysis:
+    """
+    Pre-analysis stage: mono downmix, VAD trimming, resampling to the fidelity
+    tier's rate (ANALYSIS_SAMPLE_RATE for standard) and the quality gate, before any Praat work.
+    Accepts a file path, a binary file object, a decoded (samples, sample_rate) tuple
+    or an AudioAnalysis (returned unchanged). Raises AudioQualityError for unusable
+    recordings. Files too large to analyze in memory go through the windowed
+    analysis (preprocessing/windowed.py); AnalysisMemoryError is raised for
+    decoded recordings over the memory ceiling. fidelity: a tier name (the server's
+    FIDELITY when None); the analysis keeps it for the Praat time steps.
+
+    Praat runs on the trimmed, resampled sound. Duration (test_time) and the
+    waveform statistics (RPDE, DFA) still describe the recording as uploaded.
+    """
+    if isinstance(audio, AudioAnalysis):
+        return audio
+    from preprocessing.windowed import check_in_memory, use_windowed, windowed_analysis
+    fidelity = get_fidelity(fidelity)
+    if not isinstance(audio, tuple) and use_windowed(audio):
+        return windowed_analysis(audio, fidelity)
+    samples, sample_rate = load_samples(audio)
+    check_in_memory(samples)
+    duration = round(samples.shape[-1] / sample_rate, 2)
+
+    message = check_audio_quality(duration, sample_rate)
+    if message != AUDIO_QUALITY_OK:
+        raise AudioQualityError(message)
+    if not PREPROCESS_AUDIO:
+        analysis = AudioAnalysis.from_samples(samples, sample_rate)
+        analysis.fidelity = fidelity
+        return analysis
+
+    voiced = trim_silence(to_mono(samples), sample_rate)
+    voiced, analysis_rate = resample(voiced, sample_rate, target_rate(fidelity))
+
+    voiced_duration = voiced.size / analysis_rate
+    message = check_audio_quality(voiced_duration, sample_rate)
+    if message != AUDIO_QUALITY_OK:
+        raise AudioQualityError(f"{message} (only {voiced_duration:.2f}s of voice found)")
+    print(f"✂️ Preprocessed audio: {duration:.2f}s → {voiced_duration:.2f}s of voice at {analysis_rate} Hz")
+
+    analysis = AudioAnalysis.from_samples(voiced[np.newaxis, :], analysis_rate)
+    analysis.duration = duration
+    analysis.fidelity = fidelity
+    analysis.signal = np.asarray(samples)[0] if np.ndim(samples) == 2 else np.asarray(samples)
+    return analysis
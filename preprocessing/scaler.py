@@ -22,24 +22,40 @@
 
 #     return scaled_df
 
+import os
 import pickle
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
+from utils.load_models import registry
+from utils.metrics import span
+
+def load_scaler(scaler_path: str, models=None):
+    """
+    Returns a scaler from the in-memory model registry (or the caller's
+    snapshot of it, `models`) when it lives in models/, otherwise reads it from disk.
+    """
+    with span("model_load"):
+        if os.path.dirname(os.path.abspath(scaler_path)) == os.path.abspath(registry.models_dir):
+            return (models or registry).get(scaler_path)
+        with open(scaler_path, "rb") as f:
+            return pickle.load(f)
 
-def scale_features(df: pd.DataFrame, scaler_path: str) -> pd.DataFrame:
-    import pickle
-    from sklearn.preprocessing import StandardScaler
 
+def scale_features(df: pd.DataFrame, scaler_path: str, models=None) -> pd.DataFrame:
     try:
-        with open(scaler_path, "rb") as f:
-            scaler = pickle.load(f)
-            print(f"✅ Loaded scaler: {scaler_path}")
+        scaler = load_scaler(scaler_path, models)
     except FileNotFoundError:
         print(f"⚠️ Scaler not found — fitting and saving new scaler: {scaler_path}")
+        from sklearn.preprocessing import StandardScaler  # only needed here; keeps sklearn off the serving path
         scaler = StandardScaler().fit(df)
         with open(scaler_path, "wb") as f:
             pickle.dump(scaler, f)
 
-    scaled_data = scaler.transform(df)
-    scaled_df = pd.DataFrame(scaled_data, columns=df.columns)
-    return scaled_df
\ No newline at end of file
+    # Feature frames may carry columns for other models; pass the scaler exactly its own
+    names = getattr(scaler, "feature_names_in_", None)
+    if names is not None:
+        df = df[list(names)]
+
+    with span("scale"):
+        scaled_data = scaler.transform(df)
+        scaled_df = pd.DataFrame(scaled_data, columns=df.columns)
+    return scaled_df
@@ -0,0 +1,259 @@
+"""
+Bounded-memory analysis of long recordings (WINDOWED_ANALYSIS).
+
+The recording is never decoded whole: PCM WAV data is memory-mapped and every
+other format soundfile reads is read window by window (utils/audio_io.PCMSource).
+Four passes over the file, each holding one window at a time:
+
+1. waveform statistics (RPDE, DFA) of channel 0 as running sums, and the mono mean;
+2. the VAD frame statistics, on a lazy mono view;
+3. the voiced regions, resampled in chunks: peak and voiced duration (quality gate);
+4. the same chunks fed to a StreamingAnalysis, which runs Praat block by block
+   with the whole recording's peak.
+
+Only per-frame VAD values (~1.6 kB per second) and the pulse arrays grow with
+the recording. ANALYSIS_MEMORY_MB is a ceiling for both paths: recordings whose
+windowed analysis would still exceed it, and decoded recordings too large for
+the in-memory analysis, are refused with AnalysisMemoryError. Praat runs each
+window on the whole trimmed signal's frame grid, so results match the
+whole-file analysis.
+"""
+import os
+from math import ceil, gcd
+import numpy as np
+from feature_extractors.analysis import AudioAnalysis
+from feature_extractors.streaming import SignalMoments, StreamingAnalysis
+from feature_extractors.fidelity import get_fidelity
+from preprocessing.audio import (PREPROCESS_AUDIO, VAD_HOP_SECONDS, VAD_JOIN_SECONDS, AnalysisMemoryError,
+                                 AudioQualityError, target_rate, voice_regions)
+from utils.audio_io import PCMSource, probe_audio
+from utils.common import check_audio_quality, AUDIO_QUALITY_OK
+
+# "auto": recordings whose in-memory analysis would need more than ANALYSIS_MEMORY_MB; "1": always; "0": never
+WINDOWED_ANALYSIS = os.environ.get("WINDOWED_ANALYSIS", "auto")
+# Memory ceiling of one analysis; 0 disables it (and windows only ever on WINDOWED_ANALYSIS=1)
+ANALYSIS_MEMORY_MB = float(os.environ.get("ANALYSIS_MEMORY_MB", 512))
+# Audio read (and analyzed by Praat) per step
+ANALYSIS_WINDOW_SECONDS = float(os.environ.get("ANALYSIS_WINDOW_SECONDS", 10))
+# Bytes per frame of the in-memory path besides the decoded channels (float32):
+# mono, trimmed and resampled copies, Praat's float64 sound and its analyses
+# (measured: ~17 bytes per frame in all for a mono recording)
+IN_MEMORY_BYTES_PER_FRAME = 14
+# Growth of a windowed analysis per second of audio: per-frame VAD values and
+# the pulse and amplitude arrays (measured: ~1 MB per minute)
+WINDOWED_BYTES_PER_SECOND = 17500
+
+
+def windowed_signature() -> str:
+    """Identifies the windowed analysis settings (part of result cache keys of windowed requests)."""
+    return f"windowed:grid:{ANALYSIS_WINDOW_SECONDS}"
+
+
+def analysis_footprint(frames: int, channels: int) -> int:
+    """Approximate peak bytes of analyzing a recording in memory."""
+    return frames * (channels * 4 + IN_MEMORY_BYTES_PER_FRAME)
+
+
+def windowed_footprint(frames: int, channels: int, sample_rate: int, window_seconds: float) -> int:
+    """Approximate peak bytes of analyzing a recording in windows."""
+    window = min(frames, int(window_seconds * sample_rate))
+    return analysis_footprint(window, channels) + int(frames / sample_rate * WINDOWED_BYTES_PER_SECOND)
+
+
+def check_footprint(footprint: int, how: str):
+    """Raises AnalysisMemoryError when an analysis would need more than ANALYSIS_MEMORY_MB."""
+    if ANALYSIS_MEMORY_MB and footprint > ANALYSIS_MEMORY_MB * 2 ** 20:
+        raise AnalysisMemoryError(f"Recording too long to analyze: about {footprint / 2 ** 20:.0f} MB needed "
+                                  f"{how}, over the {ANALYSIS_MEMORY_MB:g} MB limit")
+
+
+def check_in_memory(samples):
+    """check_footprint for decoded (channels, n) samples analyzed in memory."""
+    samples = np.asarray(samples)
+    check_footprint(analysis_footprint(samples.shape[-1], samples.shape[0] if samples.ndim == 2 else 1),
+                    "in memory")
+
+
+def use_windowed(source) -> bool:
+    """
+    Whether a file path or binary file object should be analyzed in windows,
+    decided from the container header alone (nothing is mapped or decoded).
+    False for anything soundfile cannot open (compressed uploads go through ffmpeg
+    in memory). File objects are rewound afterwards.
+    """
+    if WINDOWED_ANALYSIS == "0":
+        return False
+    probed = probe_audio(source)
+    if probed is None:
+        return False
+    if WINDOWED_ANALYSIS == "1":
+        return True
+    duration, sample_rate, channels = probed
+    return bool(ANALYSIS_MEMORY_MB) and \
+        analysis_footprint(round(duration * sample_rate), channels) > ANALYSIS_MEMORY_MB * 2 ** 20
+
+
+class MonoView:
+    """Channel average of a PCMSource, read on slicing (what the VAD needs of a signal)."""
+
+    def __init__(self, pcm: PCMSource):
+        self.pcm = pcm
+        self.size = pcm.frames
+
+    def __getitem__(self, index: slice) -> np.ndarray:
+        start, stop, _ = index.indices(self.size)
+        window = self.pcm.read(start, stop)
+        return window[0] if window.shape[0] == 1 else window.mean(axis=0, dtype=np.float32)
+
+
+def voiced_chunks(view: MonoView, regions, sample_rate: int, window: int):
+    """The trimmed signal (voice regions joined by short silences) as float64 chunks."""
+    gap = np.zeros(int(VAD_JOIN_SECONDS * sample_rate))
+    for i, (start, end) in enumerate(regions):
+        if i:
+            yield gap
+        for first in range(start, end, window):
+            yield view[first:min(end, first + window)].astype(np.float64)
+
+
+class StreamResampler:
+    """
+    Polyphase downsampling of a signal that arrives in chunks, with the same
+    output as resample_poly on the whole signal: each step resamples the new
+    input plus enough context on both sides to cover the filter.
+    """
+
+    def __init__(self, sample_rate: int, target_rate: int):
+        self.rate = sample_rate
+        self.up = self.down = 1
+        if target_rate and target_rate < sample_rate:
+            divisor = gcd(int(sample_rate), int(target_rate))
+            self.up, self.down, self.rate = target_rate // divisor, sample_rate // divisor, target_rate
+        # resample_poly's filter spans 10 * max(up, down) upsampled samples per side;
+        # context is a multiple of `down`, so chunk starts map to whole output samples
+        half = 10 * max(self.up, self.down) // self.up + 1
+        self.context = self.down * ceil(half / self.down)
+        self._buffer = np.zeros(0)
+        self._start = 0  # input index of _buffer[0] (a multiple of down)
+        self._received = 0
+        self._emitted = 0  # output samples returned so far
+
+    def _resample(self, values):
+        from scipy.signal import resample_poly
+        return resample_poly(values, self.up, self.down)
+
+    def add(self, samples) -> np.ndarray:
+        """Output samples that are final once `samples` is appended."""
+        if self.up == self.down:
+            return np.asarray(samples, dtype=np.float64)
+        self._buffer = np.r_[self._buffer, samples]
+        self._received += len(samples)
+        safe = (self._received - self.context) // self.down * self.down
+        if safe * self.up // self.down <= self._emitted:
+            return np.zeros(0)
+        offset = self._start * self.up // self.down
+        end = safe * self.up // self.down
+        output = self._resample(self._buffer[:safe + self.context - self._start])[self._emitted - offset:end - offset]
+        self._emitted = end
+        keep = max(0, safe - self.context)
+        self._buffer = self._buffer[keep - self._start:]
+        self._start = keep
+        return output
+
+    def finish(self) -> np.ndarray:
+        """The remaining output once the input is complete."""
+        if self.up == self.down or self._received == 0:
+            return np.zeros(0)
+        offset = self._start * self.up // self.down
+        output = self._resample(self._buffer)[self._emitted - offset:]
+        self._emitted += output.size
+        return output
+
+
+def _resampled(chunks, sample_rate: int, rate: int):
+    """(resampled chunk iterator, analysis rate) for the voiced chunks."""
+    resampler = StreamResampler(sample_rate, rate if PREPROCESS_AUDIO else 0)
+
+    def generate():
+        for chunk in chunks:
+            out = resampler.add(chunk)
+            if out.size:
+                yield out
+        out = resampler.finish()
+        if out.size:
+            yield out
+    return generate(), resampler.rate
+
+
+class WindowedAnalysis(AudioAnalysis):
+    """
+    Result of a windowed analysis: the feature graph's Praat and waveform nodes
+    are all precomputed, so there is no Praat sound (and no whole-file analyses).
+    """
+
+    def __init__(self, source, duration: float, precomputed: dict, fidelity):
+        self.audio_path = source if isinstance(source, str) else None
+        self.sound = None
+        self.duration = duration
+        self.precomputed = precomputed
+        self.fidelity = fidelity
+
+
+def windowed_analysis(source, fidelity=None) -> WindowedAnalysis:
+    """
+    prepare_analysis for a file path or binary file object, in bounded memory.
+    Raises AudioQualityError for unusable recordings and AnalysisMemoryError
+    for recordings whose windowed analysis would exceed ANALYSIS_MEMORY_MB.
+    """
+    fidelity = get_fidelity(fidelity)
+    window_seconds = fidelity.window_seconds or ANALYSIS_WINDOW_SECONDS
+    pcm = PCMSource(source)
+    sample_rate = pcm.sample_rate
+    check_footprint(windowed_footprint(pcm.frames, pcm.channels, sample_rate, window_seconds), "in windows")
+    window = max(1, int(window_seconds * sample_rate))
+    duration = round(pcm.frames / sample_rate, 2)
+    message = check_audio_quality(duration, sample_rate)
+    if message != AUDIO_QUALITY_OK:
+        raise AudioQualityError(message)
+
+    # 1. Waveform statistics (channel 0, as uploaded) and the mono mean
+    moments = SignalMoments()
+    mono_sum = 0.0
+    view = MonoView(pcm)
+    for first in range(0, pcm.frames, window):
+        samples = pcm.read(first, first + window)
+        moments.add(samples[0])
+        mono_sum += float(np.sum(samples[0] if samples.shape[0] == 1 else samples.mean(axis=0, dtype=np.float32),
+                                 dtype=np.float64))
+
+    # 2. Voice regions
+    if PREPROCESS_AUDIO:
+        hop = int(VAD_HOP_SECONDS * sample_rate)
+        regions = voice_regions(view, sample_rate, mono_sum / max(pcm.frames, 1), max(1, window // hop))
+    else:
+        regions = [(0, pcm.frames)]
+
+    # 3. Peak and length of the trimmed, resampled signal
+    chunks, analysis_rate = _resampled(voiced_chunks(view, regions, sample_rate, window), sample_rate,
+                                       target_rate(fidelity))
+    peak, voiced_samples = 0.0, 0
+    for chunk in chunks:
+        peak = max(peak, float(np.abs(chunk).max()))
+        voiced_samples += chunk.size
+    voiced_duration = voiced_samples / analysis_rate
+    message = check_audio_quality(voiced_duration, sample_rate)
+    if message != AUDIO_QUALITY_OK:
+        raise AudioQualityError(f"{message} (only {voiced_duration:.2f}s of voice found)")
+
+    # 4. Praat, one block at a time
+    stream = StreamingAnalysis(analysis_rate, window_seconds, peak=peak, fidelity=fidelity,
+                               extent=(0.0, voiced_samples))
+    chunks, _ = _resampled(voiced_chunks(view, regions, sample_rate, window), sample_rate, target_rate(fidelity))
+    for chunk in chunks:
+        stream.add(chunk)
+    stream.finish()
+    print(f"🪟 Windowed analysis: {duration:.2f}s → {voiced_duration:.2f}s of voice at {analysis_rate} Hz")
+
+    precomputed = stream.known()
+    precomputed["signal_statistics"] = moments.statistics()
+    return WindowedAnalysis(source, duration, precomputed, fidelity)
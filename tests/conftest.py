@@ -0,0 +1,69 @@
+"""
+Shared setup: the repository root is the working directory and import root
+(audioTest.wav is found relative to it), and the app runs with the result
+cache off and its stores in a temporary directory. The repository ships the
+classification model and the scalers but not the UPDRS models, so the tests
+serve a models directory with throwaway UPDRS forests added.
+"""
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+_scratch = tempfile.mkdtemp(prefix="parkinson-tests-")
+os.environ.setdefault("RESULT_CACHE_SIZE", "0")
+os.environ.setdefault("FEATURE_STORE_PATH", os.path.join(_scratch, "features.db"))
+os.environ.setdefault("SPOOL_DIR", os.path.join(_scratch, "spool"))
+os.environ.setdefault("STARTUP_MODE", "lazy")
+
+
+def _build_models(models_dir):
+    """
+    Copies the bundled artifacts and fits a small forest on random scaled rows
+    for each UPDRS model the repository does not ship.
+    """
+    import numpy as np
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor
+
+    os.makedirs(models_dir)
+    for name in os.listdir(os.path.join(ROOT, "models")):
+        if name.endswith(".pkl"):
+            shutil.copy(os.path.join(ROOT, "models", name), models_dir)
+
+    rng = np.random.default_rng(0)
+    for target, offset in (("motor", 20.0), ("total", 28.0)):
+        for variant in ("age", "without_age"):
+            with open(os.path.join(models_dir, f"scaler_regression_{variant}.pkl"), "rb") as f:
+                names = list(pickle.load(f).feature_names_in_)
+            X = pd.DataFrame(rng.normal(size=(400, len(names))), columns=names)
+            y = offset + 5.0 * X.iloc[:, 0] - 3.0 * X.iloc[:, 1] + 2.0 * X.iloc[:, 2] + rng.normal(size=len(X))
+            model = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+            with open(os.path.join(models_dir, f"{target}_updrs_model_{variant}.pkl"), "wb") as f:
+                pickle.dump(model, f)
+
+
+if "MODELS_DIR" not in os.environ:
+    os.environ["MODELS_DIR"] = os.path.join(_scratch, "models")
+    _build_models(os.environ["MODELS_DIR"])
+
+import pytest  # noqa: E402
+
+AUDIO = os.path.join(ROOT, "audioTest.wav")
+
+
+@pytest.fixture(scope="session")
+def audio_bytes():
+    with open(AUDIO, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app import app
+    return app.test_client()
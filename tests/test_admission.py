@@ -0,0 +1,63 @@
+import io
+import time
+
+import numpy as np
+import pytest
+
+import app as app_module
+from utils.admission import AdmissionController, client_id
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    controller = AdmissionController(slots=1, client_concurrency=0, client_rate=0)
+    monkeypatch.setattr(app_module, "ADMISSION_CONTROL", True)
+    monkeypatch.setattr(app_module, "admission", controller)
+    return controller
+
+
+def test_jobs_are_admitted_and_hold_their_slot_until_done(client, audio_bytes, controller):
+    def submit():
+        data = {"age": "60", "sex": "male", "audio": (io.BytesIO(audio_bytes), "audio.wav")}
+        return client.post("/jobs", data=data, content_type="multipart/form-data")
+
+    busy = controller.admit("someone else", 1, 1)
+    assert submit().status_code == 429
+    busy.release()
+
+    response = submit()
+    assert response.status_code == 202
+    assert controller.in_flight() == 1
+    deadline = time.time() + 120
+    while client.get(response.headers["Location"]).get_json()["status"] in ("queued", "running"):
+        assert time.time() < deadline
+        time.sleep(0.2)
+    assert controller.in_flight() == 0
+
+
+def test_stream_frames_are_admitted(client, controller):
+    busy = controller.admit("someone else", 1, 1)
+    assert client.post("/stream", data={"sample_rate": "16000"}).status_code == 429
+    busy.release()
+
+    opened = client.post("/stream", data={"sample_rate": "16000"})
+    assert opened.status_code == 201
+    frames = np.zeros(16000, dtype="<f4").tobytes()
+
+    busy = controller.admit("someone else", 1, 1)
+    shed = client.post(opened.headers["Location"], data=frames)
+    assert shed.status_code == 429 and "Retry-After" in shed.headers
+    busy.release()
+
+    fed = client.post(opened.headers["Location"], data=frames)
+    assert fed.status_code == 200 and fed.get_json()["duration"] == 1.0  # the shed frames were not taken
+    assert controller.in_flight() == 0
+
+
+def test_forwarded_identity_is_only_taken_from_trusted_proxies():
+    proxies = "10.0.0.0/8, 192.168.1.5"
+    assert client_id("203.0.113.7", "spoofed", "198.51.100.1", proxies) == "203.0.113.7"
+    assert client_id("10.1.2.3", "client-42", "198.51.100.1", proxies) == "client-42"
+    assert client_id("10.1.2.3", None, "spoofed, 198.51.100.1, 192.168.1.5", proxies) == "198.51.100.1"
+    assert client_id("10.1.2.3", None, None, proxies) == "10.1.2.3"
+    assert client_id(None, "spoofed", None, proxies) == "unknown"
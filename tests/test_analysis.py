@@ -0,0 +1,53 @@
+import parselmouth
+from conftest import AUDIO
+from feature_extractors.analysis import get_analysis
+from feature_extractors.classification_features import extract_classification_features
+from feature_extractors.perturbation import (MAX_AMPLITUDE_FACTOR, MAX_PERIOD_FACTOR, PERIOD_CEILING,
+                                             PERIOD_FLOOR, PRAAT_TOLERANCE)
+from feature_extractors.regressors_features import extract_regression_features
+
+# Model columns and the Praat query each one stands for
+PRAAT_COLUMNS = {
+    "Jitter(%)": "Get jitter (local)",
+    "Jitter(Abs)": "Get jitter (local, absolute)",
+    "Jitter:RAP": "Get jitter (rap)",
+    "Jitter:PPQ": "Get jitter (ppq5)",
+    "Jitter:DDP": "Get jitter (ddp)",
+    "Shimmer": "Get shimmer (local)",
+    "Shimmer(dB)": "Get shimmer (local_dB)",
+    "Shimmer:APQ3": "Get shimmer (apq3)",
+    "Shimmer:APQ5": "Get shimmer (apq5)",
+    "Shimmer:APQ11": "Get shimmer (apq11)",
+    "Shimmer:DDA": "Get shimmer (dda)",
+}
+
+
+def praat_reference(path):
+    """Each column straight from parselmouth, on objects of its own."""
+    sound = parselmouth.Sound(path)
+    pulses = parselmouth.praat.call(sound, "To PointProcess (periodic, cc)", 75, 500)
+    reference = {}
+    for column, query in PRAAT_COLUMNS.items():
+        if column.startswith("Jitter"):
+            reference[column] = parselmouth.praat.call(pulses, query, 0, 0, PERIOD_FLOOR, PERIOD_CEILING,
+                                                       MAX_PERIOD_FACTOR)
+        else:
+            reference[column] = parselmouth.praat.call([sound, pulses], query, 0, 0, PERIOD_FLOOR,
+                                                       PERIOD_CEILING, MAX_PERIOD_FACTOR, MAX_AMPLITUDE_FACTOR)
+    return reference
+
+
+def test_shared_analysis_matches_parselmouth():
+    analysis = get_analysis(AUDIO)
+    columns = list(PRAAT_COLUMNS)
+    classification = extract_classification_features(analysis, columns=columns)
+    pulses = analysis.pulses
+    regression = extract_regression_features(analysis, 65, 0, analysis.duration, columns=columns)
+    # Both extractors read the one decode and the one set of Praat objects
+    assert get_analysis(analysis) is analysis
+    assert analysis.pulses is pulses
+
+    reference = praat_reference(AUDIO)
+    for df in (classification, regression):
+        for column, praat in reference.items():
+            assert abs(df[column].iloc[0] - praat) <= PRAAT_TOLERANCE * abs(praat), column
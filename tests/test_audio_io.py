@@ -0,0 +1,11 @@
+import io
+
+import pytest
+
+
+@pytest.mark.parametrize("endpoint", ["/analyze", "/jobs"])
+def test_undecodable_upload_is_rejected(client, endpoint):
+    data = {"age": "60", "sex": "male", "audio": (io.BytesIO(b"not audio at all" * 64), "notes.m4a")}
+    response = client.post(endpoint, data=data, content_type="multipart/form-data")
+    assert response.status_code == 415
+    assert response.get_json()["error"]
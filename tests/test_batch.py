@@ -0,0 +1,40 @@
+import io
+
+import pytest
+
+import app as app_module
+import preprocessing.windowed as windowed
+from utils.result_cache import ResultCache
+
+
+def _files(audio_bytes):
+    return [(io.BytesIO(audio_bytes), "voice.wav"), (io.BytesIO(b"not audio at all" * 64), "notes.m4a")]
+
+
+def test_a_bad_file_gets_its_own_error(client, audio_bytes):
+    data = {"age": "60", "sex": "male", "audio": _files(audio_bytes)}
+    response = client.post("/analyze_batch", data=data, content_type="multipart/form-data")
+    assert response.status_code == 200
+    good, bad = response.get_json()["results"]
+    assert good["filename"] == "voice.wav" and 0 <= good["probability"] <= 1
+    assert bad["filename"] == "notes.m4a" and bad["code"] == 415 and bad["error"]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ResultCache(max_entries=8, db_path=None)
+    monkeypatch.setattr(app_module, "result_cache", cache)
+    return cache
+
+
+def test_batch_files_go_the_single_file_way(client, audio_bytes, cache, monkeypatch):
+    # Windowed like /analyze would take them, and served from the result cache when repeated
+    monkeypatch.setattr(windowed, "WINDOWED_ANALYSIS", "1")
+    data = {"age": "60", "sex": "male", "audio": [(io.BytesIO(audio_bytes), "voice.wav")]}
+    first = client.post("/analyze_batch", data=data, content_type="multipart/form-data").get_json()
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 0
+
+    data = {"age": "60", "sex": "male", "audio": [(io.BytesIO(audio_bytes), "voice.wav")]}
+    second = client.post("/analyze_batch", data=data, content_type="multipart/form-data").get_json()
+    assert cache.stats()["hits"] == 1
+    assert first == second
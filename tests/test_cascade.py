@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+import inference.pipeline as pipeline
+from conftest import AUDIO
+from inference.cascade import cascade_signature, cascade_status, decisive
+from tools.evaluate_cascade import evaluate
+
+
+def test_decisive_bands_include_their_thresholds():
+    proba = [0.0, 0.1, 0.1001, 0.5, 0.9499, 0.95, 1.0]
+    assert decisive(proba, 0.1, 0.95).tolist() == [True, True, False, False, False, True, True]
+    assert not decisive(proba, -1, 2).any()
+    assert cascade_signature("off") == "cascade:off" != cascade_signature("skip")
+
+
+def test_cascade_status_matches_the_full_rule_when_updrs_is_low():
+    proba = np.array([0.05, 0.5, 0.7, 0.97])
+    assert cascade_status(proba).tolist() == ["Healthy", "Minor Parkinson", "Moderate Parkinson",
+                                              "Severe Parkinson"]
+    # A high UPDRS score the shortcut never saw: the evaluation counts the change
+    report = evaluate(np.array([0.05, 0.05, 0.97]), np.array([1.0, 20.0, 1.0]), np.array([1.0, 1.0, 1.0]),
+                      lows=[0.1], highs=[0.95])
+    assert report[0]["skipped"] == 3
+    assert report[0]["changed"] == 1
+    assert report[0]["transitions"] == {"Moderate Parkinson -> Healthy": 1}
+
+
+@pytest.mark.parametrize("proba, stages", [(0.03, ("classification",)), (0.5, ("classification", "regression"))])
+def test_skip_runs_the_updrs_models_only_for_unclear_cases(monkeypatch, proba, stages):
+    monkeypatch.setattr(pipeline, "predict_probability", lambda df, models=None: np.array([proba]))
+    result = pipeline.run_pipeline(AUDIO, 65, 0, 10.0, cascade="skip")
+    assert result.stages == stages
+    assert (result.motor_updrs is None) == (stages == ("classification",))
+    if result.motor_updrs is None:
+        assert result.status == "Healthy"
@@ -0,0 +1,25 @@
+import numpy as np
+
+from inference.batch import predict_sklearn
+from inference.compiled import PARITY_TOLERANCE, CompiledPipeline, check_parity, probe_rows
+from utils.load_models import registry
+
+
+def test_compiled_pipeline_matches_sklearn():
+    registry.load_all()
+    assert check_parity(CompiledPipeline(), predict_sklearn) <= PARITY_TOLERANCE
+
+
+def test_compiled_forests_branch_like_sklearn_at_every_threshold():
+    registry.load_all()
+    models = registry.snapshot()
+    pipeline = CompiledPipeline(models)
+    clf_df, reg_df = probe_rows(pipeline, models)
+    assert len(clf_df) > 1000  # random rows plus three per split
+
+    ours = pipeline.predict(clf_df, reg_df)
+    theirs = predict_sklearn(clf_df, reg_df, models)
+    # Same leaves everywhere: predict_proba is identical, regressors differ only in summation order
+    np.testing.assert_array_equal(np.asarray(ours[0]), np.asarray(theirs[0]))
+    for a, b in zip(ours[1:], theirs[1:]):
+        np.testing.assert_allclose(np.asarray(a), np.asarray(b), rtol=0, atol=1e-9)
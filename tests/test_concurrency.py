@@ -0,0 +1,23 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _post(client, audio_bytes, fields):
+    data = dict(fields, audio=(io.BytesIO(audio_bytes), "audio.wav"))
+    response = client.post("/analyze", data=data, content_type="multipart/form-data",
+                           headers={"Cache-Control": "no-cache"})
+    assert response.status_code == 200
+    assert response.headers["X-Result-Cache"] == "MISS"
+    return response.get_json()
+
+
+def test_concurrent_requests_get_their_own_results(client, audio_bytes):
+    # test_time is echoed back and age/sex change the UPDRS model, so crossed results show
+    inputs = [{"age": str(40 + 15 * i), "sex": "male" if i % 2 else "female", "test_time": f"{10 + i:.2f}"}
+              for i in range(3)]
+    expected = [_post(client, audio_bytes, fields) for fields in inputs]
+    assert len({(result["test_time"], result["motor_updrs"]) for result in expected}) == len(inputs)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        responses = list(pool.map(lambda fields: _post(client, audio_bytes, fields), inputs * 2))
+    assert responses == expected * 2
@@ -0,0 +1,9 @@
+from inference.compiled import PARITY_TOLERANCE
+from tools.export_models import check, export
+
+
+def test_export_matches_sklearn(tmp_path):
+    manifest = export(str(tmp_path))
+    assert all((tmp_path / entry["file"]).exists()
+               for entry in (*manifest["models"].values(), *manifest["scalers"].values()))
+    assert check(str(tmp_path)) <= PARITY_TOLERANCE
@@ -0,0 +1,51 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from conftest import AUDIO, ROOT
+from tools.extract_corpus import PROGRESS, load_corpus, read_progress
+
+
+def extract(corpus, out, *args):
+    """Runs the CLI the way a retraining job would; returns its stdout."""
+    run = subprocess.run([sys.executable, "-m", "tools.extract_corpus", str(corpus), "--out", str(out),
+                          "--workers", "1", "--report", "1000", *args],
+                         cwd=ROOT, capture_output=True, text=True, timeout=600)
+    assert run.returncode == 0, run.stdout + run.stderr
+    return run.stdout
+
+
+def test_extract_corpus_resumes_and_skips_finished_files(tmp_path):
+    corpus, out = tmp_path / "corpus", tmp_path / "out"
+    corpus.mkdir()
+    shutil.copy(AUDIO, corpus / "a.wav")
+    (corpus / "broken.wav").write_bytes(b"not audio")
+
+    assert "2 recordings to extract (0 already done)" in extract(corpus, out)
+    progress = read_progress(str(out))
+    assert progress[str(corpus / "a.wav")]["error"] is None
+    assert progress[str(corpus / "broken.wav")]["error"]
+    assert load_corpus(str(out))["path"].tolist() == [str(corpus / "a.wav")]
+
+    # Finished and failed files are both skipped; a changed file is extracted again
+    assert "0 recordings to extract (2 already done)" in extract(corpus, out)
+    os.utime(corpus / "a.wav", ns=(1, 1))
+    assert "1 recordings to extract (1 already done)" in extract(corpus, out)
+    assert "1 recordings to extract (1 already done)" in extract(corpus, out, "--retry-errors")
+
+    with open(out / PROGRESS) as f:
+        records = [json.loads(line) for line in f]
+    assert [os.path.basename(r["path"]) for r in records] == ["a.wav", "broken.wav", "a.wav", "broken.wav"]
+    assert len(load_corpus(str(out))) == 1  # latest row per file
+
+
+def test_extract_corpus_refuses_to_resume_with_other_settings(tmp_path):
+    corpus, out = tmp_path / "corpus", tmp_path / "out"
+    corpus.mkdir()
+    extract(corpus, out)
+    run = subprocess.run([sys.executable, "-m", "tools.extract_corpus", str(corpus), "--out", str(out),
+                          "--columns", "all"], cwd=ROOT, capture_output=True, text=True, timeout=600)
+    assert run.returncode == 1
+    assert "different settings (columns)" in run.stdout
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from utils.feature_store import FeatureStore, feature_row
+
+
+def test_appended_rows_are_written_in_batches_and_grow_the_schema(tmp_path):
+    store = FeatureStore(str(tmp_path / "features.db"), batch_size=2, flush_interval=60.0)
+    assert store.scan().empty  # nothing written yet: no file, no error
+
+    store.append({"request_id": "a", "HNR": 20.5})
+    store.append({"request_id": "b", "HNR": 18.0, "status": "Healthy"})
+    store.append({"request_id": "c", "HNR": 21.0, "stages": 1})
+    store.flush()
+
+    rows = store.scan()
+    assert rows["request_id"].tolist() == ["a", "b", "c"]
+    assert rows["status"].isna().tolist() == [True, False, True]  # column added by the second row
+    assert rows["created_at"].notna().all()
+
+    # Projection, unknown columns as NULL, and paging
+    assert store.scan(["HNR", "never_written"]).columns.tolist() == ["id", "HNR", "never_written"]
+    assert store.scan(["never_written"])["never_written"].isna().all()
+    first = store.scan(limit=1)
+    assert store.scan(after_id=int(first["id"].iloc[0]))["request_id"].tolist() == ["b", "c"]
+    assert store.scan(since=float(rows["created_at"].max()) + 1).empty
+    store.close()
+
+    # A new store on the same file (another worker) keeps appending to the same table
+    other = FeatureStore(str(tmp_path / "features.db"))
+    other.append({"request_id": "d", "PPE": 0.2})
+    other.flush()
+    assert other.scan(["request_id", "PPE"])["request_id"].tolist() == ["a", "b", "c", "d"]
+    other.close()
+
+
+def test_feature_row_flattens_one_recording():
+    classification_df = pd.DataFrame([{"NHR": np.float64(0.01)}, {"NHR": np.float64(0.02)}])
+    regression_df = pd.DataFrame([{"age": 60, "HNR": 21.0}, {"age": 70, "HNR": 19.0}])
+    predictions = {"probability": np.array([0.2, 0.97]), "motor_updrs": np.array([None, None]),
+                   "total_updrs": np.array([None, None]), "status": np.array(["Healthy", "Severe Parkinson"])}
+
+    row = feature_row("r1", classification_df, regression_df, predictions, index=1, stages="classification")
+    assert row == {"request_id": "r1", "age": 70, "HNR": 19.0, "NHR": 0.02, "probability": 0.97,
+                   "motor_updrs": None, "total_updrs": None, "status": "Severe Parkinson",
+                   "stages": "classification"}
+    assert all(not isinstance(value, np.generic) for value in row.values())
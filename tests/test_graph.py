@@ -0,0 +1,52 @@
+import pytest
+
+import constants
+import feature_extractors.graph as graph
+from conftest import AUDIO
+from feature_extractors.analysis import get_analysis
+from feature_extractors.graph import compute, plan, required_columns
+
+
+def test_plan_orders_dependencies_first_and_skips_known_nodes():
+    order = plan(["NHR", "Jitter:RAP"])
+    assert order == ["sound", "harmonicity", "HNR", "NHR", "pulses", "times", "jitter", "Jitter:RAP"]
+    # Inputs are never planned; nodes computed elsewhere are not expanded
+    assert plan(["age", "PPE"], known={"Jitter(Abs)", "Shimmer:APQ5"}) == ["PPE"]
+    with pytest.raises(ValueError, match="No extractor for feature 'Nope'"):
+        plan(["NHR", "Nope"])
+
+
+def test_required_columns_follow_the_loaded_models(monkeypatch):
+    declared = {
+        constants.MOTOR_MODEL_AGE: ["age", "test_time", "HNR"],
+        constants.TOTAL_MODEL_AGE: ["age", "PPE"],
+        constants.MOTOR_MODEL_WITHOUT_AGE: None,  # not loaded
+        constants.TOTAL_MODEL_WITHOUT_AGE: None,
+    }
+    monkeypatch.setattr(graph, "_required", {})
+    monkeypatch.setattr(graph, "model_columns", lambda name: declared[name])
+    assert required_columns("regression") == ["age", "test_time", "HNR", "PPE"]
+
+    # Removing a model shrinks the plan: PPE and the pulse analysis behind it go too
+    declared[constants.TOTAL_MODEL_AGE] = None
+    monkeypatch.setattr(graph, "_required", {})
+    columns = required_columns("regression")
+    assert columns == ["age", "test_time", "HNR"]
+    assert "pulses" not in plan(columns) and "pitch" not in plan(columns)
+
+    # With no model declaring names, the historical columns are extracted
+    declared[constants.MOTOR_MODEL_AGE] = None
+    monkeypatch.setattr(graph, "_required", {})
+    assert required_columns("regression") == graph.DEFAULT_COLUMNS["regression"]
+
+
+def test_compute_runs_only_the_planned_nodes(monkeypatch):
+    ran = []
+    for name in list(graph.FEATURES):
+        node = graph.FEATURES[name]
+        monkeypatch.setitem(graph.FEATURES, name, graph.Feature(
+            node.name, node.deps, lambda a, v, node=node: ran.append(node.name) or node.compute(a, v)))
+
+    df = compute(get_analysis(AUDIO), ["age", "HNR"], {"age": 70})
+    assert list(df.columns) == ["age", "HNR"] and df["age"].iloc[0] == 70
+    assert ran == ["sound", "harmonicity", "HNR"]
@@ -0,0 +1,7 @@
+from tools.import_budget import DEFAULT_BUDGET_SECONDS, DEFAULT_FORBIDDEN, measure
+
+
+def test_app_imports_within_budget():
+    seconds, modules, _ = min((measure() for _ in range(3)), key=lambda run: run[0])
+    assert not [name for name in DEFAULT_FORBIDDEN if name in modules]
+    assert seconds <= DEFAULT_BUDGET_SECONDS
@@ -0,0 +1,22 @@
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from utils.jobs import JobQueue
+
+
+class _BrokenPool:
+    def submit(self, fn, *args):
+        raise BrokenProcessPool("a worker died")
+
+
+def test_refused_job_is_dropped_and_releases_its_slot():
+    queue = JobQueue(workers=1, depth=1)
+    queue._executor = _BrokenPool()
+    released = []
+
+    with pytest.raises(BrokenProcessPool):
+        queue.submit(print, on_done=lambda: released.append(True))
+    assert released == [True]
+    assert queue.pending() == 0
+    assert queue._executor is None  # the next job starts a fresh pool
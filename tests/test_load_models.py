@@ -0,0 +1,55 @@
+import os
+import pickle
+
+import pytest
+
+from utils.load_models import ModelRegistry
+
+
+def _write(path, value, mtime):
+    with open(path, "wb") as f:
+        pickle.dump(value, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_snapshot_keeps_its_model_set_across_a_reload(tmp_path):
+    _write(tmp_path / "scaler.pkl", {"scaler": 1}, 1000)
+    _write(tmp_path / "model.pkl", {"model": 1}, 1000)
+    registry = ModelRegistry(str(tmp_path))
+    snapshot = registry.snapshot()
+
+    _write(tmp_path / "scaler.pkl", {"scaler": 2}, 2000)
+    _write(tmp_path / "model.pkl", {"model": 2}, 2000)
+    assert registry.load_all()
+
+    assert (snapshot.get("scaler.pkl"), snapshot.get("model.pkl")) == ({"scaler": 1}, {"model": 1})
+    assert (registry.get("scaler.pkl"), registry.get("model.pkl")) == ({"scaler": 2}, {"model": 2})
+    assert snapshot.generation + 1 == registry.generation == registry.snapshot().generation
+    assert snapshot.version() != registry.version()
+
+
+def test_missing_models_are_not_rescanned_on_every_request(tmp_path, monkeypatch):
+    registry = ModelRegistry(str(tmp_path), reload_interval=3600)
+    scans = []
+    load_all = registry.load_all
+    monkeypatch.setattr(registry, "load_all", lambda: scans.append(1) or load_all())
+
+    assert registry.snapshot().versions() == {}
+    _write(tmp_path / "model.pkl", {"model": 1}, 1000)
+    assert registry.snapshot().versions() == {}
+    with pytest.raises(FileNotFoundError):
+        registry.get("model.pkl")
+    assert len(scans) == 1  # the first use; the empty result is kept
+
+    # The watcher (or an explicit load) publishes the new file
+    load_all()
+    assert registry.get("model.pkl") == {"model": 1}
+    with pytest.raises(FileNotFoundError):
+        registry.get("other.pkl")
+    assert len(scans) == 1
+
+    # Without a watcher, a missing model is looked for again once the interval has passed
+    registry.reload_interval = 0
+    _write(tmp_path / "other.pkl", {"other": 1}, 1000)
+    assert registry.get("other.pkl") == {"other": 1}
+    assert len(scans) == 2
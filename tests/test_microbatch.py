@@ -0,0 +1,67 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from inference.microbatch import MicroBatcher
+from utils import metrics
+
+
+def doubled(frame, models):
+    return frame["x"].to_numpy() * 2, frame["x"].to_numpy() + models["offset"]
+
+
+def test_concurrent_calls_share_one_model_call_and_get_their_own_rows():
+    calls = []
+    batcher = MicroBatcher("test", lambda frame, models: calls.append(len(frame)) or doubled(frame, models),
+                           window_ms=200, max_rows=64)
+    models = {"offset": 100}
+    start = threading.Barrier(8)
+
+    def caller(i):
+        start.wait()
+        return batcher(pd.DataFrame({"x": [i, i + 0.5]}), models)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(caller, range(8)))
+    for i, (twice, shifted) in enumerate(results):
+        assert twice.tolist() == [2 * i, 2 * i + 1]
+        assert shifted.tolist() == [i + 100, i + 100.5]
+    assert sum(calls) == 16 and len(calls) < 8
+
+
+def test_batches_never_mix_model_snapshots_and_share_failures():
+    batcher = MicroBatcher("test", doubled, window_ms=200)
+    old = batcher.submit(pd.DataFrame({"x": [1]}), {"offset": 0})
+    new = batcher.submit(pd.DataFrame({"x": [1]}), {"offset": 10})  # same window, hot-swapped models
+    assert old.result()[1].tolist() == [1] and new.result()[1].tolist() == [11]
+
+    failing = MicroBatcher("test", lambda frame, models: 1 / 0, window_ms=50)
+    models = {"offset": 0}
+    futures = [failing.submit(pd.DataFrame({"x": [i]}), models) for i in range(3)]
+    for future in futures:
+        with pytest.raises(ZeroDivisionError):
+            future.result()
+
+
+def test_batched_stages_reach_each_callers_timings():
+    def predict(frame, models):
+        with metrics.span("predict"):
+            time.sleep(0.02)
+            return frame["x"].to_numpy()
+
+    batcher = MicroBatcher("test", predict, window_ms=50)
+    start = threading.Barrier(3)
+
+    def caller(i):
+        metrics.start_timings()
+        start.wait()
+        batcher(pd.DataFrame({"x": [i]}), {"offset": 0})
+        return metrics.collected_timings()
+
+    with ThreadPoolExecutor(3) as pool:
+        for timings in pool.map(caller, range(3)):
+            assert timings["predict"] >= 0.02
+            assert timings["batch_wait"] >= 0
@@ -0,0 +1,11 @@
+import parselmouth
+from conftest import AUDIO
+from feature_extractors.perturbation import PRAAT_TOLERANCE, compare_with_praat
+
+
+def test_jitter_and_shimmer_match_praat():
+    sound = parselmouth.Sound(AUDIO)
+    pulses = parselmouth.praat.call(sound, "To PointProcess (periodic, cc)", 75, 500)
+    report = compare_with_praat(sound, pulses)
+    off = {name: (ours, praat) for name, (ours, praat, _, ok) in report.items() if not ok}
+    assert not off, f"beyond PRAAT_TOLERANCE ({PRAAT_TOLERANCE:.0e}): {off}"
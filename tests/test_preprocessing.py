@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import preprocessing.audio as audio
+from conftest import AUDIO
+from preprocessing.audio import AudioQualityError, prepare_analysis, preprocessing_signature
+from utils.audio_io import decode_audio
+
+
+@pytest.fixture(scope="module")
+def decoded():
+    with open(AUDIO, "rb") as f:
+        return decode_audio(f.read())
+
+
+def test_preprocessing_off_analyzes_the_upload(decoded, monkeypatch):
+    monkeypatch.setattr(audio, "PREPROCESS_AUDIO", False)
+    samples, sample_rate = decoded
+    analysis = prepare_analysis(decoded)
+    assert analysis.sound.sampling_frequency == sample_rate
+    assert analysis.sound.values.shape[-1] == samples.shape[-1]
+    assert preprocessing_signature() == "raw"
+
+
+def test_preprocessing_trims_and_resamples(decoded, monkeypatch):
+    monkeypatch.setattr(audio, "PREPROCESS_AUDIO", True)
+    samples, sample_rate = decoded
+    analysis = prepare_analysis(decoded)
+    assert analysis.sound.sampling_frequency == audio.ANALYSIS_SAMPLE_RATE < sample_rate
+    assert analysis.sound.get_total_duration() < samples.shape[-1] / sample_rate
+    # test_time and the waveform statistics still describe the upload
+    assert analysis.duration == round(samples.shape[-1] / sample_rate, 2)
+    assert analysis.signal.size == samples.shape[-1]
+    assert preprocessing_signature() != "raw"
+
+
+def test_preprocessing_rejects_recordings_without_enough_voice(monkeypatch):
+    sample_rate = 44100
+    rng = np.random.default_rng(0)
+    silence = rng.normal(scale=1e-5, size=3 * sample_rate)
+    tone = 0.3 * np.sin(2 * np.pi * 150 * np.arange(sample_rate // 2) / sample_rate)
+    samples = np.concatenate([silence, tone, silence])[np.newaxis, :]
+
+    monkeypatch.setattr(audio, "PREPROCESS_AUDIO", False)
+    prepare_analysis((samples, sample_rate))
+    monkeypatch.setattr(audio, "PREPROCESS_AUDIO", True)
+    with pytest.raises(AudioQualityError, match="of voice found"):
+        prepare_analysis((samples, sample_rate))
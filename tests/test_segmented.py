@@ -0,0 +1,12 @@
+import feature_extractors.segmented as segmented
+from conftest import AUDIO
+
+
+def test_segmented_analysis_matches_full_file(monkeypatch, capsys):
+    # Seven segments of the 18.4 s test recording
+    monkeypatch.setattr(segmented, "SEGMENT_SECONDS", 3.0)
+    monkeypatch.setattr(segmented, "MIN_SEGMENT_SECONDS", 2.0)
+    report = segmented.compare_with_full(AUDIO)
+    assert "in 7 segments" in capsys.readouterr().out
+    off = {column: diff for column, (_, _, diff, ok) in report.items() if not ok}
+    assert not off, f"beyond SEGMENT_TOLERANCE ({segmented.SEGMENT_TOLERANCE:.1%}): {off}"
@@ -0,0 +1,45 @@
+import io
+import os
+import numpy as np
+import soundfile as sf
+import app as app_module
+from utils.spool import spool
+
+
+def _wav(seconds: float) -> bytes:
+    samples, sample_rate = sf.read("audioTest.wav", dtype="int16")
+    out = io.BytesIO()
+    sf.write(out, samples[:int(seconds * sample_rate)].mean(axis=1).astype(np.int16), sample_rate,
+             format="WAV", subtype="PCM_16")
+    return out.getvalue()
+
+
+def _post_and_watch(client, monkeypatch, data):
+    """Posts to /analyze; returns the spool files seen during the analysis and after the request."""
+    seen = []
+    analyze_audio = app_module.analyze_audio
+
+    def watching(*args, **kwargs):
+        seen.append(sorted(os.listdir(spool.directory)))
+        return analyze_audio(*args, **kwargs)
+
+    monkeypatch.setattr(app_module, "analyze_audio", watching)
+    response = client.post("/analyze", data={"audio": (io.BytesIO(data), "a.wav"), "age": "60", "sex": "0"})
+    assert response.status_code == 200, response.get_json()
+    return seen, sorted(os.listdir(spool.directory))
+
+
+def test_small_upload_stays_in_memory(client, monkeypatch):
+    data = _wav(4)
+    assert len(data) < spool.memory_bytes
+    during, after = _post_and_watch(client, monkeypatch, data)
+    assert during == [[]]
+    assert after == []
+
+
+def test_large_upload_is_removed_after_the_request(client, monkeypatch, audio_bytes):
+    assert len(audio_bytes) > spool.memory_bytes
+    during, after = _post_and_watch(client, monkeypatch, audio_bytes)
+    assert len(during[0]) == 1
+    assert after == []
+    assert spool.in_use() == 0
@@ -0,0 +1,21 @@
+import numpy as np
+
+
+def test_closing_a_stream_without_voice_is_unprocessable(client):
+    opened = client.post("/stream", data={"sample_rate": "16000"})
+    assert opened.status_code == 201
+    silence = np.zeros(3 * 16000, dtype="<f4").tobytes()
+    closed = client.post(f"{opened.headers['Location']}/close", data=silence)
+    assert closed.status_code == 422
+    assert "voiced audio" in closed.get_json()["error"]
+
+
+def test_frames_must_be_whole_samples(client):
+    opened = client.post("/stream", data={"sample_rate": "16000", "format": "int16"})
+    location = opened.headers["Location"]
+    assert client.post(location, data=b"\x00\x01\x02").status_code == 400
+    assert client.post(f"{location}/close", data=b"\x00").status_code == 400
+    # The session survives both, so the client can resend whole samples
+    fed = client.post(location, data=np.zeros(16000, dtype="<i2").tobytes())
+    assert fed.status_code == 200
+    assert fed.get_json()["preprocessed"] is False
@@ -0,0 +1,45 @@
+import io
+
+import numpy as np
+import pytest
+
+import preprocessing.audio as audio
+import preprocessing.windowed as windowed
+from conftest import AUDIO
+from feature_extractors.classification_features import extract_classification_features
+from feature_extractors.regressors_features import extract_regression_features
+from preprocessing.audio import AnalysisMemoryError, prepare_analysis
+from utils.audio_io import decode_audio
+
+
+def _features(analysis):
+    classification = extract_classification_features(analysis).iloc[0]
+    regression = extract_regression_features(analysis, 60, 1, 18.36).iloc[0]
+    return np.r_[classification.values, regression.values].astype(float)
+
+
+@pytest.mark.parametrize("preprocess", [False, True])
+def test_windowed_analysis_matches_whole_file(monkeypatch, preprocess):
+    monkeypatch.setattr(audio, "PREPROCESS_AUDIO", preprocess)
+    monkeypatch.setattr(windowed, "PREPROCESS_AUDIO", preprocess)
+    monkeypatch.setattr(windowed, "WINDOWED_ANALYSIS", "0")
+    whole = _features(prepare_analysis(AUDIO))
+    monkeypatch.setattr(windowed, "WINDOWED_ANALYSIS", "1")
+    analysis = prepare_analysis(AUDIO)
+    assert isinstance(analysis, windowed.WindowedAnalysis)
+    np.testing.assert_allclose(_features(analysis), whole, rtol=1e-5)
+
+
+def test_memory_ceiling_is_enforced(monkeypatch, client, audio_bytes):
+    # audioTest.wav needs ~18 MB in memory and ~10 MB in 10 s windows
+    monkeypatch.setattr(windowed, "ANALYSIS_MEMORY_MB", 15)
+    assert isinstance(prepare_analysis(AUDIO), windowed.WindowedAnalysis)
+    with pytest.raises(AnalysisMemoryError):
+        prepare_analysis(decode_audio(audio_bytes))
+    response = client.post("/jobs", data={"audio": (io.BytesIO(audio_bytes), "audio.wav")},
+                           content_type="multipart/form-data")
+    assert response.status_code == 413
+
+    monkeypatch.setattr(windowed, "ANALYSIS_MEMORY_MB", 5)
+    with pytest.raises(AnalysisMemoryError):
+        prepare_analysis(AUDIO)
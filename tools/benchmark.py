@@ -0,0 +1,274 @@
+"""
+Per-stage micro-benchmarks on deterministic synthetic voice.
+
+Each stage is timed on its own (decode, preprocessing, both extractors,
+the three scalers, model loading, the five predict calls, the batched
+prediction and the end-to-end pipeline) for every requested duration.
+Timings are the min/median over repeats; peak memory is measured in a
+separate traced run (tracemalloc: Python and NumPy allocations; Praat's
+own C++ buffers are not included, see max_rss_kb for the process peak).
+
+    python -m tools.benchmark --out bench/base.json
+    python -m tools.benchmark --durations 1 10 --repeat 5 --out bench/new.json
+    python -m tools.benchmark --compare bench/base.json bench/new.json --threshold 0.15
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+DEFAULT_DURATIONS = [1, 10, 60, 600]
+SAMPLE_RATE = 44100
+# Total seconds of repeats per stage; long signals get fewer repeats
+REPEAT_BUDGET_SECONDS = 60
+
+
+def synthetic_voice(duration: float, sample_rate: int = SAMPLE_RATE, f0: float = 120.0,
+                    jitter: float = 0.005, shimmer: float = 0.04, noise: float = 0.05, seed: int = 0):
+    """
+    Deterministic sustained /a/: a glottal pulse train whose periods and
+    amplitudes vary by the given relative jitter/shimmer (Gaussian), shaped by
+    three formant resonators, plus noise at the given fraction of the signal's
+    standard deviation. Returns float32 mono samples.
+    """
+    from scipy.signal import lfilter
+
+    rng = np.random.default_rng(seed)
+    n = int(duration * sample_rate)
+    count = int(duration * f0 * 1.2) + 2
+    periods = (1.0 / f0) * (1 + jitter * rng.standard_normal(count))
+    amplitudes = 1 + shimmer * rng.standard_normal(count)
+    onsets = np.cumsum(periods)
+    keep = onsets < duration
+    excitation = np.zeros(n)
+    np.add.at(excitation, (onsets[keep] * sample_rate).astype(int), amplitudes[keep])
+
+    # Rosenberg-like glottal pulse smoothing, then vowel formants
+    pulse = np.hanning(int(0.004 * sample_rate))
+    signal = np.convolve(excitation, pulse, mode="same")
+    for formant, bandwidth in ((700, 130), (1220, 70), (2600, 160)):
+        r = np.exp(-np.pi * bandwidth / sample_rate)
+        theta = 2 * np.pi * formant / sample_rate
+        signal = lfilter([1 - r], [1, -2 * r * np.cos(theta), r * r], signal)
+    signal += noise * np.std(signal) * rng.standard_normal(n)
+    signal *= 0.5 / np.max(np.abs(signal))
+    return signal.astype(np.float32)
+
+
+def wav_bytes(samples, sample_rate: int = SAMPLE_RATE) -> bytes:
+    import soundfile as sf
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silences pipeline logging and library warnings inside timed calls."""
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield
+
+
+def _time(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        with _quiet():
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _peak_kb(fn):
+    with _quiet():
+        tracemalloc.start()
+        try:
+            fn()
+            return tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+
+def _stages(duration):
+    """
+    (name, callable) pairs for one duration. Extractors get a fresh analysis each
+    call, so their timings include the Praat objects they need (cold cache).
+    """
+    import constants
+    from utils.audio_io import decode_audio
+    from utils.load_models import ModelRegistry, load_model, registry
+    from preprocessing.audio import prepare_analysis
+    from preprocessing.scaler import scale_features
+    from feature_extractors.classification_features import extract_classification_features
+    from feature_extractors.regressors_features import extract_regression_features
+    from inference.batch import predict_batch
+    from inference.pipeline import analyze_audio
+
+    data = wav_bytes(synthetic_voice(duration))
+    with _quiet():
+        decoded = decode_audio(data)
+    fresh = lambda: prepare_analysis(decoded)
+
+    with _quiet():
+        registry.load_all()
+        analysis = fresh()
+        classification_df = extract_classification_features(analysis)
+        regression_df = extract_regression_features(analysis, 65, 1, duration)
+
+    stages = [
+        ("decode", lambda: decode_audio(data)),
+        ("prepare_analysis", fresh),
+        ("extract_classification_features", lambda: extract_classification_features(fresh())),
+        ("extract_regression_features", lambda: extract_regression_features(fresh(), 65, 1, duration)),
+        ("scale_features[classification]",
+         lambda: scale_features(classification_df, constants.CLASSIFICATION_SCALER)),
+        ("scale_features[regression_age]",
+         lambda: scale_features(regression_df, constants.REGRESSION_SCALER_AGE)),
+        ("scale_features[regression_without_age]",
+         lambda: scale_features(regression_df.drop(columns=["age"]), constants.REGRESSION_SCALER_WITHOUT_AGE)),
+        ("load_models[cold]", lambda: ModelRegistry(registry.models_dir).load_all()),
+    ]
+
+    models = [
+        (constants.CLASSIFICATION_MODEL, constants.CLASSIFICATION_SCALER, classification_df),
+        (constants.MOTOR_MODEL_AGE, constants.REGRESSION_SCALER_AGE, regression_df),
+        (constants.MOTOR_MODEL_WITHOUT_AGE, constants.REGRESSION_SCALER_WITHOUT_AGE, regression_df.drop(columns=["age"])),
+        (constants.TOTAL_MODEL_AGE, constants.REGRESSION_SCALER_AGE, regression_df),
+        (constants.TOTAL_MODEL_WITHOUT_AGE, constants.REGRESSION_SCALER_WITHOUT_AGE, regression_df.drop(columns=["age"])),
+    ]
+    snapshot = registry.snapshot()
+    available = [m for m in models if m[0] in snapshot]
+    for name, scaler, frame in available:
+        with _quiet():
+            scaled = scale_features(frame, scaler)
+        stages.append((f"load_model[{name}]", lambda name=name: load_model(name)))
+        stages.append((f"predict[{name}]", lambda name=name, scaled=scaled: load_model(name).predict(scaled)))
+
+    if len(available) == len(models):
+        stages.append(("predict_batch", lambda: predict_batch(classification_df, regression_df)))
+        stages.append(("run_pipeline", lambda: analyze_audio(decoded, 65, 1)))
+    else:
+        missing = sorted({m[0] for m in models} - {m[0] for m in available})
+        print(f"⚠️ Skipping predict_batch/run_pipeline; missing models: {', '.join(missing)}")
+    return stages
+
+
+def run(durations, repeat):
+    results = {}
+    for duration in durations:
+        repeats = max(1, min(repeat, int(REPEAT_BUDGET_SECONDS // max(duration, 1))))
+        print(f"⏱️ {duration}s synthetic voice, {repeats} repeat(s) per stage")
+        stage_results = {}
+        for name, fn in _stages(duration):
+            if repeats > 1:
+                _time(fn, 1)  # warm-up
+            timings = _time(fn, repeats)
+            stage_results[name] = {
+                "min_ms": round(min(timings), 4),
+                "median_ms": round(statistics.median(timings), 4),
+                "repeats": repeats,
+                "peak_kb": round(_peak_kb(fn), 1),
+            }
+            print(f"   {name:45s} {stage_results[name]['min_ms']:10.2f} ms  {stage_results[name]['peak_kb']:10.0f} KiB")
+        results[f"{duration}s"] = stage_results
+    return results
+
+
+def _versions():
+    versions = {"python": platform.python_version()}
+    for module in ("numpy", "pandas", "sklearn", "parselmouth", "scipy", "soundfile"):
+        try:
+            versions[module] = __import__(module).__version__
+        except Exception:
+            versions[module] = None
+    return versions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(old_path, new_path, threshold, memory_threshold, min_delta_ms=1.0, min_delta_kb=64.0):
+    """
+    Prints per-stage ratios new/old (min time and peak memory); returns the number of regressions.
+    A stage regresses when it is slower by more than threshold and by more than min_delta_ms
+    (or uses more memory by memory_threshold and min_delta_kb), so sub-millisecond jitter is ignored.
+    """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    regressions = 0
+    for duration, stages in new["results"].items():
+        for name, current in stages.items():
+            baseline = old["results"].get(duration, {}).get(name)
+            if baseline is None:
+                continue
+            ratio = current["min_ms"] / baseline["min_ms"] if baseline["min_ms"] else 1.0
+            memory_ratio = current["peak_kb"] / baseline["peak_kb"] if baseline["peak_kb"] else 1.0
+            slower = ratio > 1 + threshold and current["min_ms"] - baseline["min_ms"] > min_delta_ms
+            heavier = memory_ratio > 1 + memory_threshold and current["peak_kb"] - baseline["peak_kb"] > min_delta_kb
+            regressions += slower or heavier
+            faster = ratio < 1 - threshold and baseline["min_ms"] - current["min_ms"] > min_delta_ms
+            mark = "❌" if slower or heavier else ("🚀" if faster else "✅")
+            print(f"{mark} {duration:>5s} {name:45s} {baseline['min_ms']:10.2f} → {current['min_ms']:10.2f} ms "
+                  f"(x{ratio:.2f})  mem x{memory_ratio:.2f}")
+
+    print(f"{'❌' if regressions else '✅'} {regressions} regression(s) "
+          f"(time > +{threshold:.0%}, memory > +{memory_threshold:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=DEFAULT_DURATIONS)
+    parser.add_argument("--repeat", type=int, default=5, help="Maximum repeats per stage")
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Relative slowdown flagged as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Relative peak-memory growth flagged")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold, args.memory_threshold, args.min_delta_ms) else 0)
+
+    # Keep benchmark rows out of the real feature store
+    os.environ.setdefault("FEATURE_STORE_PATH", os.path.join(tempfile.mkdtemp(), "features.db"))
+    durations = [int(d) if float(d).is_integer() else d for d in args.durations]
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": _versions(),
+        "results": run(durations, args.repeat),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results saved to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
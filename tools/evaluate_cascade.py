@@ -0,0 +1,125 @@
+"""
+Offline evaluation of the confidence cascade (CASCADE_MODE) on stored features.
+
+Replays every fully analyzed recording in the feature store through the
+current models, then reports for each (low, high) threshold pair how many
+recordings the cascade would decide from the classifier alone (UPDRS models
+skipped) and how often that changes the final status, with the transitions.
+
+    python -m tools.evaluate_cascade
+    python -m tools.evaluate_cascade --low 0.05 0.1 0.2 --high 0.9 0.95 --since 1735689600
+    python -m tools.evaluate_cascade --stored --out cascade.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+from collections import Counter
+import numpy as np
+
+
+def load_rows(store, columns, since=None):
+    """
+    Stored recordings with every one of `columns` present (rows the cascade
+    skipped have no UPDRS features or scores). Returns (rows, dropped).
+    """
+    rows = store.scan(since=since)
+    if rows.empty:
+        return rows, 0
+    for column in columns:
+        if column not in rows:
+            rows[column] = np.nan
+    complete = rows[columns].notna().all(axis=1)
+    return rows[complete].reset_index(drop=True), int((~complete).sum())
+
+
+def replay_columns():
+    """Feature columns the current models need."""
+    from feature_extractors.graph import required_columns
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        classification = required_columns("classification")
+        regression = required_columns("regression")
+    return classification, regression
+
+
+def replay(rows, classification_columns, regression_columns):
+    """(proba, motor, total) from the current models on the stored feature columns."""
+    from inference.batch import predict_probability, predict_updrs
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        proba = predict_probability(rows[classification_columns])
+        motor, total = predict_updrs(rows[regression_columns])
+    return proba, motor, total
+
+
+def evaluate(proba, motor, total, lows, highs):
+    """One report entry per threshold pair."""
+    from inference.batch import hybrid_status
+    from inference.cascade import decisive, cascade_status
+
+    full = hybrid_status(proba, motor, total)
+    shortcut = cascade_status(proba)
+    report = []
+    for low in lows:
+        for high in highs:
+            skipped = decisive(proba, low, high)
+            changed = skipped & (shortcut != full)
+            transitions = Counter(f"{a} -> {b}" for a, b in zip(full[changed], shortcut[changed]))
+            report.append({
+                "low": low,
+                "high": high,
+                "recordings": int(proba.size),
+                "skipped": int(skipped.sum()),
+                "skipped_rate": float(skipped.mean()) if proba.size else 0.0,
+                "changed": int(changed.sum()),
+                "changed_rate": float(changed.mean()) if proba.size else 0.0,
+                "transitions": dict(transitions.most_common()),
+            })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--low", type=float, nargs="+", default=[0.02, 0.05, 0.1, 0.2, 0.3])
+    parser.add_argument("--high", type=float, nargs="+", default=[0.9, 0.95, 0.99, 1.01],
+                        help="Thresholds above 1 disable the high side")
+    parser.add_argument("--since", type=float, default=None, help="Only recordings stored after this epoch time")
+    parser.add_argument("--stored", action="store_true",
+                        help="Use the stored model outputs instead of replaying through the current models")
+    parser.add_argument("--out", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    from utils.feature_store import feature_store
+    outputs = ["probability", "motor_updrs", "total_updrs"]
+    if not args.stored:
+        classification_columns, regression_columns = replay_columns()
+    columns = outputs if args.stored else classification_columns + regression_columns
+    rows, dropped = load_rows(feature_store, columns, args.since)
+    if rows.empty:
+        print(f"⚠️ No fully analyzed recordings in {feature_store.path}")
+        sys.exit(1)
+    print(f"📚 {len(rows)} recordings ({dropped} skipped by the cascade or missing features)")
+
+    if args.stored:
+        proba, motor, total = (rows[c].to_numpy(dtype=float) for c in outputs)
+    else:
+        proba, motor, total = replay(rows, classification_columns, regression_columns)
+
+    report = evaluate(np.asarray(proba), np.asarray(motor), np.asarray(total), args.low, args.high)
+    print(f"{'low':>6} {'high':>6} {'skipped':>14} {'status changed':>18}")
+    for entry in report:
+        print(f"{entry['low']:6.2f} {entry['high']:6.2f} "
+              f"{entry['skipped']:6d} ({entry['skipped_rate']:5.1%}) "
+              f"{entry['changed']:8d} ({entry['changed_rate']:6.2%})"
+              + (f"  {', '.join(f'{k}: {v}' for k, v in entry['transitions'].items())}" if entry["transitions"] else ""))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"recordings": len(rows), "dropped": dropped, "report": report}, f, indent=2)
+        print(f"✅ Report saved to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
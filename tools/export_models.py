@@ -0,0 +1,166 @@
+"""
+Exports the classifier, the UPDRS regressors and their scalers from models/
+to the sklearn-free serving format read by inference/exported.py
+(INFERENCE_MODE=exported).
+
+Each model is compiled with its scaler folded in (inference/compiled.py) and
+written as an uncompressed .npz of node or coefficient arrays; each scaler as
+its mean and scale. manifest.json, written last, lists the files, layouts,
+feature names and the hashes of the source pickles. Files are versioned by
+name, so a re-export never rewrites arrays a running worker has mapped.
+
+    python -m tools.export_models
+    python -m tools.export_models --out models/exported --check --stored 500
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import numpy as np
+import constants
+from inference.exported import EXPORT_DIR, FORMAT_VERSION, MANIFEST, ExportedPipeline
+
+
+def _artifact_name(path: str) -> str:
+    return os.path.basename(path)
+
+
+def _write_arrays(path: str, arrays: dict):
+    """Uncompressed .npz (so members can be memory-mapped), renamed into place."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+def export(out_dir: str = EXPORT_DIR) -> dict:
+    """Writes one export of the current models/ into out_dir and returns its manifest."""
+    import sklearn
+    from inference.compiled import CompiledPipeline, _scaler_params
+    from utils.load_models import registry
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        registry.load_all()
+        snapshot = registry.snapshot()  # every artifact below from the same model set
+        pipeline = CompiledPipeline(snapshot)
+    version = snapshot.version()
+    tag = version[:12]
+    os.makedirs(out_dir, exist_ok=True)
+
+    models = {}
+    for name, model in ((constants.CLASSIFICATION_MODEL, pipeline.classifier),
+                        (constants.MOTOR_MODEL_AGE, pipeline.motor_age),
+                        (constants.MOTOR_MODEL_WITHOUT_AGE, pipeline.motor_wo_age),
+                        (constants.TOTAL_MODEL_AGE, pipeline.total_age),
+                        (constants.TOTAL_MODEL_WITHOUT_AGE, pipeline.total_wo_age)):
+        file = f"{os.path.splitext(name)[0]}-{tag}.npz"
+        _write_arrays(os.path.join(out_dir, file), model.arrays())
+        scaler = _artifact_name(constants.MODEL_SCALERS[name])
+        entry = {"file": file, "kind": model.kind, "proba": bool(getattr(model, "proba", False)), "scaler": scaler,
+                 "features": _scaler_params(snapshot.get(scaler))[0]}
+        if model.kind == "forest":
+            entry["depth"] = model.depth
+        models[name] = entry
+
+    scalers = {}
+    for path in (constants.CLASSIFICATION_SCALER, constants.REGRESSION_SCALER_AGE,
+                 constants.REGRESSION_SCALER_WITHOUT_AGE):
+        name = _artifact_name(path)
+        features, mean, scale = _scaler_params(snapshot.get(name))
+        file = f"{os.path.splitext(name)[0]}-{tag}.npz"
+        _write_arrays(os.path.join(out_dir, file), {"mean": mean, "scale": scale})
+        scalers[name] = {"file": file, "kind": "scaler", "features": features}
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sklearn_version": sklearn.__version__,
+        "numpy_version": np.__version__,
+        "models_version": version,
+        "sources": snapshot.versions(),
+        "layouts": {"classification": pipeline.classification_layout,
+                    "regression": pipeline.regression_layout},
+        "models": models,
+        "scalers": scalers,
+    }
+    tmp = os.path.join(out_dir, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+
+    # Arrays of earlier exports; workers that still map them keep the open files alive
+    current = {entry["file"] for entry in (*models.values(), *scalers.values())}
+    for file in os.listdir(out_dir):
+        if file.endswith(".npz") and file not in current:
+            os.remove(os.path.join(out_dir, file))
+    return manifest
+
+
+def check(out_dir: str = EXPORT_DIR, stored: int = 0) -> float:
+    """
+    Largest absolute difference between the export and the sklearn originals:
+    predictions on probe_rows, random and at every split threshold (plus up to `stored`
+    recordings from the feature store) and the exported scaler transforms.
+    """
+    import pandas as pd
+    from inference.batch import predict_sklearn
+    from inference.compiled import check_parity
+    from utils.load_models import registry
+
+    exported = ExportedPipeline(out_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        diffs = {"probe rows": check_parity(exported, predict_sklearn)}
+
+        for name, scaler in exported.scalers.items():
+            reference = registry.get(name)
+            features = exported.manifest["scalers"][name]["features"]
+            probe = pd.DataFrame(scaler.mean + np.array([[0.0], [1.5], [-0.8]]) * scaler.scale, columns=features)
+            diffs[name] = float(np.max(np.abs(scaler.transform(probe.to_numpy()) - reference.transform(probe))))
+
+        if stored:
+            from utils.feature_store import feature_store
+            rows = feature_store.scan().tail(stored)
+            columns = list(dict.fromkeys(exported.classification_layout + exported.regression_layout))
+            rows = rows[rows.reindex(columns=columns).notna().all(axis=1)] if not rows.empty else rows
+            if not rows.empty:
+                clf_df = rows[exported.classification_layout].reset_index(drop=True)
+                reg_df = rows[exported.regression_layout].reset_index(drop=True)
+                ours = exported.predict(clf_df, reg_df)
+                theirs = predict_sklearn(clf_df, reg_df)
+                diffs[f"{len(rows)} stored rows"] = max(
+                    float(np.max(np.abs(np.asarray(a) - np.asarray(b)))) for a, b in zip(ours, theirs))
+
+    for name, diff in diffs.items():
+        print(f"   {name}: max diff {diff:.2e}")
+    return max(diffs.values())
+
+
+def main():
+    from inference.compiled import PARITY_TOLERANCE
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=EXPORT_DIR, help=f"Export directory (default {EXPORT_DIR})")
+    parser.add_argument("--check", action="store_true", help="Check parity against the sklearn models afterwards")
+    parser.add_argument("--stored", type=int, default=0,
+                        help="With --check, also compare on the latest N feature-store recordings")
+    args = parser.parse_args()
+
+    manifest = export(args.out)
+    size = sum(os.path.getsize(os.path.join(args.out, entry["file"]))
+               for entry in (*manifest["models"].values(), *manifest["scalers"].values()))
+    print(f"📦 Exported {len(manifest['models'])} models and {len(manifest['scalers'])} scalers "
+          f"to {args.out} ({size / 1e6:.1f} MB, version {manifest['models_version'][:12]})")
+
+    if args.check:
+        diff = check(args.out, args.stored)
+        if diff > PARITY_TOLERANCE:
+            print(f"❌ Parity check failed: max diff {diff:.2e} > {PARITY_TOLERANCE:.0e}")
+            sys.exit(1)
+        print(f"✅ Parity check passed (max diff {diff:.2e})")
+
+
+if __name__ == "__main__":
+    main()
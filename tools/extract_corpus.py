@@ -0,0 +1,283 @@
+"""
+Offline feature extraction over a corpus of recordings, for retraining.
+
+Walks a directory (every audio file below it) or reads a CSV manifest with a
+`path` column (relative to the manifest; optional age, sex and test_time
+columns, any other columns such as labels or subject ids are carried into the
+output). Recordings are analyzed in a process pool, dispatched in chunks, and
+the features of both models are written to numbered shards in --out (Parquet
+when pyarrow or fastparquet is installed, else CSV).
+
+Resumable: progress.jsonl lists every file whose row is in a written shard
+(or that failed), with its size and mtime. A killed run loses at most the rows
+not yet in a shard; rerunning the same command skips everything listed, and
+files changed since are extracted again. load_corpus() reads the shards back,
+keeping the latest row per file.
+
+    python -m tools.extract_corpus recordings/ --out data_storage/corpus
+    python -m tools.extract_corpus manifest.csv --workers 8 --chunksize 16 --columns all
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import pandas as pd
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3", ".m4a", ".webm", ".aiff", ".aif")
+PROGRESS = "progress.jsonl"
+RUN = "run.json"
+
+
+def shard_format() -> str:
+    """parquet when an engine is installed, else csv."""
+    for engine in ("pyarrow", "fastparquet"):
+        try:
+            __import__(engine)
+            return "parquet"
+        except ImportError:
+            continue
+    return "csv"
+
+
+def corpus_items(corpus: str) -> list:
+    """[{path, age, sex, test_time, meta}] for a directory or a CSV manifest."""
+    if os.path.isdir(corpus):
+        paths = []
+        for root, dirs, files in os.walk(corpus):
+            dirs.sort()
+            paths += [os.path.join(root, name) for name in sorted(files) if name.lower().endswith(AUDIO_EXTENSIONS)]
+        return [{"path": path, "age": None, "sex": None, "test_time": None, "meta": {}} for path in paths]
+
+    manifest = pd.read_csv(corpus)
+    if "path" not in manifest.columns:
+        raise ValueError(f"{corpus}: a manifest needs a 'path' column")
+    base = os.path.dirname(os.path.abspath(corpus))
+    items = []
+    for record in manifest.to_dict("records"):
+        given = {name: record.get(name) for name in ("age", "sex", "test_time")}
+        items.append({
+            "path": os.path.join(base, record["path"]),
+            **{name: None if pd.isna(value) else value for name, value in given.items()},
+            "meta": {k: v for k, v in record.items() if k not in ("path", "age", "sex", "test_time")},
+        })
+    return items
+
+
+def file_identity(path: str) -> list:
+    """[size, mtime_ns]; a file whose identity changed is extracted again."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_progress(out_dir: str) -> dict:
+    """path -> progress record of every finished (or failed) file."""
+    done = {}
+    try:
+        with open(os.path.join(out_dir, PROGRESS)) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line of a killed run
+                done[record["path"]] = record
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _quiet_worker():
+    """Pool initializer: the per-recording prints would flood the progress report."""
+    sys.stdout = open(os.devnull, "w")
+
+
+def _extract_chunk(items, columns):
+    """Worker: one row (or an error) per recording of a chunk."""
+    from preprocessing.audio import prepare_analysis
+    from feature_extractors.graph import compute
+
+    results = []
+    for item in items:
+        started = time.perf_counter()
+        try:
+            identity = file_identity(item["path"])
+            analysis = prepare_analysis(item["path"])
+            test_time = item["test_time"] if item["test_time"] is not None else analysis.duration
+            inputs = {"age": item["age"], "sex": item["sex"], "test_time": test_time}
+            row = compute(analysis, columns, inputs).iloc[0].to_dict()
+            row.update(item["meta"], path=item["path"], duration=analysis.duration,
+                       extract_ms=(time.perf_counter() - started) * 1000)
+            results.append((item["path"], identity, row, None))
+        except Exception as e:
+            identity = file_identity(item["path"]) if os.path.exists(item["path"]) else None
+            results.append((item["path"], identity, None, f"{type(e).__name__}: {' '.join(str(e).split())}"))
+    return results
+
+
+class ShardWriter:
+    """
+    Buffers rows and writes them as numbered shards (tmp file + rename), then
+    records their files in progress.jsonl, so progress never lists a row that
+    is not on disk.
+    """
+
+    def __init__(self, out_dir: str, fmt: str, shard_rows: int):
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.shard_rows = shard_rows
+        self.rows = []
+        self.records = []
+        self.index = len([name for name in os.listdir(out_dir) if name.startswith("part-")])
+
+    def add(self, path, identity, row, error):
+        record = {"path": path, "identity": identity, "error": error}
+        if row is not None:
+            self.rows.append(row)
+        self.records.append(record)
+        if len(self.rows) >= self.shard_rows:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            name = f"part-{self.index:05d}.{self.fmt}"
+            tmp = os.path.join(self.out_dir, name + ".tmp")
+            frame = pd.DataFrame(self.rows)
+            if self.fmt == "parquet":
+                frame.to_parquet(tmp, index=False)
+            else:
+                frame.to_csv(tmp, index=False)
+            os.replace(tmp, os.path.join(self.out_dir, name))
+            self.index += 1
+            for record in self.records:
+                record["shard"] = name
+        if self.records:
+            with open(os.path.join(self.out_dir, PROGRESS), "a") as f:
+                f.writelines(json.dumps(record) + "\n" for record in self.records)
+                f.flush()
+                os.fsync(f.fileno())
+        self.rows, self.records = [], []
+
+
+def load_corpus(out_dir: str) -> pd.DataFrame:
+    """Every shard of an extraction, one row per file (its latest extraction)."""
+    frames = []
+    for name in sorted(os.listdir(out_dir)):
+        path = os.path.join(out_dir, name)
+        if name.startswith("part-") and name.endswith(".parquet"):
+            frames.append(pd.read_parquet(path))
+        elif name.startswith("part-") and name.endswith(".csv"):
+            frames.append(pd.read_csv(path))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).drop_duplicates("path", keep="last").reset_index(drop=True)
+
+
+def _columns(choice: str) -> list:
+    from feature_extractors.graph import INPUTS, column_nodes, required_columns
+
+    if choice == "all":
+        columns = list(INPUTS) + column_nodes()
+    else:
+        columns = required_columns("classification") + required_columns("regression")
+    return list(dict.fromkeys(columns))
+
+
+def _check_run(out_dir: str, settings: dict):
+    """Writes run.json on the first run; a resumed run must use the same settings."""
+    path = os.path.join(out_dir, RUN)
+    if os.path.exists(path):
+        with open(path) as f:
+            previous = json.load(f)
+        if previous != settings:
+            changed = ", ".join(key for key in settings if previous.get(key) != settings[key])
+            print(f"❌ {out_dir} was extracted with different settings ({changed}); use a new --out")
+            sys.exit(1)
+        return
+    with open(path, "w") as f:
+        json.dump(settings, f, indent=2)
+
+
+def main():
+    from preprocessing.audio import preprocessing_signature
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="Directory of recordings or CSV manifest with a 'path' column")
+    parser.add_argument("--out", default="data_storage/corpus", help="Output directory (shards and progress)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--chunksize", type=int, default=8, help="Recordings per dispatched task")
+    parser.add_argument("--shard-rows", type=int, default=1000, help="Rows per output shard")
+    parser.add_argument("--columns", choices=("models", "all"), default="models",
+                        help="models: what the loaded models consume; all: every feature the graph computes")
+    parser.add_argument("--retry-errors", action="store_true", help="Extract files that failed in earlier runs again")
+    parser.add_argument("--report", type=float, default=10.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    columns = _columns(args.columns)
+    fmt = shard_format()
+    _check_run(args.out, {"columns": columns, "preprocessing": preprocessing_signature(), "format": fmt})
+
+    done = read_progress(args.out)
+    items, skipped = [], 0
+    for item in corpus_items(args.corpus):
+        record = done.get(item["path"])
+        finished = (record is not None and (record["error"] is None or not args.retry_errors)
+                    and os.path.exists(item["path"]) and record["identity"] == file_identity(item["path"]))
+        if finished:
+            skipped += 1
+        else:
+            items.append(item)
+    print(f"🗂️ {len(items)} recordings to extract ({skipped} already done), "
+          f"{len(columns)} columns, {args.workers} workers, {fmt} shards in {args.out}")
+
+    chunks = [items[i:i + args.chunksize] for i in range(0, len(items), args.chunksize)]
+    writer = ShardWriter(args.out, fmt, args.shard_rows)
+    started = last_report = time.perf_counter()
+    files = errors = 0
+    audio_seconds = 0.0
+
+    def report(label):
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        rate = files / elapsed
+        eta = (len(items) - files) / rate if rate else float("nan")
+        print(f"{label} {files}/{len(items)} files, {errors} errors | {rate:.2f} files/s, "
+              f"{audio_seconds / elapsed:.1f} audio-s/s | {elapsed:.0f}s elapsed, ETA {eta:.0f}s")
+
+    # Bounded number of chunks in flight: memory stays flat for any corpus size
+    pending = iter(chunks)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_quiet_worker) as executor:
+        in_flight = set()
+        try:
+            while True:
+                while len(in_flight) < 2 * args.workers:
+                    chunk = next(pending, None)
+                    if chunk is None:
+                        break
+                    in_flight.add(executor.submit(_extract_chunk, chunk, columns))
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    for path, identity, row, error in future.result():
+                        files += 1
+                        if error is None:
+                            audio_seconds += row["duration"]
+                        else:
+                            errors += 1
+                            print(f"⚠️ {path}: {error}")
+                        writer.add(path, identity, row, error)
+                if time.perf_counter() - last_report >= args.report:
+                    last_report = time.perf_counter()
+                    report("⏳")
+        except KeyboardInterrupt:
+            print("🛑 Interrupted; writing finished rows (rerun to resume)")
+            for future in in_flight:
+                future.cancel()
+        finally:
+            writer.flush()
+    report("✅")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Accuracy-vs-speed report of the analysis fidelity tiers (feature_extractors/fidelity.py).
+
+Analyzes every recording of a reference set (a directory, or a CSV manifest as
+for tools.extract_corpus) at each tier, runs the current models on the
+features, and reports against the baseline tier (precise by default):
+- per tier: analysis time and speedup over standard, how often the final
+  status differs (with the transitions) and the mean probability/UPDRS drift;
+- per feature column: the median and largest relative drift of each tier.
+
+    python -m tools.fidelity_report recordings/
+    python -m tools.fidelity_report manifest.csv --tiers fast standard --out fidelity.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+
+def analyze_tier(items, tier, columns):
+    """(feature frame, seconds per recording, errors) of every recording at one tier."""
+    from preprocessing.audio import prepare_analysis
+    from feature_extractors.graph import compute
+
+    rows, seconds, errors = [], [], {}
+    for item in items:
+        started = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                analysis = prepare_analysis(item["path"], tier)
+                test_time = item["test_time"] if item["test_time"] is not None else analysis.duration
+                inputs = {"age": 70 if item["age"] is None else item["age"],
+                          "sex": 0 if item["sex"] is None else item["sex"], "test_time": test_time}
+                rows.append(compute(analysis, columns, inputs).iloc[0])
+        except Exception as e:
+            errors[item["path"]] = f"{type(e).__name__}: {e}"
+            rows.append(pd.Series(np.nan, index=columns))
+        seconds.append(time.perf_counter() - started)
+    return pd.DataFrame(rows, columns=columns).reset_index(drop=True), np.array(seconds), errors
+
+
+def predict(frame, classification_columns, regression_columns) -> dict:
+    """Model outputs and status for the complete rows of a feature frame (NaN/None elsewhere)."""
+    from inference.batch import predict_batch
+
+    complete = frame[classification_columns + regression_columns].notna().all(axis=1).to_numpy()
+    outputs = {name: np.full(len(frame), np.nan) for name in ("probability", "motor_updrs", "total_updrs")}
+    outputs["status"] = np.full(len(frame), None, dtype=object)
+    if complete.any():
+        with contextlib.redirect_stdout(io.StringIO()):
+            predictions = predict_batch(frame.loc[complete, classification_columns].reset_index(drop=True),
+                                        frame.loc[complete, regression_columns].reset_index(drop=True))
+        for name in outputs:
+            outputs[name][complete] = np.asarray(predictions[name])
+    return outputs
+
+
+def relative_drift(values, baseline) -> np.ndarray:
+    """|value - baseline| / |baseline| per row (absolute difference where the baseline is 0)."""
+    values, baseline = np.asarray(values, dtype=float), np.asarray(baseline, dtype=float)
+    scale = np.where(baseline != 0, np.abs(baseline), 1.0)
+    return np.abs(values - baseline) / scale
+
+
+def report(frames, outputs, seconds, baseline, feature_columns) -> dict:
+    """Per-tier and per-feature drift against the baseline tier."""
+    reference_status = outputs[baseline]["status"]
+    standard_seconds = seconds["standard"].sum() if "standard" in seconds else None
+    tiers = {}
+    for tier, frame in frames.items():
+        status = outputs[tier]["status"]
+        both = np.array([a is not None and b is not None for a, b in zip(status, reference_status)], dtype=bool)
+        changed = both & (status != reference_status)
+        total_seconds = float(seconds[tier].sum())
+        tiers[tier] = {
+            "seconds": total_seconds,
+            "seconds_per_recording": float(seconds[tier].mean()),
+            "speedup_vs_standard": standard_seconds / total_seconds if standard_seconds and total_seconds else None,
+            "compared": int(both.sum()),
+            "status_changed": int(changed.sum()),
+            "status_changed_rate": float(changed.sum() / both.sum()) if both.any() else 0.0,
+            "transitions": dict(Counter(f"{a} -> {b}" for a, b in
+                                        zip(reference_status[changed], status[changed])).most_common()),
+            **{f"mean_abs_{name}_drift": float(np.nanmean(np.abs(outputs[tier][name] - outputs[baseline][name])))
+               if both.any() else 0.0
+               for name in ("probability", "motor_updrs", "total_updrs")},
+        }
+
+    features = {}
+    for column in feature_columns:
+        features[column] = {}
+        for tier, frame in frames.items():
+            drift = relative_drift(frame[column], frames[baseline][column])
+            drift = drift[np.isfinite(drift)]
+            features[column][tier] = {
+                "median": float(np.median(drift)) if drift.size else None,
+                "max": float(drift.max()) if drift.size else None,
+            }
+    return {"baseline": baseline, "tiers": tiers, "features": features}
+
+
+def main():
+    from feature_extractors.fidelity import TIERS
+    from tools.extract_corpus import corpus_items
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="Directory of recordings or CSV manifest with a 'path' column")
+    parser.add_argument("--tiers", nargs="+", choices=list(TIERS), default=list(TIERS))
+    parser.add_argument("--baseline", choices=list(TIERS), default="precise", help="Tier the others are compared to")
+    parser.add_argument("--top", type=int, default=15, help="Feature columns to print, largest drift first")
+    parser.add_argument("--out", default=None, help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    from feature_extractors.graph import INPUTS, required_columns
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        classification_columns = required_columns("classification")
+        regression_columns = required_columns("regression")
+    columns = list(dict.fromkeys(classification_columns + regression_columns))
+    feature_columns = [column for column in columns if column not in INPUTS]
+
+    items = corpus_items(args.corpus)
+    if not items:
+        print(f"⚠️ No recordings in {args.corpus}")
+        sys.exit(1)
+    tiers = list(dict.fromkeys(args.tiers + [args.baseline]))
+    print(f"📚 {len(items)} recordings, tiers: {', '.join(tiers)} (baseline {args.baseline})")
+
+    frames, outputs, seconds = {}, {}, {}
+    for tier in tiers:
+        frames[tier], seconds[tier], errors = analyze_tier(items, tier, columns)
+        outputs[tier] = predict(frames[tier], classification_columns, regression_columns)
+        for path, error in errors.items():
+            print(f"⚠️ {tier}: {path}: {error}")
+        print(f"⏱️ {tier}: {seconds[tier].sum():.2f}s ({seconds[tier].mean():.2f}s per recording)")
+
+    result = report(frames, outputs, seconds, args.baseline, feature_columns)
+
+    print(f"\n{'tier':<10} {'s/recording':>12} {'speedup':>8} {'status changed':>16} "
+          f"{'Δprob':>7} {'Δmotor':>7} {'Δtotal':>7}")
+    for tier, entry in result["tiers"].items():
+        speedup = f"x{entry['speedup_vs_standard']:.2f}" if entry["speedup_vs_standard"] else "-"
+        print(f"{tier:<10} {entry['seconds_per_recording']:12.2f} {speedup:>8} "
+              f"{entry['status_changed']:5d} ({entry['status_changed_rate']:6.1%}) "
+              f"{entry['mean_abs_probability_drift']:7.3f} {entry['mean_abs_motor_updrs_drift']:7.2f} "
+              f"{entry['mean_abs_total_updrs_drift']:7.2f}"
+              + (f"  {', '.join(f'{k}: {v}' for k, v in entry['transitions'].items())}" if entry["transitions"] else ""))
+
+    compared = [tier for tier in tiers if tier != args.baseline]
+    worst = sorted(feature_columns, key=lambda c: -max((result["features"][c][t]["max"] or 0) for t in compared))
+    print(f"\nRelative feature drift vs {args.baseline} (median / max):")
+    print(f"{'feature':<20}" + "".join(f"{tier:>22}" for tier in compared))
+    for column in worst[:args.top]:
+        cells = []
+        for tier in compared:
+            drift = result["features"][column][tier]
+            cells.append(f"{drift['median']:9.2%} / {drift['max']:8.2%}" if drift["max"] is not None else "-")
+        print(f"{column:<20}" + "".join(f"{cell:>22}" for cell in cells))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"recordings": len(items), **result}, f, indent=2)
+        print(f"✅ Report saved to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
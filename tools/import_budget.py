@@ -0,0 +1,87 @@
+"""
+Cold-start budget: time to import the app in a fresh interpreter.
+
+Imports app.py with STARTUP_MODE=lazy (no warm-up, so only import cost is
+measured) in a new process per repeat and fails when the fastest import takes
+longer than the budget, or when a module that must stay off the startup path
+(loaded lazily or by the warm-up) is imported. Prints the heaviest direct
+imports of app.py, from `python -X importtime`.
+
+    python -m tools.import_budget
+    python -m tools.import_budget --budget 0.8 --repeat 5
+    INFERENCE_MODE=exported python -m tools.import_budget --forbid sklearn joblib scipy.signal
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+DEFAULT_BUDGET_SECONDS = 1.0
+# Loaded on first use or by app.warm_up(), never by importing the app
+DEFAULT_FORBIDDEN = ["sklearn", "joblib", "scipy.signal"]
+
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app
+seconds = time.perf_counter() - started
+print(json.dumps({"seconds": seconds, "modules": sorted(sys.modules)}))
+"""
+
+
+def measure():
+    """(seconds, imported module names, -X importtime lines) of one cold import."""
+    env = dict(os.environ, STARTUP_MODE="lazy")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _CHILD],
+                          capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing the app failed:\n{proc.stderr[-2000:]}")
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    return report["seconds"], set(report["modules"]), proc.stderr.splitlines()
+
+
+def heaviest_imports(importtime_lines, top=8):
+    """(cumulative ms, module) of the direct imports of app, heaviest first."""
+    children = []
+    for line in importtime_lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():  # header line
+            continue
+        # Direct imports of app are indented by exactly two spaces
+        if name.startswith("   ") and not name.startswith("    "):
+            children.append((int(cumulative) / 1000, name.strip()))
+    return sorted(children, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS, help="Seconds allowed for `import app`")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters; the fastest counts")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN, help="Modules that must not be imported")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(max(1, args.repeat))]
+    seconds, modules, importtime_lines = min(runs, key=lambda run: run[0])
+
+    print(f"⏱️ import app: {seconds:.3f}s (best of {len(runs)}, budget {args.budget:.3f}s)")
+    for cumulative_ms, name in heaviest_imports(importtime_lines):
+        print(f"   {cumulative_ms:8.1f} ms  {name}")
+
+    failures = 0
+    leaked = [name for name in args.forbid if name in modules]
+    if leaked:
+        print(f"❌ Imported at startup: {', '.join(leaked)}")
+        failures += 1
+    if seconds > args.budget:
+        print(f"❌ Cold start over budget by {seconds - args.budget:.3f}s")
+        failures += 1
+    if not failures:
+        print("✅ Cold start within budget")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Concurrency stress check for /analyze.
+
+Fires many concurrent requests with distinct (age, sex, test_time) inputs and
+asserts that every response matches the result computed sequentially for its
+own input. Every request sends Cache-Control: no-cache and must come back as
+a result cache MISS, so concurrent requests really run the analysis side by
+side. Without --url the Flask app runs in-process (with its result cache off) behind a thread pool,
+and every upload spooled to disk (utils/spool.py) must be gone once its
+request ended; with --url it targets a running server (e.g. gunicorn with
+several workers and threads).
+
+    python -m tools.stress_analyze --audio audioTest.wav --requests 64 --concurrency 16
+    python -m tools.stress_analyze --url http://localhost:5000 --requests 200
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import uuid
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _inputs(n, distinct):
+    """Cycles through distinct inputs; test_time is echoed back, so each response is attributable."""
+    return [{"age": str(40 + 5 * (i % distinct)), "sex": "male" if i % 2 else "female",
+             "test_time": f"{10 + (i % distinct) * 0.25:.2f}"}
+            for i in range(n)]
+
+
+def _post_url(url, audio_bytes, fields):
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n".encode())
+    body.write(f"--{boundary}\r\nContent-Disposition: form-data; name=\"audio\"; filename=\"audio.wav\"\r\n"
+               f"Content-Type: audio/wav\r\n\r\n".encode())
+    body.write(audio_bytes)
+    body.write(f"\r\n--{boundary}--\r\n".encode())
+    request = urllib.request.Request(f"{url.rstrip('/')}/analyze", data=body.getvalue(), method="POST",
+                                     headers={"Content-Type": f"multipart/form-data; boundary={boundary}",
+                                              "Cache-Control": "no-cache"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read()), response.headers.get("X-Result-Cache")
+
+
+def _poster(url, audio_bytes):
+    if url:
+        return lambda fields: _post_url(url, audio_bytes, fields)
+
+    # A cached result would answer the concurrent pass without running anything
+    os.environ["RESULT_CACHE_SIZE"] = "0"
+    os.environ["RESULT_CACHE_DB"] = ""
+    from app import app
+    client = app.test_client()
+
+    def post(fields):
+        data = dict(fields, audio=(io.BytesIO(audio_bytes), "audio.wav"))
+        response = client.post("/analyze", data=data, content_type="multipart/form-data",
+                               headers={"Cache-Control": "no-cache"})
+        return response.get_json(), response.headers.get("X-Result-Cache")
+    return post
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", default="audioTest.wav")
+    parser.add_argument("--url", default=None, help="Target a running server instead of the in-process app")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--distinct", type=int, default=8, help="Number of distinct inputs to cycle through")
+    args = parser.parse_args()
+
+    with open(args.audio, "rb") as f:
+        audio_bytes = f.read()
+    post = _poster(args.url, audio_bytes)
+    inputs = _inputs(args.requests, args.distinct)
+
+    # Expected results: one sequential request per distinct input
+    distinct = {json.dumps(fields, sort_keys=True): fields for fields in inputs}
+    expected = {key: post(fields)[0] for key, fields in distinct.items()}
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        responses = list(pool.map(post, inputs))
+
+    mismatches = 0
+    for fields, (response, _) in zip(inputs, responses):
+        if response != expected[json.dumps(fields, sort_keys=True)]:
+            mismatches += 1
+            print(f"❌ Mismatch for {fields}: {response}")
+
+    print(f"{'✅' if not mismatches else '❌'} {len(inputs) - mismatches}/{len(inputs)} responses matched their input "
+          f"({args.concurrency} concurrent)")
+
+    cached = sum(status != "MISS" for _, status in responses)
+    print(f"{'✅' if not cached else '❌'} {cached} concurrent responses did not run the analysis (X-Result-Cache not MISS)")
+
+    leaked = 0
+    if not args.url:
+        from utils.spool import spool
+        leaked = spool.in_use()
+        print(f"{'✅' if not leaked else '❌'} {leaked} spooled uploads left after the requests ended")
+    sys.exit(1 if mismatches or cached or leaked else 0)
+
+
+if __name__ == "__main__":
+    main()
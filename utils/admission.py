@@ -0,0 +1,274 @@
+"""
+Cost-aware admission control for the analysis endpoints (ADMISSION_CONTROL=1).
+
+A request's cost is estimated from the upload's header (duration, sample rate,
+channels) before anything is decoded; a stream's frames are costed from the
+audio each POST makes the session analyze. Admission then checks, in order:
+- the request size and recording duration limits (413);
+- the client's rate (token bucket) and its concurrent requests (429);
+- the global budget: CPU slots and in-flight audio-seconds, with long
+  recordings limited to part of the slots, so a burst of long files cannot
+  hold every slot while short ones queue (429).
+Rejections carry Retry-After, estimated from the observed processing time
+per audio-second of the requests in flight.
+"""
+import ipaddress
+import math
+import os
+import threading
+import time
+from utils import metrics
+
+ADMISSION_CONTROL = os.environ.get("ADMISSION_CONTROL", "0") == "1"
+ADMISSION_MAX_UPLOAD_MB = float(os.environ.get("ADMISSION_MAX_UPLOAD_MB", 200))
+ADMISSION_MAX_AUDIO_SECONDS = float(os.environ.get("ADMISSION_MAX_AUDIO_SECONDS", 3600))
+# Global budget of requests being analyzed at once
+ADMISSION_SLOTS = int(os.environ.get("ADMISSION_SLOTS", os.cpu_count() or 1))
+ADMISSION_AUDIO_SECONDS = float(os.environ.get("ADMISSION_AUDIO_SECONDS", 1800))
+# Recordings costing more than this may hold at most ADMISSION_LONG_SLOTS slots
+ADMISSION_LONG_SECONDS = float(os.environ.get("ADMISSION_LONG_SECONDS", 120))
+ADMISSION_LONG_SLOTS = int(os.environ.get("ADMISSION_LONG_SLOTS", max(1, ADMISSION_SLOTS // 2)))
+# Per client (the remote address; see client_id); 0 disables a limit
+ADMISSION_CLIENT_CONCURRENCY = int(os.environ.get("ADMISSION_CLIENT_CONCURRENCY", 2))
+ADMISSION_CLIENT_RATE = float(os.environ.get("ADMISSION_CLIENT_RATE", 30))  # requests per minute
+ADMISSION_CLIENT_BURST = int(os.environ.get("ADMISSION_CLIENT_BURST", 10))
+# Comma-separated proxy addresses or networks whose X-Client-ID / X-Forwarded-For are believed
+ADMISSION_TRUSTED_PROXIES = os.environ.get("ADMISSION_TRUSTED_PROXIES", "")
+
+# Decoding, VAD and resampling scale with the sample count, Praat with the duration:
+# one audio-second at this many samples per second (all channels) costs one unit
+REFERENCE_SAMPLE_RATE = 44100
+# Compressed formats whose header soundfile cannot read are costed from their size
+ASSUMED_BYTES_PER_SECOND = 16000
+# Processing seconds per cost unit before any request has finished
+INITIAL_SECONDS_PER_UNIT = 0.15
+
+shed_total = metrics.Counter("admission_shed_total", "Requests rejected by admission control, by reason.",
+                             ["reason"])
+
+
+class AdmissionError(Exception):
+    """Raised when a request is not admitted; status is 413 or 429."""
+
+    def __init__(self, message: str, status: int, reason: str, retry_after: int = None):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def request_cost(duration: float, sample_rate: int, channels: int = 1) -> float:
+    """Estimated cost of analyzing a recording, in reference audio-seconds."""
+    return duration * max(1.0, sample_rate * channels / REFERENCE_SAMPLE_RATE)
+
+
+def _networks(spec: str):
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip()]
+
+
+_TRUSTED_NETWORKS = _networks(ADMISSION_TRUSTED_PROXIES)
+
+
+def _trusted(address, networks) -> bool:
+    try:
+        address = ipaddress.ip_address(address.strip())
+    except (AttributeError, ValueError):
+        return False
+    return any(address in network for network in networks)
+
+
+def client_id(remote_addr, client_header=None, forwarded_for=None, trusted_proxies=None) -> str:
+    """
+    The identity a request is limited under: its remote address. Only a request
+    from a trusted proxy (ADMISSION_TRUSTED_PROXIES) may name another client,
+    through X-Client-ID or else the nearest untrusted X-Forwarded-For hop;
+    from anyone else those headers are ignored, so they cannot dodge the limits.
+    """
+    networks = _TRUSTED_NETWORKS if trusted_proxies is None else _networks(trusted_proxies)
+    if not remote_addr or not _trusted(remote_addr, networks):
+        return remote_addr or "unknown"
+    if client_header:
+        return client_header
+    for hop in reversed((forwarded_for or "").split(",")):
+        if hop.strip() and not _trusted(hop, networks):
+            return hop.strip()
+    return remote_addr
+
+
+def upload_cost(fileobj, size: int = None):
+    """
+    (duration, cost) of an uploaded file object from its header, rewound
+    afterwards; from its size when the header does not state a length.
+    """
+    from utils.audio_io import probe_audio
+
+    probed = probe_audio(fileobj)
+    if probed is not None:
+        duration, sample_rate, channels = probed
+        return duration, request_cost(duration, sample_rate, channels)
+    if size is None:
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell()
+        fileobj.seek(0)
+    duration = size / ASSUMED_BYTES_PER_SECOND
+    return duration, duration
+
+
+class _Bucket:
+    """Token bucket of one client, plus its requests in flight."""
+
+    def __init__(self, burst: int):
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.in_flight = 0
+
+
+class Ticket:
+    """An admitted request; releases its share of the budget when the analysis ends."""
+
+    def __init__(self, controller, client: str, cost: float):
+        self.controller = controller
+        self.client = client
+        self.cost = cost
+        self.started = time.monotonic()
+        self.released = False
+        self.timed = True  # set False when the work was skipped (result cache hit)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller._release(self)
+
+
+class AdmissionController:
+    """
+    Global slot/audio-second budget and per-client limits. admit() never
+    waits: it returns a Ticket or raises AdmissionError right away.
+    """
+
+    def __init__(self, slots: int = ADMISSION_SLOTS, audio_seconds: float = ADMISSION_AUDIO_SECONDS,
+                 long_seconds: float = ADMISSION_LONG_SECONDS, long_slots: int = ADMISSION_LONG_SLOTS,
+                 client_concurrency: int = ADMISSION_CLIENT_CONCURRENCY, client_rate: float = ADMISSION_CLIENT_RATE,
+                 client_burst: int = ADMISSION_CLIENT_BURST, max_audio_seconds: float = ADMISSION_MAX_AUDIO_SECONDS):
+        self.slots = slots
+        self.audio_seconds = audio_seconds
+        self.long_seconds = long_seconds
+        self.long_slots = long_slots
+        self.client_concurrency = client_concurrency
+        self.client_rate = client_rate / 60
+        self.client_burst = client_burst
+        self.max_audio_seconds = max_audio_seconds
+        self._lock = threading.Lock()
+        self._tickets = set()
+        self._clients = {}
+        self._seconds_per_unit = INITIAL_SECONDS_PER_UNIT
+
+    def in_flight(self) -> int:
+        return len(self._tickets)
+
+    def in_flight_cost(self) -> float:
+        with self._lock:
+            return sum(ticket.cost for ticket in self._tickets)
+
+    def _shed(self, message, status, reason, retry_after=None):
+        shed_total.inc(reason=reason)
+        raise AdmissionError(message, status, reason, retry_after)
+
+    def _retry_after(self, cost: float) -> int:
+        """
+        Seconds until enough of the work in flight should have finished to admit
+        `cost` more: the first finish frees a slot, the budget may need more to drain.
+        """
+        now = time.monotonic()
+        finishes = sorted((t.started + t.cost * self._seconds_per_unit - now, t.cost) for t in self._tickets)
+        if not finishes:
+            return 1
+        in_flight_cost = sum(ticket_cost for _, ticket_cost in finishes)
+        wait = finishes[0][0]
+        for finish, ticket_cost in finishes:
+            if in_flight_cost + cost <= self.audio_seconds:
+                break
+            in_flight_cost -= ticket_cost
+            wait = finish
+        return max(1, math.ceil(wait))
+
+    def check_size(self, content_length):
+        """Rejects request bodies over ADMISSION_MAX_UPLOAD_MB (413) before they are parsed."""
+        if content_length and content_length > ADMISSION_MAX_UPLOAD_MB * 2 ** 20:
+            self._shed(f"Upload too large (limit {ADMISSION_MAX_UPLOAD_MB:g} MB)", 413, "too_large")
+
+    def admit_uploads(self, client: str, streams) -> Ticket:
+        """Admits a request analyzing the uploaded files (one or a batch), costed from their headers."""
+        costs = [upload_cost(stream) for stream in streams]
+        return self.admit(client, max(duration for duration, _ in costs), sum(cost for _, cost in costs))
+
+    def admit(self, client: str, duration: float, cost: float, rate: bool = True) -> Ticket:
+        """
+        Admits a request of `duration` seconds and estimated `cost`, or raises
+        AdmissionError (413 for recordings that are never admitted, else 429).
+        rate=False leaves the client's request rate alone (frames of a stream
+        whose opening request was already counted).
+        """
+        if duration > self.max_audio_seconds:
+            self._shed(f"Recording too long ({duration:.0f}s, limit {self.max_audio_seconds:.0f}s)", 413, "too_long")
+
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._clients.get(client)
+            if bucket is None:
+                if len(self._clients) > 10000:  # forget idle clients with a full bucket
+                    self._clients = {key: b for key, b in self._clients.items()
+                                     if b.in_flight or b.tokens + (now - b.updated) * self.client_rate
+                                     < self.client_burst}
+                bucket = self._clients[client] = _Bucket(self.client_burst)
+
+            if rate and self.client_rate > 0:
+                bucket.tokens = min(self.client_burst, bucket.tokens + (now - bucket.updated) * self.client_rate)
+                bucket.updated = now
+                if bucket.tokens < 1:
+                    self._shed("Too many requests from this client", 429, "client_rate",
+                               max(1, math.ceil((1 - bucket.tokens) / self.client_rate)))
+            if self.client_concurrency and bucket.in_flight >= self.client_concurrency:
+                self._shed("Too many concurrent requests from this client", 429, "client_concurrency",
+                           self._retry_after(0))
+
+            in_flight_cost = sum(ticket.cost for ticket in self._tickets)
+            long_in_flight = sum(1 for ticket in self._tickets if ticket.cost > self.long_seconds)
+            if len(self._tickets) >= self.slots:
+                self._shed("Server busy", 429, "slots", self._retry_after(0))
+            if cost > self.long_seconds and long_in_flight >= self.long_slots:
+                self._shed("Server busy with long recordings", 429, "long_slots", self._retry_after(0))
+            # A request larger than the whole budget still runs, but only on an idle server
+            if self._tickets and in_flight_cost + cost > self.audio_seconds:
+                self._shed("Server busy", 429, "audio_budget", self._retry_after(cost))
+
+            if rate and self.client_rate > 0:
+                bucket.tokens -= 1
+            bucket.in_flight += 1
+            ticket = Ticket(self, client, cost)
+            self._tickets.add(ticket)
+            return ticket
+
+    def _release(self, ticket: Ticket):
+        elapsed = time.monotonic() - ticket.started
+        with self._lock:
+            self._tickets.discard(ticket)
+            bucket = self._clients.get(ticket.client)
+            if bucket is not None:
+                bucket.in_flight -= 1
+            if ticket.timed and ticket.cost > 0:
+                # Running average of processing seconds per cost unit (drives Retry-After)
+                self._seconds_per_unit = 0.8 * self._seconds_per_unit + 0.2 * elapsed / ticket.cost
+
+
+admission = AdmissionController()
+
+metrics.Gauge("admission_in_flight", "Requests admitted and still being analyzed.", function=admission.in_flight)
+metrics.Gauge("admission_in_flight_audio_seconds", "Estimated cost of the requests in flight.",
+              function=admission.in_flight_cost)
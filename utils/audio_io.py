@@ -0,0 +1,203 @@
+import io
+import mmap
+import struct
+import subprocess
+import numpy as np
+import soundfile as sf
+from utils.metrics import span
+
+
+class AudioDecodeError(ValueError):
+    """Raised when an upload is not audio this server can decode (or ffmpeg is missing for its format)."""
+
+
+def _decode_with_soundfile(data: bytes):
+    samples, sample_rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    return samples.T, sample_rate
+
+
+def _decode_with_ffmpeg(data: bytes):
+    """
+    Pipes compressed audio (m4a, webm, ...) through ffmpeg into a streamable
+    float32 AU container, which soundfile then reads from memory.
+    """
+    try:
+        proc = subprocess.run(
+            ["ffmpeg", "-nostdin", "-v", "error", "-i", "pipe:0", "-f", "au", "-c:a", "pcm_f32be", "pipe:1"],
+            input=data,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise AudioDecodeError("Unsupported audio format: only WAV, FLAC, OGG and MP3 can be decoded "
+                               "(ffmpeg is not installed)")
+    if proc.returncode != 0:
+        raise AudioDecodeError(f"Audio conversion failed: {proc.stderr.decode(errors='ignore').strip()}")
+    try:
+        return _decode_with_soundfile(proc.stdout)
+    except Exception as e:
+        raise AudioDecodeError(f"Audio conversion failed: {e}")
+
+
+def decode_audio(data: bytes):
+    """
+    Decodes an uploaded recording entirely in memory.
+    Returns (samples, sample_rate) with samples as a float32 (channels, n) array.
+    WAV/FLAC/OGG/MP3 are read directly by soundfile; other formats go through an ffmpeg pipe.
+    Raises AudioDecodeError when neither can decode the data.
+    """
+    with span("decode"):
+        try:
+            samples, sample_rate = _decode_with_soundfile(data)
+        except Exception:
+            samples, sample_rate = _decode_with_ffmpeg(data)
+    print(f"🎧 Decoded {samples.shape[1] / sample_rate:.2f}s of audio in memory ({sample_rate} Hz)")
+    return np.ascontiguousarray(samples), sample_rate
+
+
+def probe_audio(source):
+    """
+    (duration in seconds, sample rate, channels) read from the container header
+    (file path, bytes or binary file object, rewound afterwards), without
+    decoding any audio. None when the header does not state a length
+    (compressed formats soundfile cannot read, streamed files).
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        info = sf.info(source)
+    except Exception:
+        return None
+    finally:
+        if hasattr(source, "seek"):
+            source.seek(0)
+    if info.frames <= 0 or info.samplerate <= 0:
+        return None
+    return info.frames / info.samplerate, info.samplerate, info.channels
+
+
+def probe_duration(source):
+    """Duration in seconds from the container header (see probe_audio); None if not stated."""
+    probed = probe_audio(source)
+    return None if probed is None else round(probed[0], 2)
+
+
+# WAV sample formats that can be memory-mapped as-is: (format tag, bits) -> (dtype, full scale)
+_WAV_DTYPES = {(1, 16): ("<i2", 32768.0), (1, 32): ("<i4", 2147483648.0),
+               (3, 32): ("<f4", 1.0), (3, 64): ("<f8", 1.0)}
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# Pages the kernel maps around a faulting page (fault-around); released along with a window
+_FAULT_AROUND_BYTES = 1 << 16
+
+
+def _wav_layout(f):
+    """
+    (data offset, frames, channels, sample rate, dtype, full scale) of a
+    memory-mappable PCM WAV, or None for any other file.
+    """
+    f.seek(0)
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    fmt = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+        if chunk_id == b"fmt ":
+            body = f.read(size)
+            tag, channels, sample_rate, _, block_align, bits = struct.unpack("<HHIIHH", body[:16])
+            if tag == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                tag = struct.unpack("<H", body[24:26])[0]
+            fmt = (tag, channels, sample_rate, block_align, bits)
+        elif chunk_id == b"data":
+            if fmt is None or (fmt[0], fmt[4]) not in _WAV_DTYPES or fmt[3] != fmt[1] * fmt[4] // 8:
+                return None
+            dtype, scale = _WAV_DTYPES[(fmt[0], fmt[4])]
+            return f.tell(), size // fmt[3], fmt[1], fmt[2], dtype, scale
+        else:
+            f.seek(size + (size & 1), io.SEEK_CUR)  # chunks are word-aligned
+
+
+def _in_memory(fileobj) -> bool:
+    """Whether a file object holds its bytes in memory (no file descriptor to map)."""
+    return getattr(fileobj, "in_memory", isinstance(fileobj, io.BytesIO))
+
+
+class PCMSource:
+    """
+    Random access to a recording's samples without decoding it whole.
+    PCM/float WAV files are memory-mapped, and the pages of a window are dropped
+    once it has been copied out, so resident memory stays at about one window;
+    other formats soundfile reads are read window by window.
+    source: a file path or a binary file object (e.g. an upload's temp file).
+    Uploads still held in memory (BytesIO, a spool file with in_memory set) are
+    read from their buffer; fileno() is only used for files on disk.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._map = self._memmap = None
+        layout = None
+        opened = open(source, "rb") if isinstance(source, str) else source
+        try:
+            layout = _wav_layout(opened)
+        finally:
+            if opened is not source:
+                opened.close()
+            else:
+                source.seek(0)
+        if layout is not None and (isinstance(source, str) or hasattr(source, "fileno")):
+            offset, self.frames, self.channels, self.sample_rate, dtype, self._scale = layout
+            try:
+                if isinstance(source, str):
+                    with open(source, "rb") as f:
+                        self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                elif _in_memory(source):
+                    self._map = source.getvalue()
+                else:
+                    self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+                self._memmap_offset = offset
+                self._memmap = np.frombuffer(self._map, dtype=dtype, count=self.frames * self.channels,
+                                             offset=offset).reshape(self.frames, self.channels)
+            except (OSError, ValueError, io.UnsupportedOperation):
+                self._map = self._memmap = None
+        if self._memmap is None:
+            if not isinstance(source, str):
+                source.seek(0)
+            self._file = sf.SoundFile(source)
+            self.frames, self.channels, self.sample_rate = self._file.frames, self._file.channels, self._file.samplerate
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    def _release(self, start: int, stop: int):
+        """Drops the mapped pages of samples [start, stop) (the file still backs them)."""
+        if not isinstance(self._map, mmap.mmap) or not hasattr(mmap, "MADV_DONTNEED") or stop <= start:
+            return
+        frame_bytes = self._memmap.strides[0]
+        first = max(0, self._memmap_offset + start * frame_bytes - _FAULT_AROUND_BYTES)
+        first -= first % mmap.PAGESIZE
+        last = min(len(self._map), self._memmap_offset + stop * frame_bytes + _FAULT_AROUND_BYTES)
+        self._map.madvise(mmap.MADV_DONTNEED, first, last - first)
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        """Samples [start, stop) as a float32 (channels, n) array (the layout decode_audio returns)."""
+        start, stop = max(0, start), min(self.frames, stop)
+        if self._memmap is not None:
+            window = np.array(self._memmap[start:stop], dtype=np.float32)
+            if self._scale != 1.0:
+                window /= np.float32(self._scale)
+            self._release(start, stop)
+            return window.T
+        self._file.seek(start)
+        return self._file.read(stop - start, dtype="float32", always_2d=True).T
+
+
+def decode_upload(file_storage):
+    """
+    Decodes a Flask/Werkzeug upload without writing it to disk.
+    """
+    return decode_audio(file_storage.read())
@@ -20,12 +20,18 @@ def log_message(message: str):
     print(f"🔹 {message}")
 
 
+MIN_AUDIO_DURATION = 1.0
+MIN_SAMPLE_RATE = 16000
+AUDIO_QUALITY_OK = "✅ Audio quality OK."
+
+
 def check_audio_quality(duration, sample_rate):
     """
-    Optional: Check if the audio is long enough and valid for feature extraction.
+    Check if the audio is long enough and valid for feature extraction.
+    Returns AUDIO_QUALITY_OK or a message for the user.
     """
-    if duration < 1.0:
+    if duration < MIN_AUDIO_DURATION:
         return "⚠️ Audio too short — try recording longer."
-    elif sample_rate < 16000:
+    elif sample_rate < MIN_SAMPLE_RATE:
         return "⚠️ Low sampling rate — please record with 16kHz or higher."
-    return "✅ Audio quality OK."
+    return AUDIO_QUALITY_OK
@@ -0,0 +1,202 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from multiprocessing import util as mp_util
+
+import pandas as pd
+
+FEATURE_STORE_PATH = os.environ.get("FEATURE_STORE_PATH", "data_storage/features.db")
+FEATURE_STORE_BATCH = int(os.environ.get("FEATURE_STORE_BATCH", 64))
+FEATURE_STORE_FLUSH_INTERVAL = float(os.environ.get("FEATURE_STORE_FLUSH_INTERVAL", 2.0))
+
+_BASE_COLUMNS = {"id": "INTEGER PRIMARY KEY AUTOINCREMENT", "request_id": "TEXT", "created_at": "REAL"}
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(value) -> str:
+    if isinstance(value, str):
+        return "TEXT"
+    if isinstance(value, (bool, int)):
+        return "INTEGER"
+    return "REAL"
+
+
+class FeatureStore:
+    """
+    Append-only history of every analyzed recording (features, outputs, timings)
+    in SQLite WAL mode. append() only enqueues; a background thread writes rows
+    in batches of FEATURE_STORE_BATCH or every FEATURE_STORE_FLUSH_INTERVAL seconds.
+    New feature names become new columns, so the schema follows the extractors.
+    """
+
+    def __init__(self, path: str = FEATURE_STORE_PATH, batch_size: int = FEATURE_STORE_BATCH,
+                 flush_interval: float = FEATURE_STORE_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._writer = None
+        self._columns = None
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL + NORMAL: no fsync per commit
+        return conn
+
+    def _ensure_writer(self):
+        # Forked workers (job and batch pools) inherit a stale queue and no thread; start fresh
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._run, name="feature-store-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+            mp_util.Finalize(self, self.close, exitpriority=10)  # pool workers skip atexit
+
+    def append(self, row: dict):
+        """
+        Queues one row. Keys are column names; values are numbers or strings.
+        """
+        self._ensure_writer()
+        row = dict(row)
+        row.setdefault("created_at", time.time())
+        self._queue.put(row)
+
+    def flush(self, timeout: float = 10.0):
+        """Blocks until every row queued so far has been written."""
+        if self._pid != os.getpid():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        if self._pid != os.getpid() or not self._writer.is_alive():
+            return
+        self._queue.put(None)
+        self._writer.join(timeout=10.0)
+
+    def _run(self):
+        conn = self._connect()
+        stop = False
+        while not stop:
+            batch, waiters = [], []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+            if batch:
+                try:
+                    self._write(conn, batch)
+                except Exception as e:
+                    print(f"⚠️ Feature store write failed ({len(batch)} rows dropped): {e}")
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
+
+    def _write(self, conn, rows):
+        self._ensure_columns(conn, rows)
+        with conn:
+            conn.execute("BEGIN")
+            for row in rows:
+                names = list(row)
+                conn.execute(
+                    f"INSERT INTO samples ({', '.join(map(_quote, names))}) VALUES ({', '.join('?' * len(names))})",
+                    [row[name] for name in names],
+                )
+
+    def _ensure_columns(self, conn, rows):
+        if self._columns is None:
+            columns = ", ".join(f"{_quote(name)} {sql_type}" for name, sql_type in _BASE_COLUMNS.items())
+            conn.execute(f"CREATE TABLE IF NOT EXISTS samples ({columns})")
+            conn.execute("CREATE INDEX IF NOT EXISTS samples_created_at ON samples (created_at)")
+            self._columns = {r[1] for r in conn.execute("PRAGMA table_info(samples)")}
+
+        for row in rows:
+            for name, value in row.items():
+                if name in self._columns:
+                    continue
+                try:
+                    conn.execute(f"ALTER TABLE samples ADD COLUMN {_quote(name)} {_sql_type(value)}")
+                except sqlite3.OperationalError:
+                    pass  # added concurrently by another worker process
+                self._columns.add(name)
+
+    def scan(self, columns=None, since=None, until=None, after_id=None, limit=None) -> pd.DataFrame:
+        """
+        Reads rows ordered by id. columns projects to a subset (id is always
+        included); since/until bound created_at (epoch seconds); after_id and
+        limit page through the history.
+        """
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=["id"] + list(columns or []))
+
+        clauses, params = [], []
+        for clause, value in (("created_at >= ?", since), ("created_at < ?", until), ("id > ?", after_id)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            existing = {r[1] for r in conn.execute("PRAGMA table_info(samples)")}
+            # Columns never written yet come back as NULL (a quoted unknown name would be a string literal)
+            selected = "*" if columns is None else ", ".join(
+                _quote(c) if c in existing else f"NULL AS {_quote(c)}"
+                for c in ["id"] + [c for c in columns if c != "id"]
+            )
+            sql = f"SELECT {selected} FROM samples"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sql += " ORDER BY id"
+            if limit is not None:
+                sql += " LIMIT ?"
+                params.append(int(limit))
+            return pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+
+
+def feature_row(request_id, classification_df, regression_df, predictions, index=0, **extra) -> dict:
+    """
+    Flattens one analyzed recording into a store row: regression inputs and
+    features, classification features, model outputs and any extra fields.
+    """
+    row = {"request_id": request_id}
+    row.update(regression_df.iloc[[index]].to_dict("records")[0])  # keeps per-column dtypes
+    row.update(classification_df.iloc[[index]].to_dict("records")[0])
+    motor, total = predictions["motor_updrs"][index], predictions["total_updrs"][index]
+    row.update({
+        "probability": float(predictions["probability"][index]),
+        # None (NULL) when the cascade skipped the UPDRS models
+        "motor_updrs": None if motor is None else float(motor),
+        "total_updrs": None if total is None else float(total),
+        "status": str(predictions["status"][index]),
+    })
+    row.update(extra)
+    # NumPy scalars -> Python so sqlite3 can bind them
+    return {k: v.item() if hasattr(v, "item") else v for k, v in row.items()}
+
+
+feature_store = FeatureStore()
@@ -0,0 +1,146 @@
+import math
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils import metrics
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", os.cpu_count() or 1))
+JOB_QUEUE_DEPTH = int(os.environ.get("JOB_QUEUE_DEPTH", 32))
+JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", 600))
+# How worker pools start their processes. The serving process runs threads (model
+# watcher, spool janitor, feature store writer, micro-batcher), and a forked child
+# could inherit a lock one of them held, so workers come from a fork server.
+POOL_START_METHOD = os.environ.get("POOL_START_METHOD", "forkserver")
+
+jobs_total = metrics.Counter("jobs_total", "Finished analysis jobs, by outcome.", ["status"])
+job_seconds = metrics.Histogram("job_duration_seconds", "Time from submission to completion of a job.")
+
+
+def process_pool(max_workers: int, **kwargs) -> ProcessPoolExecutor:
+    """A ProcessPoolExecutor whose workers start with POOL_START_METHOD (spawn where unavailable)."""
+    method = POOL_START_METHOD if POOL_START_METHOD in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method), **kwargs)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """
+    Bounded process pool for CPU-bound analysis jobs with an in-process result
+    store. Finished jobs are kept for JOB_RESULT_TTL seconds.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, depth: int = JOB_QUEUE_DEPTH, ttl: float = JOB_RESULT_TTL):
+        self.workers = workers
+        self.depth = depth
+        self.ttl = ttl
+        self._executor = None
+        self._jobs = {}  # job_id -> {"future", "created", "finished", "status", "result", "error"}
+        self._lock = threading.Lock()
+        self._avg_seconds = None  # running average job duration, for Retry-After
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = process_pool(self.workers)
+            return self._executor
+
+    def pending(self) -> int:
+        """Jobs queued or running."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job["finished"] is None)
+
+    def retry_after(self) -> int:
+        """Estimated seconds until a queue slot frees up."""
+        per_job = self._avg_seconds or 5.0
+        return max(1, math.ceil(per_job * max(self.pending(), 1) / self.workers))
+
+    def submit(self, fn, *args, on_done=None) -> str:
+        """
+        Queues fn(*args) on the worker pool and returns a job id.
+        Raises QueueFullError when JOB_QUEUE_DEPTH jobs are already pending.
+        on_done() is called once the job has finished (done or error), or right
+        away when the pool refuses the job (the error is then re-raised).
+        """
+        self._expire()
+        job_id = uuid.uuid4().hex
+        job = {"future": None, "created": time.time(), "finished": None, "status": "queued", "result": None, "error": None}
+        with self._lock:
+            full = sum(1 for j in self._jobs.values() if j["finished"] is None) >= self.depth
+            if not full:
+                self._jobs[job_id] = job
+        if full:
+            raise QueueFullError(self.retry_after())
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception as e:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                if isinstance(e, BrokenProcessPool):
+                    self._executor = None  # a worker died; the next job starts a fresh pool
+            if on_done is not None:
+                on_done()
+            raise
+        job["future"] = future
+        future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f, on_done))
+        print(f"📥 Job queued: {job_id}")
+        return job_id
+
+    def _on_done(self, job_id, future, on_done=None):
+        if on_done is not None:
+            on_done()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["finished"] = time.time()
+            try:
+                job["result"] = future.result()
+                job["status"] = "done"
+            except Exception as e:
+                job["error"] = str(e)
+                job["status"] = "error"
+            elapsed = job["finished"] - job["created"]
+            self._avg_seconds = elapsed if self._avg_seconds is None else 0.8 * self._avg_seconds + 0.2 * elapsed
+        jobs_total.inc(status=job["status"])
+        job_seconds.observe(elapsed)
+        print(f"✅ Job {job['status']}: {job_id}")
+
+    def get(self, job_id: str):
+        """
+        Returns {"job_id", "status", "result"/"error"} or None if unknown or expired.
+        """
+        self._expire()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            status = job["status"]
+            if status == "queued" and job["future"] is not None and job["future"].running():
+                status = "running"
+            info = {"job_id": job_id, "status": status}
+            if job["status"] == "done":
+                info["result"] = job["result"]
+            elif job["status"] == "error":
+                info["error"] = job["error"]
+            return info
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for job_id in [k for k, job in self._jobs.items() if job["finished"] is not None and job["finished"] < cutoff]:
+                del self._jobs[job_id]
+
+
+job_queue = JobQueue()
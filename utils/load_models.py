@@ -1,23 +1,212 @@
 import os
 import pickle
-import joblib
+import hashlib
+import threading
+import time
+from constants import MODELS_DIR
+from utils.metrics import span
 
-def load_model(model_name: str):
+RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", 5.0))
+
+
+def _read_pickle(model_path: str):
     """
-    Loads a .pkl model from the models directory.
+    Unpickles a single artifact.
     Supports both pickle and joblib formats.
     """
-    model_path = os.path.join("models", model_name)
-
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"❌ Model file not found: {model_path}")
-
     try:
         with open(model_path, "rb") as f:
-            model = pickle.load(f)
-        print(f"✅ Loaded model (pickle): {model_name}")
+            return pickle.load(f)
     except Exception:
-        model = joblib.load(model_path)
-        print(f"✅ Loaded model (joblib): {model_name}")
+        import joblib
+        return joblib.load(model_path)
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelSnapshot:
+    """
+    One published model set. Every get() on a snapshot returns artifacts of the
+    same generation, however often the registry is swapped in between.
+    """
+
+    def __init__(self, artifacts: dict, generation: int, models_dir: str = MODELS_DIR):
+        self._artifacts = artifacts  # name -> {"model", "sha256", "mtime", "size"}
+        self.generation = generation
+        self.models_dir = models_dir
+
+    def __contains__(self, model_name: str) -> bool:
+        return os.path.basename(model_name) in self._artifacts
+
+    def get(self, model_name: str):
+        """Returns the artifact for a file name in models/."""
+        name = os.path.basename(model_name)
+        entry = self._artifacts.get(name)
+        if entry is None:
+            raise FileNotFoundError(f"❌ Model file not found: {os.path.join(self.models_dir, name)}")
+        return entry["model"]
+
+    def versions(self) -> dict:
+        return {name: entry["sha256"] for name, entry in self._artifacts.items()}
+
+    def version(self) -> str:
+        """
+        Single fingerprint of the whole model set.
+        """
+        digest = hashlib.sha256()
+        for name, sha256 in sorted(self.versions().items()):
+            digest.update(f"{name}:{sha256};".encode())
+        return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Process-wide in-memory registry of every model and scaler in models/.
+    Artifacts are versioned by (sha256, mtime) and the whole set is published
+    as one ModelSnapshot. Separate get() calls may straddle a hot swap, so code
+    that combines artifacts (a scaler and its model, or all five models of a
+    request) takes one snapshot() and reads them all from it.
+    """
+
+    def __init__(self, models_dir: str = MODELS_DIR, reload_interval: float = RELOAD_INTERVAL):
+        self.models_dir = models_dir
+        self.reload_interval = reload_interval
+        self._snapshot = ModelSnapshot({}, 0, models_dir)
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._scanned = None  # monotonic time of the last scan of models/
+
+    @property
+    def _artifacts(self) -> dict:
+        return self._snapshot._artifacts
+
+    @property
+    def generation(self) -> int:
+        """Bumped on every published change."""
+        return self._snapshot.generation
 
-    return model
+    def load_all(self) -> bool:
+        """
+        Scans models/ and (re)loads changed artifacts. Returns True when the
+        published set changed. Unchanged files (same mtime and size) are not re-read.
+        """
+        with self._lock:
+            current, current_generation = self._artifacts, self.generation
+            updated = {}
+            changed = False
+            self._scanned = time.monotonic()
+
+            if not os.path.isdir(self.models_dir):
+                return False
+
+            for name in sorted(os.listdir(self.models_dir)):
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(self.models_dir, name)
+                stat = os.stat(path)
+                entry = current.get(name)
+
+                if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                    updated[name] = entry
+                    continue
+
+                sha256 = _file_hash(path)
+                if entry and entry["sha256"] == sha256:
+                    updated[name] = dict(entry, mtime=stat.st_mtime, size=stat.st_size)
+                    continue
+
+                try:
+                    model = _read_pickle(path)
+                except Exception as e:
+                    # Half-copied or corrupt file: keep serving the previous version
+                    print(f"⚠️ Failed to load {name}, keeping previous version: {e}")
+                    if entry:
+                        updated[name] = entry
+                    continue
+
+                updated[name] = {"model": model, "sha256": sha256, "mtime": stat.st_mtime, "size": stat.st_size}
+                changed = True
+                print(f"✅ Loaded model: {name} ({sha256[:12]})")
+
+            if set(updated) != set(current):
+                changed = True
+
+            # Single reference assignment publishes the new set and its generation atomically
+            self._snapshot = ModelSnapshot(updated, current_generation + 1 if changed else current_generation,
+                                           self.models_dir)
+            return changed
+
+    def _rescan_due(self) -> bool:
+        """
+        Whether a missing artifact is worth a scan of models/: on first use,
+        then (with no watcher rescanning) at most once per reload interval.
+        Otherwise a missing model stays missing until the watcher sees it.
+        """
+        scanned = self._scanned
+        if scanned is None:
+            return True
+        return self._watcher is None and time.monotonic() - scanned >= self.reload_interval
+
+    def snapshot(self) -> ModelSnapshot:
+        """
+        The current model set, loaded on first use. Take one per request (or
+        batch) and read every scaler and model from it.
+        """
+        if not self._snapshot._artifacts and self._rescan_due():
+            self.load_all()
+        return self._snapshot
+
+    def get(self, model_name: str):
+        """
+        Returns the in-memory artifact for a file name in models/ from the
+        current set (use snapshot() to read several artifacts consistently).
+        """
+        if model_name not in self._snapshot and self._rescan_due():
+            self.load_all()
+        return self._snapshot.get(model_name)
+
+    def versions(self) -> dict:
+        return self._snapshot.versions()
+
+    def version(self) -> str:
+        """
+        Single fingerprint of the whole model set.
+        """
+        return self._snapshot.version()
+
+    def start_watcher(self, interval: float = RELOAD_INTERVAL):
+        """
+        Polls models/ in a daemon thread and hot-swaps new artifacts.
+        """
+        if self._watcher is not None:
+            return
+
+        def _watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    if self.load_all():
+                        print(f"🔄 Model set reloaded: {self.version()[:12]}")
+                except Exception as e:
+                    print(f"⚠️ Model reload failed: {e}")
+
+        self._watcher = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+
+registry = ModelRegistry()
+
+
+def load_model(model_name: str, models: ModelSnapshot = None):
+    """
+    Returns a model from the in-memory registry (loaded once, hot-reloaded on
+    change), or from `models` when the caller holds a snapshot.
+    """
+    with span("model_load"):
+        return (models or registry).get(model_name)
@@ -0,0 +1,195 @@
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_PREFIX = "parkinson_"
+# Seconds; spans range from sub-millisecond lookups to minute-long recordings
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_metrics = []
+# Per-request {stage: seconds}; None outside a request
+_timings = contextvars.ContextVar("stage_timings", default=None)
+
+
+def _format_value(value) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    """
+    Base for all metrics. With function=..., the (unlabelled) value is read at
+    scrape time instead, for state that already lives elsewhere (queue depth, cache stats).
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels=(), function=None):
+        self.name = METRICS_PREFIX + name
+        self.help = help
+        self.labels = tuple(labels)
+        self.function = function
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def _samples(self):
+        if self.function is not None:
+            try:
+                return [((), float(self.function()))]
+            except Exception:
+                return []
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                  for key, value in self._samples()]
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Current value per label set."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set (Prometheus semantics)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            # New list per update, so a concurrent scrape never sees a half-updated row
+            counts = [count + (value <= bound) for count, bound in zip(counts, self.buckets)]
+            self._values[key] = (counts, total + value)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, (counts, total) in self._samples():
+            for bound, count in zip(self.buckets, counts):
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {counts[-1]}")
+        return lines
+
+
+stage_seconds = Histogram("stage_duration_seconds", "Time spent in one pipeline stage.", ["stage"])
+stage_errors = Counter("stage_errors_total", "Exceptions raised inside a pipeline stage.", ["stage", "type"])
+request_seconds = Histogram("request_duration_seconds", "HTTP request latency.", ["endpoint"])
+requests_total = Counter("requests_total", "HTTP requests by endpoint and response code.", ["endpoint", "code"])
+requests_in_flight = Gauge("requests_in_flight", "HTTP requests currently being handled.")
+outcomes_total = Counter("predictions_total", "Assessments returned, by status.", ["status"])
+
+
+def record(stage: str, seconds: float):
+    """
+    Adds one stage duration to the histogram and to the current request's
+    breakdown. Used directly for stages timed in worker processes.
+    """
+    stage_seconds.observe(seconds, stage=stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage: str):
+    """Times the enclosed block as one stage; exceptions are counted per stage and type."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        stage_errors.inc(stage=stage, type=type(e).__name__)
+        raise
+    finally:
+        record(stage, time.perf_counter() - started)
+
+
+def start_timings() -> dict:
+    """Starts a fresh per-request stage breakdown in the current context."""
+    timings = {}
+    _timings.set(timings)
+    return timings
+
+
+def collected_timings() -> dict:
+    return dict(_timings.get() or {})
+
+
+def current_timings():
+    """
+    The current request's breakdown itself (None outside a request), for work
+    that runs on another thread to report back with merge_timings().
+    """
+    return _timings.get()
+
+
+def merge_timings(timings, breakdown: dict):
+    """Adds stages timed elsewhere to a request's breakdown (already in the histogram)."""
+    if timings is None:
+        return
+    for stage, seconds in breakdown.items():
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def server_timing(timings: dict, total: float = None) -> str:
+    """Server-Timing header value (milliseconds), in the order stages ran."""
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in list(_metrics):
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 256))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", 3600))
+# Path of an SQLite file for the on-disk tier; empty disables it
+RESULT_CACHE_DB = os.environ.get("RESULT_CACHE_DB", "")
+
+
+def cache_key(samples, sample_rate, age, sex, test_time, model_version) -> str:
+    """
+    Content address of one request: decoded audio plus every input that changes the result.
+    """
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(samples, dtype=np.float32).tobytes())
+    digest.update(json.dumps([int(sample_rate), age, sex, test_time, model_version]).encode())
+    return digest.hexdigest()
+
+
+def file_key(fileobj, age, sex, test_time, model_version, chunk_size: int = 1 << 20) -> str:
+    """
+    Content address of a request whose audio is analyzed straight from the file
+    (windowed analysis): the file's bytes, read in chunks, plus the inputs.
+    The file object is rewound afterwards.
+    """
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    digest.update(json.dumps(["file", age, sex, test_time, model_version]).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier result cache: an in-memory LRU in front of an optional SQLite store.
+    Both tiers honour the same TTL; counters track hits per tier and misses.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL, db_path: str = RESULT_CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._memory = OrderedDict()  # key -> (stored_at, result)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if db_path:
+            self._db().execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, stored_at REAL, result TEXT)")
+
+    def _db(self):
+        # One connection per thread; SQLite connections are not shareable across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+        if self.db_path:
+            row = self._db().execute("SELECT stored_at, result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[0] <= self.ttl:
+                result = json.loads(row[1])
+                self._remember(key, row[0], result)
+                with self._lock:
+                    self.disk_hits += 1
+                return result
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, result: dict):
+        stored_at = time.time()
+        self._remember(key, stored_at, result)
+        if self.db_path:
+            conn = self._db()
+            conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (key, stored_at, json.dumps(result)))
+            conn.execute("DELETE FROM results WHERE stored_at < ?", (stored_at - self.ttl,))
+
+    def _remember(self, key, stored_at, result):
+        with self._lock:
+            self._memory[key] = (stored_at, result)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "entries": len(self._memory)}
+
+
+result_cache = ResultCache()
@@ -0,0 +1,232 @@
+"""
+Spooled storage for request uploads.
+
+Each uploaded file stays in memory up to SPOOL_MEMORY_MB and then rolls over
+to its own file in SPOOL_DIR, named after the worker's pid and a random id and
+created exclusively, so concurrent uploads never share a path. The file is
+deleted when the request ends (Flask closes the request's files).
+
+A janitor thread per process sweeps SPOOL_DIR every SPOOL_JANITOR_SECONDS for
+what a killed worker left behind: files of processes that no longer exist,
+files older than SPOOL_MAX_AGE_SECONDS, and then the oldest files while the
+directory is over SPOOL_MAX_MB. Removing a file that is still being read is
+safe: the name goes, the open file keeps its data until the reader closes it.
+"""
+import io
+import os
+import threading
+import time
+import uuid
+from utils import metrics
+
+SPOOL_DIR = os.environ.get("SPOOL_DIR", "data_storage/spool")
+SPOOL_MEMORY_MB = float(os.environ.get("SPOOL_MEMORY_MB", 1))
+SPOOL_MAX_MB = float(os.environ.get("SPOOL_MAX_MB", 2048))
+SPOOL_MAX_AGE_SECONDS = float(os.environ.get("SPOOL_MAX_AGE_SECONDS", 3600))
+SPOOL_JANITOR_SECONDS = float(os.environ.get("SPOOL_JANITOR_SECONDS", 60))
+SUFFIX = ".upload"
+
+removed_total = metrics.Counter("spool_removed_total", "Spool files removed by the janitor, by reason.", ["reason"])
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SpoolFile(io.RawIOBase):
+    """
+    An upload buffered in memory that moves to a unique file in the spool
+    directory once it grows past the spool's memory limit. fileno() is only
+    available after that (in_memory is False); until then getvalue() has the bytes.
+    """
+
+    def __init__(self, spool):
+        super().__init__()
+        self._spool = spool
+        self._file = io.BytesIO()
+        self.path = None
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def _move_to_disk(self):
+        path, f = self._spool._create()
+        position = self._file.tell()
+        f.write(self._file.getbuffer())
+        f.seek(position)
+        self._file, self.path = f, path
+
+    def write(self, data) -> int:
+        written = self._file.write(data)
+        if self.in_memory and self._file.tell() > self._spool.memory_bytes:
+            self._move_to_disk()
+        return written
+
+    def read(self, size=-1) -> bytes:
+        return self._file.read(size)
+
+    def readinto(self, buffer) -> int:
+        return self._file.readinto(buffer)
+
+    def readline(self, size=-1) -> bytes:
+        return self._file.readline(size)
+
+    def seek(self, offset, whence=io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def flush(self):
+        if not self.closed:
+            self._file.flush()
+
+    def fileno(self) -> int:
+        if self.in_memory:
+            raise io.UnsupportedOperation("spooled upload is still in memory")
+        return self._file.fileno()
+
+    def getvalue(self) -> bytes:
+        if not self.in_memory:
+            raise io.UnsupportedOperation("spooled upload is on disk")
+        return self._file.getvalue()
+
+    def close(self):
+        if self.closed:
+            return
+        path, self.path = self.path, None
+        try:
+            super().close()  # flushes first
+            self._file.close()
+        finally:
+            if path is not None:
+                self._spool._remove(path)
+
+
+class Spool:
+    """Upload files of this process, plus the janitor that keeps the directory within its quotas."""
+
+    def __init__(self, directory: str = SPOOL_DIR, memory_mb: float = SPOOL_MEMORY_MB, max_mb: float = SPOOL_MAX_MB,
+                 max_age: float = SPOOL_MAX_AGE_SECONDS, interval: float = SPOOL_JANITOR_SECONDS):
+        self.directory = directory
+        self.memory_bytes = int(memory_mb * 2 ** 20)
+        self.max_bytes = max_mb * 2 ** 20
+        self.max_age = max_age
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._live = set()
+        self._pid = None
+
+    def _ensure_janitor(self):
+        # Forked workers inherit the object but not the thread; each process runs its own
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._live = set()
+            os.makedirs(self.directory, exist_ok=True)
+            threading.Thread(target=self._run, name="spool-janitor", daemon=True).start()
+
+    def open(self) -> SpoolFile:
+        """A new upload file (in memory until it grows past memory_bytes)."""
+        self._ensure_janitor()
+        return SpoolFile(self)
+
+    def _create(self):
+        path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex}{SUFFIX}")
+        f = open(path, "x+b")  # exclusive: never reuses an existing path
+        with self._lock:
+            self._live.add(path)
+        return path, f
+
+    def _remove(self, path: str):
+        with self._lock:
+            self._live.discard(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # already swept
+
+    def in_use(self) -> int:
+        """Upload files of this process on disk."""
+        return len(self._live)
+
+    def usage(self):
+        """(files, bytes) in the spool directory, all processes."""
+        files = self._files()
+        return len(files), sum(size for _, _, size, _ in files)
+
+    def _files(self) -> list:
+        """[(mtime, path, size, pid)] of every spool file, oldest first."""
+        files = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return files
+        for entry in entries:
+            if not entry.name.endswith(SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+                pid = int(entry.name.split("-", 1)[0])
+            except (FileNotFoundError, ValueError):
+                continue
+            files.append((stat.st_mtime, entry.path, stat.st_size, pid))
+        return sorted(files)
+
+    def sweep(self) -> int:
+        """One janitor pass; returns the number of files removed."""
+        now = time.time()
+        kept, removed = [], 0
+        for mtime, path, size, pid in self._files():
+            reason = None
+            if pid != os.getpid() and not _pid_alive(pid):
+                reason = "orphaned"
+            elif now - mtime > self.max_age:
+                reason = "expired"
+            if reason is None:
+                kept.append((path, size))
+                continue
+            self._remove(path)
+            removed_total.inc(reason=reason)
+            removed += 1
+        total = sum(size for _, size in kept)
+        for path, size in kept:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            removed_total.inc(reason="quota")
+            removed += 1
+            total -= size
+        return removed
+
+    def _run(self):
+        while True:
+            try:
+                removed = self.sweep()
+                if removed:
+                    print(f"🧹 Spool janitor removed {removed} upload files")
+            except Exception as e:
+                print(f"⚠️ Spool janitor failed: {e}")
+            time.sleep(self.interval)
+
+
+spool = Spool()
+
+metrics.Gauge("spool_files_in_use", "Upload files of this process on disk.", function=spool.in_use)